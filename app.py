@@ -5,7 +5,6 @@ focando apenas no cálculo correto do diagnóstico financeiro.
 """
 
 import os
-import json
 import logging
 import uuid
 from datetime import datetime
@@ -16,6 +15,15 @@ from werkzeug.middleware.proxy_fix import ProxyFix
 # Importar módulos de processamento
 from document_processor import DocumentProcessor, FinancialDiagnostic, ValuationCalculator
 from questionnaire_storage import QuestionnaireTemplate
+from scoring_tables import default_scoring_tables
+from repositories import create_repository, storage_config_from_env
+from diagnostic_service import DiagnosticService
+from peer_benchmarks import PeerBenchmarks
+from portfolio_analytics import PortfolioAnalytics
+from sensitivity_analysis import sensitivity_surface
+from valuation_monte_carlo import monte_carlo_valuation
+from dcf_sensitivity import dcf_sensitivity_table
+from memoization import Memoizer, MemoizedFinancialDiagnostic, MemoizedValuationCalculator, DEFAULT_MEMO_BYTES
 
 # Configuração do aplicativo
 app = Flask(__name__)
@@ -36,6 +44,15 @@ os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
 DATA_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
 os.makedirs(DATA_FOLDER, exist_ok=True)
 
+# Configurações do armazenamento ("json" em arquivos, "sqlite" embarcado ou "memory"),
+# lidas das variáveis STORAGE_BACKEND, SQLITE_PATH, STORAGE_LAYOUT, STORAGE_CODEC etc.
+app.config.update(storage_config_from_env(DATA_FOLDER))
+
+# Memoização dos cálculos por conteúdo das entradas (0 desativa o cache em memória;
+# MEMO_FOLDER compartilha os resultados entre workers pelo disco)
+app.config["MEMO_CACHE_BYTES"] = int(os.environ.get("MEMO_CACHE_BYTES", DEFAULT_MEMO_BYTES))
+app.config["MEMO_FOLDER"] = os.environ.get("MEMO_FOLDER", "")
+
 # Configurar logging
 if not app.debug:
     stream_handler = logging.StreamHandler()
@@ -46,24 +63,30 @@ if not app.debug:
 
 # Inicializar classes de processamento
 document_processor = DocumentProcessor(app.config["UPLOAD_FOLDER"])
-financial_diagnostic = FinancialDiagnostic()
+# As faixas de pontuação (scoring_thresholds.json ou SCORING_THRESHOLDS_PATH) são compiladas na inicialização
+financial_diagnostic = FinancialDiagnostic(default_scoring_tables())
 valuation_calculator = ValuationCalculator()
+memoizer = None
+if app.config["MEMO_CACHE_BYTES"] > 0 or app.config["MEMO_FOLDER"]:
+    memoizer = Memoizer(app.config["MEMO_CACHE_BYTES"], app.config["MEMO_FOLDER"])
+    financial_diagnostic = MemoizedFinancialDiagnostic(financial_diagnostic, memoizer)
+    valuation_calculator = MemoizedValuationCalculator(valuation_calculator, memoizer)
+
+# Inicializar o repositório de dados
+repository = create_repository(app.config, DATA_FOLDER)
+app.logger.info(f"Armazenamento configurado: {app.config['STORAGE_BACKEND']}")
 
-# Funções auxiliares para armazenamento em JSON
-def save_to_json(data, filename):
-    """Salva dados em um arquivo JSON."""
-    filepath = os.path.join(DATA_FOLDER, filename)
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    return filepath
-
-def load_from_json(filename):
-    """Carrega dados de um arquivo JSON."""
-    filepath = os.path.join(DATA_FOLDER, filename)
-    if os.path.exists(filepath):
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return None
+# Diagnósticos são pré-calculados nas gravações e lidos prontos nas páginas
+peer_benchmarks = PeerBenchmarks(repository)
+portfolio_analytics = PortfolioAnalytics(repository)
+diagnostic_service = DiagnosticService(repository, financial_diagnostic, peer_benchmarks, portfolio_analytics)
+
+# Funções auxiliares
+def valuation_distribution(responses):
+    """Distribuição do valuation por Monte Carlo, memoizada (quando ativa) pelas respostas e versão das tabelas."""
+    if memoizer is None:
+        return monte_carlo_valuation(responses)
+    return valuation_calculator.monte_carlo_valuation(responses)
 
 def allowed_file(filename):
     """Verifica se o arquivo tem uma extensão permitida."""
@@ -117,12 +140,18 @@ def dashboard():
         return redirect(url_for("login"))
     
     # Carrega empresas do usuário (para o MVP, usa dados de exemplo)
-    companies = load_from_json(f"companies_{session['user_id']}.json")
-    if not companies:
-        companies = []
+    companies = repository.list_companies(session["user_id"])
     
     return render_template("dashboard.html", companies=companies)
 
+@app.route("/api/portfolio")
+def portfolio_api():
+    if "user_id" not in session:
+        return jsonify({"error": "Não autenticado"}), 401
+    
+    # Indicadores agregados da carteira, mantidos em memória e invalidados nas gravações
+    return jsonify(portfolio_analytics.summary(session["user_id"]))
+
 @app.route("/add-company", methods=["GET", "POST"])
 def add_company():
     if "user_id" not in session:
@@ -146,16 +175,9 @@ def add_company():
             "created_at": datetime.utcnow().isoformat()
         }
         
-        # Carrega empresas existentes
-        companies = load_from_json(f"companies_{session['user_id']}.json")
-        if not companies:
-            companies = []
-        
         # Adiciona nova empresa
-        companies.append(company)
-        
-        # Salva empresas
-        save_to_json(companies, f"companies_{session['user_id']}.json")
+        repository.add_company(company)
+        portfolio_analytics.invalidate_user(session["user_id"])
         
         flash("Empresa adicionada com sucesso!", "success")
         return redirect(url_for("dashboard"))
@@ -168,27 +190,17 @@ def company_detail(company_id):
         flash("Por favor, faça login para acessar esta página.", "warning")
         return redirect(url_for("login"))
     
-    # Carrega empresas
-    companies = load_from_json(f"companies_{session['user_id']}.json")
-    if not companies:
-        flash("Empresa não encontrada.", "danger")
-        return redirect(url_for("dashboard"))
-    
     # Encontra a empresa específica
-    company = next((c for c in companies if c["id"] == company_id), None)
+    company = repository.get_company(session["user_id"], company_id)
     if not company:
         flash("Empresa não encontrada.", "danger")
         return redirect(url_for("dashboard"))
     
     # Carrega documentos da empresa
-    documents = load_from_json(f"documents_{company_id}.json")
-    if not documents:
-        documents = []
+    documents = repository.list_documents(company_id)
     
     # Carrega questionários da empresa
-    questionnaires = load_from_json(f"questionnaires_{company_id}.json")
-    if not questionnaires:
-        questionnaires = []
+    questionnaires = repository.list_questionnaires(company_id)
     
     return render_template("company_detail.html", company=company, documents=documents, questionnaires=questionnaires)
 
@@ -229,20 +241,16 @@ def upload_document(company_id):
                 "document_type": document_type,
                 "file_path": file_path,
                 "extracted_data": result.get("extracted_data", {}),
+                "financial_ratios": result.get("financial_ratios", {}),
                 "status": result.get("analysis_status", "Processado"),
                 "upload_date": datetime.utcnow().isoformat()
             }
             
-            # Carrega documentos existentes
-            documents = load_from_json(f"documents_{company_id}.json")
-            if not documents:
-                documents = []
-            
             # Adiciona novo documento
-            documents.append(document)
+            repository.add_document(document)
             
-            # Salva documentos
-            save_to_json(documents, f"documents_{company_id}.json")
+            # Atualiza o diagnóstico com o novo documento
+            diagnostic_service.refresh(company_id)
             
             flash("Documento enviado com sucesso!", "success")
             return redirect(url_for("company_detail", company_id=company_id))
@@ -278,16 +286,11 @@ def questionnaire(company_id):
             "created_at": datetime.utcnow().isoformat()
         }
         
-        # Carrega questionários existentes
-        questionnaires = load_from_json(f"questionnaires_{company_id}.json")
-        if not questionnaires:
-            questionnaires = []
-        
         # Adiciona novo questionário
-        questionnaires.append(questionnaire_data)
+        repository.add_questionnaire(questionnaire_data)
         
-        # Salva questionários
-        save_to_json(questionnaires, f"questionnaires_{company_id}.json")
+        # Atualiza o diagnóstico com as novas respostas
+        diagnostic_service.refresh(company_id)
         
         flash("Questionário enviado com sucesso!", "success")
         return redirect(url_for("company_detail", company_id=company_id))
@@ -300,27 +303,49 @@ def financial_diagnostic_view(company_id):
         flash("Por favor, faça login para acessar esta página.", "warning")
         return redirect(url_for("login"))
     
-    # Carrega questionários da empresa
-    questionnaires = load_from_json(f"questionnaires_{company_id}.json")
-    if not questionnaires or len(questionnaires) == 0:
+    # Lê o diagnóstico pré-calculado (recalcula apenas se estiver desatualizado)
+    diagnostic = diagnostic_service.get(company_id)
+    if not diagnostic:
         flash("É necessário preencher o questionário antes de gerar o diagnóstico financeiro.", "warning")
         return redirect(url_for("company_detail", company_id=company_id))
     
-    # Usa o questionário mais recente
-    questionnaire_data = sorted(questionnaires, key=lambda q: q["created_at"], reverse=True)[0]
+    # Percentis dos indicadores entre as empresas do mesmo setor
+    peers = peer_benchmarks.percentiles(diagnostic)
     
-    # Carrega documentos da empresa
-    documents = load_from_json(f"documents_{company_id}.json")
-    if not documents:
-        documents = []
+    # Valores mínimos de margem, faturamento e liquidez para a saúde financeira "Saudável",
+    # calculados e armazenados com o diagnóstico
+    goal = diagnostic.get("goal")
+    
+    return render_template("financial_diagnostic.html", company_id=company_id, diagnostic=diagnostic, peers=peers, goal=goal)
+
+@app.route("/api/company/<company_id>/what-if", methods=["GET", "POST"])
+def what_if_api(company_id):
+    if "user_id" not in session:
+        return jsonify({"error": "Não autenticado"}), 401
+    
+    if not repository.get_company(session["user_id"], company_id):
+        return jsonify({"error": "Empresa não encontrada"}), 404
     
-    # Gera o diagnóstico financeiro
-    diagnostic = financial_diagnostic.generate_diagnostic(documents, questionnaire_data["responses"])
+    # Grade de variações ({"grid": {...}}) e, opcionalmente, respostas que substituem o questionário
+    payload = request.get_json(silent=True) or {}
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Envie um objeto JSON com grid e responses"}), 400
+    responses = payload.get("responses")
+    if responses is not None and not isinstance(responses, dict):
+        return jsonify({"error": "responses: informe um objeto {campo: valor}"}), 400
+    if responses is None:
+        questionnaire_data = repository.latest_questionnaire(company_id)
+        if not questionnaire_data:
+            return jsonify({"error": "É necessário preencher o questionário antes da simulação"}), 400
+        responses = questionnaire_data["responses"]
+    documents = repository.list_documents(company_id)
     
-    # Salva o diagnóstico
-    save_to_json(diagnostic, f"diagnostic_{company_id}.json")
+    try:
+        surface = sensitivity_surface(documents, responses, payload.get("grid"), default_scoring_tables())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    return render_template("financial_diagnostic.html", company_id=company_id, diagnostic=diagnostic)
+    return jsonify(surface)
 
 @app.route("/company/<company_id>/valuation")
 def valuation_view(company_id):
@@ -329,28 +354,64 @@ def valuation_view(company_id):
         return redirect(url_for("login"))
     
     # Carrega diagnóstico financeiro
-    diagnostic = load_from_json(f"diagnostic_{company_id}.json")
+    diagnostic = diagnostic_service.get(company_id)
     if not diagnostic:
         flash("É necessário gerar o diagnóstico financeiro antes de calcular o valuation.", "warning")
         return redirect(url_for("company_detail", company_id=company_id))
     
-    # Carrega questionários da empresa
-    questionnaires = load_from_json(f"questionnaires_{company_id}.json")
-    if not questionnaires or len(questionnaires) == 0:
+    # Usa o questionário mais recente
+    questionnaire_data = repository.latest_questionnaire(company_id)
+    if not questionnaire_data:
         flash("É necessário preencher o questionário antes de calcular o valuation.", "warning")
         return redirect(url_for("company_detail", company_id=company_id))
     
-    # Usa o questionário mais recente
-    questionnaire_data = sorted(questionnaires, key=lambda q: q["created_at"], reverse=True)[0]
-    
     # Calcula o valuation
     valuation = valuation_calculator.calculate_valuation(diagnostic, questionnaire_data["responses"])
     
-    # Salva o valuation
-    save_to_json(valuation, f"valuation_{company_id}.json")
+    # Distribuição do valuation por Monte Carlo (sorteios semeados: reproduzível)
+    try:
+        valuation = dict(valuation, monte_carlo=valuation_distribution(questionnaire_data["responses"]))
+    except ValueError as e:
+        app.logger.info(f"Valuation por Monte Carlo indisponível para a empresa {company_id}: {e}")
+    
+    # Sensibilidade do DCF à taxa de desconto e ao crescimento na perpetuidade
+    try:
+        valuation = dict(valuation, sensibilidade_dcf=dcf_sensitivity_table(questionnaire_data["responses"]))
+    except ValueError as e:
+        app.logger.info(f"Sensibilidade do DCF indisponível para a empresa {company_id}: {e}")
+    
+    # Salva o valuation (somente quando mudou desde a última visualização)
+    if repository.get_valuation(company_id) != valuation:
+        repository.save_valuation(company_id, valuation)
     
     return render_template("valuation.html", company_id=company_id, valuation=valuation)
 
+@app.route("/api/company/<company_id>/dcf-sensitivity")
+def dcf_sensitivity_api(company_id):
+    if "user_id" not in session:
+        return jsonify({"error": "Não autenticado"}), 401
+    
+    if not repository.get_company(session["user_id"], company_id):
+        return jsonify({"error": "Empresa não encontrada"}), 404
+    
+    questionnaire_data = repository.latest_questionnaire(company_id)
+    if not questionnaire_data:
+        return jsonify({"error": "É necessário preencher o questionário antes de calcular o valuation"}), 400
+    
+    # Taxas opcionais separadas por vírgula, em frações (ex.: ?taxas=0.12,0.15&crescimentos=0.02,0.03)
+    taxas = request.args.get("taxas")
+    crescimentos = request.args.get("crescimentos")
+    try:
+        table = dcf_sensitivity_table(
+            questionnaire_data["responses"],
+            taxas.split(",") if taxas else None,
+            crescimentos.split(",") if crescimentos else None
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify(table)
+
 # Rota para servir arquivos estáticos
 @app.route("/static/<path:filename>")
 def serve_static(filename):
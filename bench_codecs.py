@@ -0,0 +1,90 @@
+"""
+Benchmark dos codecs de armazenamento com payloads realistas de diagnóstico.
+Compara o formato antigo (JSON com indent=2) com JSON compacto, orjson e msgpack
+(quando instalados) em tempo de serialização, desserialização e bytes em disco.
+
+Uso:
+    python bench_codecs.py [--records 1000] [--repeat 5]
+"""
+
+import json
+import time
+import random
+import logging
+import argparse
+
+import storage_codecs
+from document_processor import FinancialDiagnostic, logger as processor_logger
+
+
+def make_payload(records, seed):
+    """Gera uma lista de diagnósticos a partir de questionários sintéticos."""
+    processor_logger.setLevel(logging.WARNING)
+    rng = random.Random(seed)
+    diagnostic = FinancialDiagnostic()
+    documents = [
+        {"document_type": "balanco_patrimonial", "extracted_data": {
+            "ativo_total": 1500000, "passivo_total": 900000, "patrimonio_liquido": 600000,
+            "ativo_circulante": 800000, "passivo_circulante": 500000, "estoques": 300000}},
+        {"document_type": "dre", "extracted_data": {
+            "receita_liquida": 2000000, "custo_produtos": 1200000, "lucro_bruto": 800000,
+            "despesas_operacionais": 500000, "lucro_operacional": 300000, "lucro_liquido": 250000}}
+    ]
+    payload = []
+    for _ in range(records):
+        receita = rng.uniform(2e5, 5e7)
+        responses = {f"receita_ano{i}": receita * (1 + rng.uniform(0, 0.4)) ** (i - 1) for i in range(1, 6)}
+        responses.update({f"custos_ano{i}": responses[f"receita_ano{i}"] * rng.uniform(0.5, 1.1) for i in range(1, 6)})
+        responses.update({
+            "num_funcionarios": rng.randint(1, 500),
+            "setor_atuacao": rng.choice(["Tecnologia", "Saúde", "Varejo", "Serviços", "Indústria"]),
+            "modelo_negocios": rng.choice(["Assinatura", "Venda direta", "Licenciamento"]),
+            "principais_produtos": "Software de gestão financeira e serviços de consultoria"
+        })
+        payload.append(diagnostic.generate_diagnostic(documents if rng.random() < 0.5 else [], responses))
+    return payload
+
+
+def bench(name, dumps, loads, payload, repeat):
+    """Mede o melhor tempo de serialização e desserialização e o tamanho gerado."""
+    best_dump = best_load = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        raw = dumps(payload)
+        best_dump = min(best_dump, time.perf_counter() - start)
+        start = time.perf_counter()
+        loads(raw)
+        best_load = min(best_load, time.perf_counter() - start)
+    return name, best_dump * 1000, best_load * 1000, len(raw)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos codecs de armazenamento")
+    parser.add_argument("--records", type=int, default=1000, help="Diagnósticos no payload")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    payload = make_payload(args.records, args.seed)
+    results = [bench(
+        "json indent=2 (antigo)",
+        lambda data: json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8"),
+        lambda raw: json.loads(raw),
+        payload, args.repeat
+    )]
+    for codec in storage_codecs.available_codecs():
+        results.append(bench(
+            codec,
+            lambda data, codec=codec: storage_codecs.encode(data, codec),
+            storage_codecs.decode,
+            payload, args.repeat
+        ))
+
+    baseline_bytes = results[0][3]
+    print(f"{'codec':<24} {'dump (ms)':>10} {'load (ms)':>10} {'bytes':>12} {'vs antigo':>10}")
+    for name, dump_ms, load_ms, size in results:
+        print(f"{name:<24} {dump_ms:>10.1f} {load_ms:>10.1f} {size:>12,} {size / baseline_bytes:>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark do resumo da carteira de um usuário com muitas empresas.
+Mede o primeiro cálculo (leitura de todos os diagnósticos armazenados), o recálculo
+após a gravação de um diagnóstico e a leitura do resumo em cache.
+
+Uso:
+    python bench_portfolio_analytics.py
+    python bench_portfolio_analytics.py --companies 10000 --backend json
+"""
+
+import time
+import random
+import shutil
+import logging
+import argparse
+import tempfile
+
+from document_processor import FinancialDiagnostic
+from diagnostic_batch import diagnostic_columns, generate_diagnostic_batch
+from portfolio_analytics import PortfolioAnalytics
+from repositories import create_repository, storage_config_from_env
+from bench_diagnostic_batch import make_record
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do resumo da carteira")
+    parser.add_argument("--companies", type=int, default=10000, help="Empresas do usuário")
+    parser.add_argument("--backend", choices=["memory", "json", "sqlite"], default="json")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    rng = random.Random(args.seed)
+    data_folder = tempfile.mkdtemp(prefix="bench_portfolio_")
+    try:
+        config = storage_config_from_env(data_folder, {"STORAGE_BACKEND": args.backend})
+        repository = create_repository(config, data_folder)
+
+        # Um diagnóstico completo serve de modelo; os scores e KPIs vêm do cálculo em lote
+        template = FinancialDiagnostic().generate_diagnostic(*make_record(rng))
+        records = [make_record(rng) for _ in range(args.companies)]
+        batch = generate_diagnostic_batch(diagnostic_columns(records))
+        companies = []
+        for i, (_, responses) in enumerate(records):
+            company_id = f"c{i}"
+            companies.append({"id": company_id, "user_id": "u1", "name": f"Empresa {i}"})
+            diagnostic = dict(template, overall_score=float(batch["overall_score"][i]))
+            diagnostic["dashboard"] = dict(
+                template["dashboard"],
+                health_status=str(batch["health_status"][i]),
+                kpis={name: float(values[i]) for name, values in batch["kpis"].items()},
+                business_info=dict(template["dashboard"]["business_info"], setor_atuacao=responses["setor_atuacao"])
+            )
+            repository.save_diagnostic(company_id, diagnostic)
+        repository.add_companies(companies)
+
+        analytics = PortfolioAnalytics(repository)
+        start = time.perf_counter()
+        analytics.summary("u1")
+        first = time.perf_counter() - start
+
+        analytics.invalidate_company("c0")
+        start = time.perf_counter()
+        analytics.summary("u1")
+        after_write = time.perf_counter() - start
+
+        start = time.perf_counter()
+        analytics.summary("u1")
+        cached = time.perf_counter() - start
+
+        print(f"{'empresas':>10} {'primeiro cálculo':>18} {'após gravação':>15} {'em cache':>10}")
+        print(f"{args.companies:>10} {first * 1000:>16.1f}ms {after_write * 1000:>13.1f}ms {cached * 1000:>8.3f}ms")
+    finally:
+        shutil.rmtree(data_folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark dos backends de armazenamento (JSON, SQLite e memória).
+Mede inserção, busca pontual, questionário mais recente por empresa e listagem
+para diferentes volumes de registros.
+
+Uso:
+    python bench_storage.py
+    python bench_storage.py --sizes 1000 100000 --backends json sqlite
+"""
+
+import os
+import time
+import uuid
+import random
+import argparse
+import tempfile
+import shutil
+
+from repositories import STORAGE_BACKENDS, JsonRepository, SQLiteRepository, MemoryRepository
+
+# Registros por empresa (questionários) e empresas por usuário usados no conjunto sintético
+RECORDS_PER_COMPANY = 100
+COMPANIES_PER_USER = 1000
+
+
+def make_repository(backend, folder):
+    """Cria um repositório vazio do backend informado."""
+    if backend == "json":
+        return JsonRepository(folder, cache_bytes=32 * 1024 * 1024)
+    if backend == "sqlite":
+        return SQLiteRepository(os.path.join(folder, "storage.sqlite3"))
+    return MemoryRepository()
+
+
+def make_questionnaire(company_id, i):
+    """Gera uma revisão sintética do questionário."""
+    return {
+        "id": str(uuid.uuid4()),
+        "company_id": company_id,
+        "responses": {
+            "receita_ano1": str(1000000 + i),
+            "custos_ano1": str(700000 + i),
+            "num_funcionarios": "10",
+            "setor_atuacao": "Tecnologia"
+        },
+        "created_at": f"2025-01-01T00:00:{i:09d}"
+    }
+
+
+def timed(func, count):
+    """Executa func e retorna operações por segundo."""
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    return count / elapsed if elapsed > 0 else float("inf")
+
+
+def run_backend(backend, size, lookups, seed):
+    """Executa o benchmark de um backend para um volume de registros."""
+    rng = random.Random(seed)
+    folder = tempfile.mkdtemp(prefix=f"bench-{backend}-")
+    try:
+        repository = make_repository(backend, folder)
+        num_companies = max(1, size // RECORDS_PER_COMPANY)
+        company_ids = [f"c{n}" for n in range(num_companies)]
+        companies = [
+            {"id": cid, "user_id": f"u{n // COMPANIES_PER_USER}", "name": f"Empresa {n}", "created_at": "2025-01-01T00:00:00"}
+            for n, cid in enumerate(company_ids)
+        ]
+
+        def append_all():
+            for company in companies:
+                repository.add_company(company)
+            for i in range(size):
+                repository.add_questionnaire(make_questionnaire(company_ids[i % num_companies], i))
+
+        results = {"append": timed(append_all, size + num_companies)}
+
+        sample = [rng.choice(companies) for _ in range(lookups)]
+
+        def point_lookups():
+            for company in sample:
+                assert repository.get_company(company["user_id"], company["id"]) is not None
+
+        def latest_lookups():
+            for company in sample:
+                assert repository.latest_questionnaire(company["id"]) is not None
+
+        def list_lookups():
+            for company in sample:
+                repository.list_questionnaires(company["id"])
+
+        results["point_lookup"] = timed(point_lookups, lookups)
+        results["latest_by_company"] = timed(latest_lookups, lookups)
+        results["list"] = timed(list_lookups, lookups)
+        return results
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos backends de armazenamento")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000], help="Números de registros")
+    parser.add_argument("--backends", nargs="+", default=list(STORAGE_BACKENDS), choices=STORAGE_BACKENDS)
+    parser.add_argument("--lookups", type=int, default=1000, help="Consultas por operação de leitura")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    operations = ["append", "point_lookup", "latest_by_company", "list"]
+    print(f"{'backend':<8} {'registros':>10} " + " ".join(f"{op + ' (ops/s)':>24}" for op in operations))
+    for size in args.sizes:
+        for backend in args.backends:
+            results = run_backend(backend, size, args.lookups, args.seed)
+            print(f"{backend:<8} {size:>10} " + " ".join(f"{results[op]:>24,.0f}" for op in operations), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark do valuation por Monte Carlo.
+Mede o tempo por empresa (sorteios, DCF vetorizado, percentis e histograma) para
+diferentes quantidades de sorteios e horizontes de projeção.
+
+Uso:
+    python bench_valuation_monte_carlo.py
+    python bench_valuation_monte_carlo.py --draws 100000 1000000 --years 5 20 --repeat 5
+"""
+
+import time
+import random
+import logging
+import argparse
+
+from valuation_monte_carlo import monte_carlo_valuation
+
+
+def make_responses(rng, years):
+    """Gera respostas sintéticas com séries anuais do horizonte informado."""
+    receita = rng.randrange(100000, 10000000, 1000)
+    receitas = [round(receita * (1 + rng.uniform(0, 0.3)) ** year) for year in range(years)]
+    custos = [round(value * rng.uniform(0.5, 0.95)) for value in receitas]
+    return {
+        "periodicidade": "anual",
+        "receitas_periodos": receitas,
+        "custos_periodos": custos,
+        "setor_atuacao": rng.choice(["Tecnologia", "Varejo", "Serviços"]),
+        "modelo_negocios": rng.choice(["Assinatura", "Venda direta"])
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do valuation por Monte Carlo")
+    parser.add_argument("--draws", type=int, nargs="+", default=[100000, 1000000], help="Sorteios por empresa")
+    parser.add_argument("--years", type=int, nargs="+", default=[5, 20], help="Anos do horizonte de projeção")
+    parser.add_argument("--repeat", type=int, default=5, help="Empresas medidas em cada configuração")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    rng = random.Random(args.seed)
+
+    print(f"{'sorteios':>10} {'anos':>5} {'ms/empresa':>12} {'sorteios/s':>14}")
+    for years in args.years:
+        for draws in args.draws:
+            companies = [make_responses(rng, years) for _ in range(args.repeat)]
+            start = time.perf_counter()
+            for responses in companies:
+                monte_carlo_valuation(responses, draws=draws)
+            elapsed = (time.perf_counter() - start) / len(companies)
+            print(f"{draws:>10} {years:>5} {elapsed * 1000:>12.1f} {draws / elapsed:>14,.0f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
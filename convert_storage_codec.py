@@ -0,0 +1,103 @@
+"""
+Converte os snapshots da pasta de dados JSON para outro codec de armazenamento.
+Percorre a pasta (incluindo as subpastas do layout particionado) e regrava cada
+snapshot das coleções do armazenamento sob o lock do arquivo, incorporando também o
+journal pendente. Outros arquivos da pasta (ex.: example_data.json) não são tocados.
+
+Uso:
+    python convert_storage_codec.py --codec msgpack [--data-folder data]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+
+from storage import JsonStore, JOURNAL_SUFFIX, COMPACTING_SUFFIX, LOCK_SUFFIX, LOCK_FOLDER, SHARDED_PREFIXES
+from storage_codecs import STORAGE_CODECS, available_codecs
+from peer_benchmarks import BENCHMARKS_FILENAME
+from repositories import PORTFOLIO_CHANGES_FILENAME
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+AUXILIARY_SUFFIXES = (JOURNAL_SUFFIX, COMPACTING_SUFFIX)
+
+# Arquivos do armazenamento: coleções por usuário/empresa e arquivos globais
+STORE_PREFIXES = SHARDED_PREFIXES
+STORE_FILENAMES = (BENCHMARKS_FILENAME, PORTFOLIO_CHANGES_FILENAME)
+
+
+def is_store_file(name):
+    """Indica se o arquivo pertence ao armazenamento da aplicação."""
+    return name in STORE_FILENAMES or name.startswith(STORE_PREFIXES)
+
+
+def iter_snapshots(data_folder):
+    """Percorre os snapshots da pasta de dados, incluindo coleções que só têm journal."""
+    for dirpath, dirnames, filenames in os.walk(data_folder):
+        # Locks (na subpasta .locks ou ao lado das coleções, em pastas antigas) não são dados
+        dirnames[:] = [name for name in dirnames if name != LOCK_FOLDER]
+        seen = set()
+        for name in filenames:
+            if name.startswith(".tmp-") or name.endswith(LOCK_SUFFIX):
+                continue
+            for suffix in AUXILIARY_SUFFIXES:
+                if name.endswith(suffix):
+                    name = name[:-len(suffix)]
+                    break
+            if name.endswith(".json") and is_store_file(name) and name not in seen:
+                seen.add(name)
+                yield os.path.join(dirpath, name)
+
+
+def convert(data_folder, codec):
+    """
+    Regrava todos os snapshots com o codec informado.
+
+    Raises:
+        RuntimeError: Se o codec de destino (ou o de algum arquivo) não estiver instalado
+    """
+    if codec not in available_codecs():
+        raise RuntimeError(f"O codec {codec} não está disponível (instale o pacote correspondente)")
+    store = JsonStore(data_folder, codec=codec)
+    converted = skipped = 0
+    bytes_before = bytes_after = 0
+    start = time.perf_counter()
+    for filepath in iter_snapshots(data_folder):
+        size_before = os.path.getsize(filepath) if os.path.exists(filepath) else 0
+        try:
+            store.rewrite_path(filepath)
+        except ValueError as e:
+            logger.warning(f"Arquivo ignorado {filepath}: {e}")
+            skipped += 1
+            continue
+        converted += 1
+        bytes_before += size_before
+        bytes_after += os.path.getsize(filepath)
+
+    elapsed = time.perf_counter() - start
+    logger.info(
+        f"{converted} arquivos convertidos para {store.codec} em {elapsed:.1f}s, {skipped} ignorados; "
+        f"snapshots: {bytes_before} -> {bytes_after} bytes"
+    )
+    return converted, skipped
+
+
+def main():
+    default_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+    parser = argparse.ArgumentParser(description="Converte os snapshots para outro codec de armazenamento")
+    parser.add_argument("--codec", required=True, choices=STORAGE_CODECS)
+    parser.add_argument("--data-folder", default=default_folder)
+    args = parser.parse_args()
+    try:
+        convert(args.data_folder, args.codec)
+    except RuntimeError as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Tabela de sensibilidade do DCF: valuation por fluxo de caixa descontado para uma
+grade de taxas de desconto e de crescimento na perpetuidade.
+A grade inteira é calculada de uma vez por broadcasting: os fatores de desconto
+(1 + taxa)^-(t+1) de todas as taxas formam uma matriz taxas x anos, o valor presente
+dos fluxos é um produto matriz-vetor e o valor terminal é combinado com os
+crescimentos em uma matriz taxas x crescimentos, sem laços em Python.
+Cada célula tem o mesmo valor de ValuationCalculator._calculate_dcf_valuation.
+"""
+
+import math
+import logging
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from document_processor import ValuationCalculator, PERPETUITY_GROWTH_RATE, format_currency
+from questionnaire_input import QuestionnaireInput
+
+logger = logging.getLogger(__name__)
+
+# Grade padrão: taxa do setor ± 4 p.p. e crescimento na perpetuidade de 0% a 6%, de 1 em 1 p.p.
+DEFAULT_RATE_STEPS = tuple(step / 100 for step in range(-4, 5))
+DEFAULT_GROWTH_RATES = tuple(rate / 100 for rate in range(0, 7))
+
+# Limite de células por tabela
+MAX_GRID_CELLS = 10000
+
+
+def dcf_grid(receitas, custos, discount_rates, growth_rates):
+    """
+    DCF para todas as combinações de taxa de desconto e crescimento na perpetuidade.
+
+    Args:
+        receitas, custos: Séries anuais do horizonte de projeção
+        discount_rates: Taxas de desconto (linhas)
+        growth_rates: Crescimentos na perpetuidade (colunas)
+
+    Returns:
+        Matriz (taxas x crescimentos); NaN onde o crescimento não é menor que a taxa
+    """
+    if np is None:
+        raise RuntimeError("A tabela de sensibilidade do DCF requer o pacote numpy (pip install numpy)")
+    fluxos = np.asarray(receitas, dtype=float) - np.asarray(custos, dtype=float)
+    taxas = np.asarray(discount_rates, dtype=float)[:, np.newaxis]
+    crescimentos = np.asarray(growth_rates, dtype=float)[np.newaxis, :]
+
+    # Fatores de desconto (1 + taxa)^-(t+1): taxas x anos
+    desconto = np.power(1 + taxas, -np.arange(1, len(fluxos) + 1))
+    valor_presente = desconto @ fluxos
+    with np.errstate(divide="ignore", invalid="ignore"):
+        valor_terminal = fluxos[-1] * (1 + crescimentos) / (taxas - crescimentos)
+    valuation = valor_presente[:, np.newaxis] + valor_terminal * desconto[:, -1:]
+    return np.where(crescimentos < taxas, valuation, np.nan)
+
+
+def _rates(values, name):
+    """Valida uma lista de taxas (frações, ex.: 0.15 para 15%)."""
+    try:
+        values = [float(value) for value in values]
+    except (TypeError, ValueError):
+        raise ValueError(f"{name}: valores numéricos inválidos")
+    if not values or not all(math.isfinite(value) and value > -1 for value in values):
+        raise ValueError(f"{name}: informe taxas maiores que -100%")
+    return values
+
+
+def dcf_sensitivity_table(questionnaire_data, discount_rates=None, growth_rates=None, calculator=None):
+    """
+    Tabela de sensibilidade do DCF de uma empresa.
+
+    Args:
+        questionnaire_data: Respostas do questionário (ou QuestionnaireInput)
+        discount_rates: Taxas de desconto (padrão: taxa do setor ± 4 p.p.)
+        growth_rates: Crescimentos na perpetuidade (padrão: 0% a 6%)
+        calculator: ValuationCalculator com as taxas de desconto dos setores
+
+    Raises:
+        ValueError: Para respostas inválidas, sem receita no último ano ou grade inválida
+
+    Returns:
+        Dicionário com "taxas_desconto", "crescimentos", "valores" (linhas por taxa; None
+        onde o crescimento não é menor que a taxa), "formatado" e "base" (taxa e
+        crescimento usados no valuation)
+    """
+    data = QuestionnaireInput.parse(questionnaire_data)
+    if data.errors:
+        raise ValueError("; ".join(data.errors))
+    if data.receita_final <= 0:
+        raise ValueError("É necessário fornecer projeções de receita para calcular o valuation.")
+    calculator = calculator or ValuationCalculator()
+
+    taxa_base = calculator.tables.discount_rate(data.setor_atuacao)
+    if discount_rates is None:
+        discount_rates = [round(taxa_base + step, 4) for step in DEFAULT_RATE_STEPS]
+    discount_rates = _rates(discount_rates, "taxas_desconto")
+    growth_rates = _rates(DEFAULT_GROWTH_RATES if growth_rates is None else growth_rates, "crescimentos")
+    if len(discount_rates) * len(growth_rates) > MAX_GRID_CELLS:
+        raise ValueError(f"A tabela tem {len(discount_rates) * len(growth_rates)} células; o limite é {MAX_GRID_CELLS}")
+
+    values = dcf_grid(data.receitas[:data.anos], data.custos[:data.anos], discount_rates, growth_rates)
+    logger.info(f"Tabela de sensibilidade do DCF com {values.size} células")
+    rows = np.where(np.isnan(values), None, values.astype(object)).tolist()
+    return {
+        "taxas_desconto": discount_rates,
+        "crescimentos": growth_rates,
+        "valores": rows,
+        "formatado": [[format_currency(value) if value is not None else None for value in row] for row in rows],
+        "base": {"taxa_desconto": taxa_base, "crescimento": PERPETUITY_GROWTH_RATE}
+    }
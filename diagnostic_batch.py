@@ -0,0 +1,304 @@
+"""
+Diagnóstico financeiro vetorizado para carteiras inteiras.
+Calcula os cinco scores, a pontuação geral, o status de saúde e os KPIs numéricos
+de milhares de empresas de uma vez a partir de entradas colunares (arrays NumPy),
+com resultados idênticos aos de FinancialDiagnostic.generate_diagnostic.
+
+Colunas de entrada (n empresas):
+    receitas, custos: séries anuais (n, k), k >= 5, a partir do ano 1 (0 quando não informado)
+    anos: (n,) horizonte de cada empresa em anos (opcional; padrão k), usado no CAGR
+    num_funcionarios, custos_fixos_pct: (n,) (custos_fixos_pct NaN equivale ao padrão 60)
+    margem_liquida, liquidez_corrente, endividamento_geral, prazo_medio_recebimento,
+    prazo_medio_pagamento, adjusted_revenue, adjusted_costs: (n,) índices e ajustes
+        vindos dos documentos, NaN quando ausentes
+    has_document_data: (n,) bool; se omitida, indica qualquer coluna de documento presente
+    setor_atuacao: (n,) setor de cada empresa, para as faixas de pontuação por setor (opcional)
+
+As faixas de pontuação são as mesmas do cálculo escalar (scoring_tables).
+
+O cálculo dos scores é todo vetorizado. A montagem das colunas (diagnostic_columns)
+converte em bloco as respostas com os campos anuais, mas ainda percorre as respostas
+em Python, e integra os documentos registro a registro; para carteiras grandes ela
+custa mais que o cálculo em lote (ver bench_diagnostic_batch.py).
+"""
+
+import math
+import logging
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from document_processor import FinancialDiagnostic
+from scoring_tables import default_scoring_tables
+from questionnaire_input import QuestionnaireInput, SERIES_YEARS, REVENUE_KEYS, COST_KEYS, REVENUE_SERIES_KEY
+
+logger = logging.getLogger(__name__)
+
+# Colunas com índices e ajustes extraídos dos documentos (NaN quando ausentes)
+DOCUMENT_COLUMNS = (
+    "margem_liquida", "liquidez_corrente", "endividamento_geral",
+    "prazo_medio_recebimento", "prazo_medio_pagamento", "adjusted_revenue", "adjusted_costs"
+)
+
+INDICATORS = ("rentabilidade", "liquidez", "endividamento", "eficiencia", "crescimento")
+
+# Distância relativa abaixo da qual um valor é recalculado em Python puro: np.power pode
+# diferir de math.pow no último bit, e np.round de round() em empates de arredondamento
+EXACT_TOLERANCE = 1e-9
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("O diagnóstico em lote requer o pacote numpy (pip install numpy)")
+
+
+def _is_plain(documents_data, questionnaire_data):
+    """Registro sem documentos e com os campos anuais do questionário (sem séries por período)."""
+    if documents_data:
+        return False
+    return questionnaire_data is None or (isinstance(questionnaire_data, dict) and not questionnaire_data.get(REVENUE_SERIES_KEY))
+
+
+def _plain_columns(responses):
+    """
+    Converte em bloco as respostas com os campos anuais, com as mesmas regras de
+    QuestionnaireInput.parse (vazio assume o padrão).
+
+    Returns:
+        Dicionário de arrays, ou None se algum valor for inválido (o chamador converte
+        registro a registro, registrando os erros como o cálculo escalar)
+    """
+    gets = [(data or {}).get for data in responses]
+    setores = np.empty(len(gets), dtype=object)
+    setores[:] = [get("setor_atuacao", "") for get in gets]
+    try:
+        return {
+            "receitas": np.array([[float(get(key) or 0) for key in REVENUE_KEYS] for get in gets], dtype=float).reshape(-1, SERIES_YEARS),
+            "custos": np.array([[float(get(key) or 0) for key in COST_KEYS] for get in gets], dtype=float).reshape(-1, SERIES_YEARS),
+            "num_funcionarios": np.array([float(get("num_funcionarios") or 0) for get in gets], dtype=float),
+            "custos_fixos_pct": np.array([float(get("custos_fixos_pct") or 60) for get in gets], dtype=float),
+            "setor_atuacao": setores
+        }
+    except (TypeError, ValueError):
+        return None
+
+
+def diagnostic_columns(records):
+    """
+    Monta as colunas de entrada a partir de registros armazenados.
+    Respostas com os campos anuais e sem documentos são convertidas em bloco, coluna a
+    coluna; as demais (séries por período, documentos ou valores inválidos) passam por
+    QuestionnaireInput.parse e pela integração dos documentos, registro a registro.
+
+    Args:
+        records: Sequência de tuplas (documentos, respostas do questionário)
+
+    Returns:
+        Dicionário de arrays NumPy aceito por generate_diagnostic_batch
+    """
+    _require_numpy()
+    records = list(records)
+    n = len(records)
+    plain = [i for i, (documents_data, questionnaire_data) in enumerate(records) if _is_plain(documents_data, questionnaire_data)]
+    bulk = _plain_columns([records[i][1] for i in plain]) if plain else None
+    if bulk is None:
+        plain = []
+    plain_rows = set(plain)
+    parsed = [
+        (i, documents_data, QuestionnaireInput.parse(questionnaire_data))
+        for i, (documents_data, questionnaire_data) in enumerate(records) if i not in plain_rows
+    ]
+
+    width = max([SERIES_YEARS] + [len(data.receitas) for _, _, data in parsed])
+    columns = {
+        "receitas": np.zeros((n, width)),
+        "custos": np.zeros((n, width)),
+        "anos": np.zeros(n, dtype=int),
+        "num_funcionarios": np.zeros(n),
+        "custos_fixos_pct": np.zeros(n),
+        "has_document_data": np.zeros(n, dtype=bool),
+        "setor_atuacao": np.empty(n, dtype=object)
+    }
+    for name in DOCUMENT_COLUMNS:
+        columns[name] = np.full(n, np.nan)
+
+    if plain:
+        rows = np.array(plain)
+        columns["receitas"][rows, :SERIES_YEARS] = bulk["receitas"]
+        columns["custos"][rows, :SERIES_YEARS] = bulk["custos"]
+        columns["anos"][rows] = SERIES_YEARS
+        for name in ("num_funcionarios", "custos_fixos_pct", "setor_atuacao"):
+            columns[name][rows] = bulk[name]
+
+    engine = FinancialDiagnostic()
+    for i, documents_data, data in parsed:
+        columns["receitas"][i, :len(data.receitas)] = data.receitas
+        columns["custos"][i, :len(data.custos)] = data.custos
+        columns["anos"][i] = data.anos
+        columns["num_funcionarios"][i] = data.num_funcionarios
+        columns["custos_fixos_pct"][i] = data.custos_fixos_pct
+        columns["setor_atuacao"][i] = data.setor_atuacao
+
+        if not documents_data:
+            continue
+        integrated_data = engine._integrate_document_data(documents_data, data)
+        columns["has_document_data"][i] = integrated_data["has_document_data"]
+        for name, value in integrated_data["financial_ratios"].items():
+            if name in columns and value is not None:
+                columns[name][i] = value
+        for name in ("adjusted_revenue", "adjusted_costs"):
+            if name in integrated_data:
+                columns[name][i] = integrated_data[name]
+    return columns
+
+
+def _near_half(scaled):
+    """Marca valores cuja parte fracionária está próxima de 0,5 (empate de arredondamento)."""
+    fraction = np.abs(scaled - np.trunc(scaled))
+    return np.abs(fraction - 0.5) <= EXACT_TOLERANCE * np.maximum(1, np.abs(scaled))
+
+
+def _round(values, ndigits):
+    """round() do Python vetorizado, com os empates resolvidos pelo próprio round()."""
+    result = np.round(values, ndigits)
+    for i in np.flatnonzero(_near_half(values * 10.0 ** ndigits) & np.isfinite(values)):
+        result[i] = round(float(values[i]), ndigits)
+    return result
+
+
+def _cagr(first, last, years, valid, thresholds):
+    """CAGR (%) em years - 1 anos, idêntico a QuestionnaireInput.cagr (math.pow)."""
+    ratio = np.divide(last, first, out=np.ones_like(first), where=valid)
+    exponent = 1 / np.where(years > 1, years - 1, 1)
+    cagr = (np.power(ratio, exponent) - 1) * 100
+    tolerance = EXACT_TOLERANCE * np.maximum(1, np.abs(cagr))
+    near_threshold = np.zeros(len(cagr), dtype=bool)
+    for threshold in thresholds:
+        near_threshold |= np.abs(cagr - threshold) <= tolerance
+    for i in np.flatnonzero(valid & (near_threshold | _near_half(cagr * 10))):
+        cagr[i] = (math.pow(ratio[i], exponent[i]) - 1) * 100
+    return cagr
+
+
+def generate_diagnostic_batch(columns, scoring_tables=None):
+    """
+    Calcula o diagnóstico de várias empresas de forma vetorizada.
+
+    Args:
+        columns: Dicionário de arrays (ver a descrição do módulo ou diagnostic_columns)
+        scoring_tables: Tabelas de pontuação (padrão: as mesmas do cálculo escalar)
+
+    Returns:
+        Dicionário com "scores" (um array por indicador, NaN quando o scalar retorna None),
+        "overall_score", "health_status", "health_color" e "kpis" (arrays numéricos)
+    """
+    _require_numpy()
+    tables = scoring_tables or default_scoring_tables()
+    receitas = np.asarray(columns["receitas"], dtype=float)
+    custos = np.asarray(columns["custos"], dtype=float)
+    n = len(receitas)
+    anos = np.asarray(columns.get("anos", np.full(n, receitas.shape[1])), dtype=int)
+    r1, r2, r3 = receitas[:, 0], receitas[:, 1], receitas[:, 2]
+    # Receita do último ano do horizonte de cada empresa
+    r_final = receitas[np.arange(n), np.maximum(anos, 1) - 1]
+    c1, c2 = custos[:, 0], custos[:, 1]
+    num_funcionarios = np.asarray(columns["num_funcionarios"], dtype=float)
+    custos_fixos_pct = np.asarray(columns.get("custos_fixos_pct", np.full(n, np.nan)), dtype=float)
+    custos_fixos_pct = np.where(np.isnan(custos_fixos_pct), 60.0, custos_fixos_pct)
+
+    sectors = np.asarray(columns["setor_atuacao"], dtype=object) if "setor_atuacao" in columns else None
+
+    def score(table, values):
+        return tables.score_array(table, values, sectors)
+
+    doc = {name: np.asarray(columns.get(name, np.full(n, np.nan)), dtype=float) for name in DOCUMENT_COLUMNS}
+    present = {name: ~np.isnan(values) for name, values in doc.items()}
+    if "has_document_data" in columns:
+        has_docs = np.asarray(columns["has_document_data"], dtype=bool)
+    else:
+        has_docs = np.logical_or.reduce([present[name] for name in DOCUMENT_COLUMNS])
+
+    # Receita e custos do ano 1 ajustados pelos documentos (eficiência, crescimento e KPIs)
+    r1_adj = np.where(has_docs & present["adjusted_revenue"], doc["adjusted_revenue"], r1)
+    c1_adj = np.where(has_docs & present["adjusted_costs"], doc["adjusted_costs"], c1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Rentabilidade
+        margem_doc = doc["margem_liquida"] * 100
+        margem_ano1 = np.where(r1 > 0, (r1 - c1) / r1 * 100, 0)
+        margem_ano2 = np.where(r2 > 0, (r2 - c2) / r2 * 100, 0)
+        crescente = margem_ano2 > margem_ano1 * 1.1
+        decrescente = ~crescente & (margem_ano2 < margem_ano1 * 0.9)
+        score_margem_media = score("margem", (margem_ano1 + margem_ano2) / 2)
+        score_margem_media = np.where(crescente, np.minimum(10, score_margem_media + 1),
+                                      np.where(decrescente, np.maximum(0, score_margem_media - 1), score_margem_media))
+        rentabilidade = np.where(
+            has_docs & present["margem_liquida"], score("margem", margem_doc),
+            np.where((margem_ano1 > 0) | (margem_ano2 > 0), score_margem_media, 0)
+        )
+
+        # Liquidez
+        indice_liquidez = r1 / c1
+        liquidez = np.where(
+            has_docs & present["liquidez_corrente"], score("liquidez", doc["liquidez_corrente"]),
+            np.where((r1 > 0) & (c1 > 0), score("liquidez", indice_liquidez), np.nan)
+        )
+
+        # Endividamento
+        media_crescimento = ((r2 - r1) / r1 + (r3 - r2) / r2) / 2
+        endividamento = np.where(
+            has_docs & present["endividamento_geral"], score("endividamento", doc["endividamento_geral"]),
+            np.where((r1 > 0) & (r2 > 0) & (r3 > 0), score("endividamento_crescimento", media_crescimento), 5)
+        )
+
+        # Eficiência
+        margem_operacional = np.where(present["margem_liquida"], margem_doc, (r1_adj - c1_adj) / r1_adj * 100)
+        score_receita = score("receita_por_funcionario", r1_adj / num_funcionarios)
+        has_prazo = has_docs & present["prazo_medio_recebimento"] & present["prazo_medio_pagamento"]
+        ciclo = doc["prazo_medio_recebimento"] - doc["prazo_medio_pagamento"]
+        score_base = score_receita + score("margem", margem_operacional)
+        eficiencia = np.where(has_prazo, (score_base + score("ciclo_financeiro", ciclo)) / 3, score_base / 2)
+        eficiencia = np.where((r1_adj > 0) & (num_funcionarios > 0), _round(eficiencia, 1), np.nan)
+
+        # Crescimento
+        has_growth = (r1_adj > 0) & (r_final > 0) & (anos > 1)
+        cagr = _cagr(r1_adj, r_final, anos, has_growth, tables.thresholds("crescimento"))
+        crescimento = np.where(has_growth, score("crescimento", cagr), np.nan)
+
+    # Pontuação geral: média dos scores disponíveis, na ordem do cálculo escalar
+    scores = dict(zip(INDICATORS, (rentabilidade, liquidez, endividamento, eficiencia, crescimento)))
+    total = np.zeros(n)
+    count = np.zeros(n)
+    for values in scores.values():
+        valid = ~np.isnan(values)
+        total = total + np.where(valid, values, 0)
+        count = count + valid
+    with np.errstate(divide="ignore", invalid="ignore"):
+        overall_score = np.where(count > 0, _round(total / count, 1), 0)
+
+    health_status = np.where(overall_score >= 7, "Saudável", np.where(overall_score >= 4, "Estável", "Atenção"))
+    health_color = np.where(overall_score >= 7, "success", np.where(overall_score >= 4, "warning", "danger"))
+
+    # KPIs do dashboard
+    funcionarios_inteiros = np.trunc(num_funcionarios)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        kpis = {
+            "faturamento_anual": r1_adj,
+            "margem_operacional": np.where(
+                present["margem_liquida"], margem_doc,
+                np.where(r1_adj > 0, _round((r1_adj - c1_adj) / r1_adj * 100, 1), 0)
+            ),
+            "crescimento_projetado": np.where(has_growth, _round(cagr, 1), 0),
+            "estrutura_custos": custos_fixos_pct,
+            "produtividade_media": np.where(funcionarios_inteiros > 0, np.rint(r1_adj / funcionarios_inteiros), 0)
+        }
+
+    return {
+        "scores": scores,
+        "overall_score": overall_score,
+        "health_status": health_status,
+        "health_color": health_color,
+        "kpis": kpis
+    }
@@ -0,0 +1,138 @@
+"""
+Serviço de diagnóstico financeiro pré-calculado.
+O diagnóstico é gerado quando o questionário ou os documentos da empresa mudam e
+armazenado com a versão das entradas usadas; a leitura apenas confere essa versão
+e só recalcula quando o diagnóstico armazenado está desatualizado. Quando apenas
+documentos foram acrescentados, o diagnóstico armazenado é atualizado
+incrementalmente (somente os indicadores afetados pelos documentos novos).
+A meta de pontuação (goal_seek) é calculada com o diagnóstico e armazenada junto dele.
+"""
+
+import logging
+
+from goal_seek import goal_seek
+
+logger = logging.getLogger(__name__)
+
+# Chave do diagnóstico armazenado com a versão das entradas
+INPUTS_VERSION_KEY = "inputs_version"
+
+# Chave do diagnóstico armazenado com a meta de pontuação (None se indisponível)
+GOAL_KEY = "goal"
+
+
+def inputs_version(questionnaire, documents, tables_version=""):
+    """
+    Identifica as entradas do diagnóstico: revisão do questionário, documentos enviados
+    e versão das tabelas de pontuação.
+    """
+    last_document_id = documents[-1].get("id") if documents else ""
+    return f"{questionnaire.get('id')}:{len(documents)}:{last_document_id}:{tables_version}"
+
+
+class DiagnosticService:
+    """Calcula, armazena e lê diagnósticos conforme a versão das entradas."""
+
+    def __init__(self, repository, financial_diagnostic, peer_benchmarks=None, portfolio_analytics=None):
+        self.repository = repository
+        self.financial_diagnostic = financial_diagnostic
+        self.peer_benchmarks = peer_benchmarks
+        self.portfolio_analytics = portfolio_analytics
+
+    def refresh(self, company_id):
+        """
+        Recalcula e armazena o diagnóstico após uma mudança nas entradas.
+        Falhas são registradas sem interromper a gravação que as originou; a próxima
+        leitura encontra o diagnóstico desatualizado e recalcula.
+
+        Returns:
+            Diagnóstico calculado, ou None se não houver questionário ou o cálculo falhar
+        """
+        try:
+            return self._compute(company_id)
+        except Exception as e:
+            logger.exception(f"Erro ao pré-calcular o diagnóstico da empresa {company_id}: {e}")
+            return None
+
+    def get(self, company_id):
+        """
+        Retorna o diagnóstico da empresa, recalculando apenas se as entradas mudaram.
+
+        Returns:
+            Diagnóstico, ou None se a empresa ainda não tiver questionário
+        """
+        questionnaire = self.repository.latest_questionnaire(company_id)
+        if not questionnaire:
+            return None
+        documents = self.repository.list_documents(company_id)
+
+        stored = self.repository.get_diagnostic(company_id)
+        if stored and stored.get(INPUTS_VERSION_KEY) == self._inputs_version(questionnaire, documents) and GOAL_KEY in stored:
+            return stored
+
+        logger.info(f"Diagnóstico da empresa {company_id} ausente ou desatualizado; recalculando")
+        return self._compute(company_id, questionnaire, documents, stored)
+
+    def _compute(self, company_id, questionnaire=None, documents=None, stored=None):
+        """Gera (ou atualiza) o diagnóstico e o armazena com a versão das entradas."""
+        if questionnaire is None:
+            questionnaire = self.repository.latest_questionnaire(company_id)
+            if not questionnaire:
+                return None
+        if documents is None:
+            documents = self.repository.list_documents(company_id)
+        if stored is None:
+            stored = self.repository.get_diagnostic(company_id)
+
+        new_count = self._new_document_count(stored, questionnaire, documents)
+        if new_count:
+            diagnostic = self.financial_diagnostic.update_diagnostic(stored, documents, questionnaire["responses"], new_count)
+        else:
+            diagnostic = self.financial_diagnostic.generate_diagnostic(documents, questionnaire["responses"])
+        diagnostic[INPUTS_VERSION_KEY] = self._inputs_version(questionnaire, documents)
+        diagnostic[GOAL_KEY] = self._goal(company_id, questionnaire, documents)
+        # Os benchmarks removem o diagnóstico realmente substituído, que pode não ser o lido
+        # acima quando outra atualização da mesma empresa gravou antes
+        diagnostic = self.repository.replace_diagnostic(
+            company_id, diagnostic, lambda previous, new: self._record_benchmarks(company_id, previous, new)
+        )
+        if self.portfolio_analytics is not None:
+            self.portfolio_analytics.invalidate_company(company_id)
+        return diagnostic
+
+    def _inputs_version(self, questionnaire, documents):
+        """Versão das entradas com as tabelas de pontuação do motor em uso."""
+        return inputs_version(questionnaire, documents, getattr(self.financial_diagnostic, "tables_version", ""))
+
+    def _goal(self, company_id, questionnaire, documents):
+        """Valores mínimos de margem, faturamento e liquidez para a pontuação "Saudável"."""
+        try:
+            return goal_seek(documents, questionnaire["responses"], scoring_tables=getattr(self.financial_diagnostic, "scoring_tables", None))
+        except ValueError as e:
+            logger.info(f"Meta de pontuação indisponível para a empresa {company_id}: {e}")
+            return None
+
+    def _record_benchmarks(self, company_id, previous, diagnostic):
+        """Atualiza os benchmarks setoriais; uma falha é corrigida pelo comando de reconstrução."""
+        if self.peer_benchmarks is None:
+            return
+        try:
+            self.peer_benchmarks.record(previous, diagnostic)
+        except Exception as e:
+            logger.exception(f"Erro ao atualizar os benchmarks setoriais com a empresa {company_id}: {e}")
+
+    def _new_document_count(self, stored, questionnaire, documents):
+        """
+        Quantidade de documentos acrescentados desde o diagnóstico armazenado, quando ele
+        foi gerado com o mesmo questionário e com os documentos anteriores; 0 quando o
+        diagnóstico precisa ser gerado do zero.
+        """
+        if not stored or not hasattr(self.financial_diagnostic, "update_diagnostic"):
+            return 0
+        parts = str(stored.get(INPUTS_VERSION_KEY, "")).rsplit(":", 3)
+        if len(parts) != 4 or not parts[1].isdigit():
+            return 0
+        count = int(parts[1])
+        if count >= len(documents) or stored[INPUTS_VERSION_KEY] != self._inputs_version(questionnaire, documents[:count]):
+            return 0
+        return len(documents) - count
@@ -9,10 +9,107 @@ import json
 import logging
 import math
 
+from scoring_tables import default_scoring_tables
+from valuation_tables import default_valuation_tables, PERPETUITY_GROWTH_RATE
+from questionnaire_input import QuestionnaireInput, PERIOD_LABELS
+
 # Configurar logging básico
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Versão do motor de cálculo: incremente ao mudar qualquer regra que altere os
+# resultados do diagnóstico ou do valuation (invalida os resultados memoizados)
+ENGINE_VERSION = "2"
+
+# Chave do diagnóstico com o estado da integração dos documentos (índices e dados
+# extraídos acumulados), usado para atualizar o diagnóstico incrementalmente
+INTEGRATED_DATA_KEY = "integrated_data"
+
+# Ajustes do questionário derivados dos documentos, refeitos a cada integração
+ADJUSTMENT_KEYS = ("adjusted_revenue", "adjusted_costs")
+
+# Método de cálculo de cada indicador
+INDICATOR_METHODS = {
+    "rentabilidade": "_calculate_rentability_score",
+    "liquidez": "_calculate_liquidity_score",
+    "endividamento": "_calculate_debt_score",
+    "eficiencia": "_calculate_efficiency_score",
+    "crescimento": "_calculate_growth_score"
+}
+
+# KPIs e gráficos do dashboard, que dependem da receita e dos custos ajustados
+DASHBOARD_DEPENDENCY = "dashboard"
+
+# Quantidade máxima de pontos nos gráficos do dashboard (séries longas são agrupadas)
+CHART_MAX_POINTS = 24
+
+# Status de um valuation calculado
+VALUATION_STATUS = "Valuation calculado com base nas projeções financeiras"
+
+# Indicadores (e o dashboard) afetados por cada tipo de documento
+DOCUMENT_DEPENDENCIES = {
+    "balanco_patrimonial": ("liquidez", "endividamento"),
+    "dre": ("rentabilidade", "eficiencia", "crescimento", DASHBOARD_DEPENDENCY),
+    "relatorio_contas": ("eficiencia",),
+    "fluxo_caixa": ()
+}
+
+def format_currency(value):
+    """Formata um valor monetário (ex.: "R$ 1.50 milhões")."""
+    if value is None or value == 0:
+        return "R$ 0"
+
+    if value >= 1_000_000_000:  # Bilhões
+        return f"R$ {value/1_000_000_000:.2f} bilhões"
+    elif value >= 1_000_000:  # Milhões
+        return f"R$ {value/1_000_000:.2f} milhões"
+    elif value >= 1_000:  # Milhares
+        return f"R$ {value/1_000:.2f} mil"
+    else:
+        return f"R$ {value:.2f}"
+
+
+def calculate_document_ratios(document_type, extracted_data):
+    """
+    Calcula os índices financeiros de um documento a partir dos dados extraídos.
+    Os índices são gravados com o documento no envio, e o diagnóstico apenas os combina.
+    
+    Returns:
+        Dicionário com os índices que o documento permite calcular
+    """
+    doc_type = (document_type or "").lower()
+    extracted = extracted_data or {}
+    ratios = {}
+    
+    # Índices do balanço patrimonial
+    if doc_type == "balanco_patrimonial":
+        if "ativo_circulante" in extracted and "passivo_circulante" in extracted and extracted["passivo_circulante"] > 0:
+            ratios["liquidez_corrente"] = extracted["ativo_circulante"] / extracted["passivo_circulante"]
+        
+        if "ativo_circulante" in extracted and "estoques" in extracted and "passivo_circulante" in extracted and extracted["passivo_circulante"] > 0:
+            ratios["liquidez_seca"] = (extracted["ativo_circulante"] - extracted["estoques"]) / extracted["passivo_circulante"]
+        
+        if "passivo_total" in extracted and "ativo_total" in extracted and extracted["ativo_total"] > 0:
+            ratios["endividamento_geral"] = extracted["passivo_total"] / extracted["ativo_total"]
+    
+    # Índices da DRE
+    elif doc_type == "dre":
+        if "lucro_liquido" in extracted and "receita_liquida" in extracted and extracted["receita_liquida"] > 0:
+            ratios["margem_liquida"] = extracted["lucro_liquido"] / extracted["receita_liquida"]
+        
+        if "lucro_bruto" in extracted and "receita_liquida" in extracted and extracted["receita_liquida"] > 0:
+            ratios["margem_bruta"] = extracted["lucro_bruto"] / extracted["receita_liquida"]
+    
+    # Prazos do relatório de contas
+    elif doc_type == "relatorio_contas":
+        if "prazo_medio_recebimento" in extracted:
+            ratios["prazo_medio_recebimento"] = extracted["prazo_medio_recebimento"]
+        
+        if "prazo_medio_pagamento" in extracted:
+            ratios["prazo_medio_pagamento"] = extracted["prazo_medio_pagamento"]
+    
+    return ratios
+
 class DocumentProcessor:
     """Processa documentos financeiros."""
     def __init__(self, upload_folder):
@@ -35,7 +132,8 @@ class DocumentProcessor:
                 "file_size": file_size,
                 "document_type": document_type,
                 "analysis_status": "Processado",
-                "extracted_data": extracted_data
+                "extracted_data": extracted_data,
+                "financial_ratios": calculate_document_ratios(document_type, extracted_data)
             }
         except Exception as e:
             logger.error(f"Erro ao processar documento {file_path}: {e}")
@@ -93,63 +191,104 @@ class DocumentProcessor:
 class FinancialDiagnostic:
     """Gera diagnóstico financeiro baseado nas respostas do questionário e documentos."""
     
+    # Tabelas de faixas de pontuação (None usa as tabelas padrão de scoring_thresholds.json)
+    scoring_tables = None
+    
+    def __init__(self, scoring_tables=None):
+        self.scoring_tables = scoring_tables
+    
+    @property
+    def tables_version(self):
+        """Versão (hash do conteúdo) das tabelas de pontuação em uso."""
+        return (self.scoring_tables or default_scoring_tables()).version
+    
     def generate_diagnostic(self, documents_data, questionnaire_data):
         """Gera um diagnóstico financeiro com base nas respostas do questionário e documentos."""
         logger.info("Gerando diagnóstico financeiro integrado...")
         
-        # Extrai dados básicos do questionário
-        try:
-            # Dados financeiros do questionário
-            receita_ano1 = float(questionnaire_data.get("receita_ano1", 0) or 0)
-            receita_ano2 = float(questionnaire_data.get("receita_ano2", 0) or 0)
-            receita_ano3 = float(questionnaire_data.get("receita_ano3", 0) or 0)
-            receita_ano4 = float(questionnaire_data.get("receita_ano4", 0) or 0)
-            receita_ano5 = float(questionnaire_data.get("receita_ano5", 0) or 0)
-            
-            custos_ano1 = float(questionnaire_data.get("custos_ano1", 0) or 0)
-            custos_ano2 = float(questionnaire_data.get("custos_ano2", 0) or 0)
-            custos_ano3 = float(questionnaire_data.get("custos_ano3", 0) or 0)
-            custos_ano4 = float(questionnaire_data.get("custos_ano4", 0) or 0)
-            custos_ano5 = float(questionnaire_data.get("custos_ano5", 0) or 0)
-            
-            # Dados operacionais
-            num_funcionarios = int(questionnaire_data.get("num_funcionarios", 0) or 0)
-            
-            # Dados de mercado e modelo de negócio
-            setor_atuacao = questionnaire_data.get("setor_atuacao", "")
-            modelo_negocios = questionnaire_data.get("modelo_negocios", "")
-            principais_produtos = questionnaire_data.get("principais_produtos", "")
-            
-            # Estimativa de custos fixos vs variáveis (padrão se não informado)
-            custos_fixos_pct = float(questionnaire_data.get("custos_fixos_pct", 60) or 60)
-            custos_variaveis_pct = 100 - custos_fixos_pct
-            
-            # Estimativa de TAM/SAM/SOM
-            tam_valor = float(questionnaire_data.get("tam_valor", 0) or 0)
-            sam_valor = float(questionnaire_data.get("sam_valor", 0) or 0)
-            som_valor = float(questionnaire_data.get("som_valor", 0) or 0)
-            
-            # Principais riscos
-            principais_riscos = questionnaire_data.get("principais_riscos", "Concorrência")
-            
-        except Exception as e:
-            logger.error(f"Erro ao extrair dados do questionário: {e}")
-            # Valores padrão em caso de erro
-            receita_ano1 = receita_ano2 = receita_ano3 = receita_ano4 = receita_ano5 = 0
-            custos_ano1 = custos_ano2 = custos_ano3 = custos_ano4 = custos_ano5 = 0
-            num_funcionarios = 0
-            setor_atuacao = modelo_negocios = principais_produtos = ""
-            custos_fixos_pct = 60
-            custos_variaveis_pct = 40
-            tam_valor = sam_valor = som_valor = 0
-            principais_riscos = "Concorrência"
+        # Converte as respostas do questionário uma única vez para todos os cálculos
+        data = QuestionnaireInput.parse(questionnaire_data)
+        if data.errors:
+            logger.warning(f"Respostas inválidas no questionário: {'; '.join(data.errors)}")
         
         # Extrair e integrar dados dos documentos
-        integrated_data = self._integrate_document_data(documents_data, questionnaire_data)
+        integrated_data = self._integrate_document_data(documents_data, data)
         
         # Calcula indicadores financeiros com dados integrados
-        indicators = self._calculate_financial_indicators(questionnaire_data, integrated_data)
+        indicators = self._calculate_financial_indicators(data, integrated_data)
+        
+        # Calcula KPIs para o dashboard
+        kpis = self._calculate_dashboard_kpis(data, integrated_data)
         
+        # Prepara dados para gráficos
+        chart_data = self._prepare_chart_data(data, integrated_data)
+        
+        return self._assemble_diagnostic(data, integrated_data, indicators, kpis, chart_data)
+    
+    def update_diagnostic(self, diagnostic, documents_data, questionnaire_data, new_count):
+        """
+        Atualiza um diagnóstico com documentos recém-enviados, sem refazer a integração
+        dos documentos anteriores: apenas os indicadores que dependem dos tipos de documento
+        recebidos (DOCUMENT_DEPENDENCIES) são recalculados; os demais são reaproveitados.
+        O resultado é igual ao de generate_diagnostic com todos os documentos.
+        
+        Args:
+            diagnostic: Diagnóstico gerado com os mesmos dados de questionário e com
+                documents_data, exceto os new_count últimos documentos
+            documents_data: Todos os documentos da empresa
+            questionnaire_data: Respostas do questionário
+            new_count: Quantidade de documentos novos no fim de documents_data
+        """
+        previous = diagnostic.get(INTEGRATED_DATA_KEY)
+        if not previous or previous.get("integration_error"):
+            logger.info("Diagnóstico armazenado sem dados de integração; gerando diagnóstico completo")
+            return self.generate_diagnostic(documents_data, questionnaire_data)
+        
+        logger.info(f"Atualizando diagnóstico com {new_count} documento(s) novo(s)...")
+        data = QuestionnaireInput.parse(questionnaire_data)
+        
+        # Copia o estado integrado armazenado e incorpora apenas os documentos novos
+        integrated_data = {
+            key: dict(value) if isinstance(value, dict) else value
+            for key, value in previous.items()
+        }
+        for key in ADJUSTMENT_KEYS:
+            integrated_data.pop(key, None)
+        
+        affected = set()
+        try:
+            for doc in documents_data[len(documents_data) - new_count:]:
+                doc_type = self._integrate_document(integrated_data, doc)
+                if doc_type is not None:
+                    affected.update(DOCUMENT_DEPENDENCIES.get(doc_type, ()))
+            if not previous.get("has_document_data") and integrated_data["has_document_data"]:
+                # O primeiro documento muda a fonte de todos os indicadores
+                affected.update(INDICATOR_METHODS)
+                affected.add(DASHBOARD_DEPENDENCY)
+            self._adjust_questionnaire_data(integrated_data, data)
+        except Exception as e:
+            logger.error(f"Erro ao integrar dados de documentos: {e}")
+            integrated_data["integration_error"] = True
+            affected.update(INDICATOR_METHODS)
+            affected.add(DASHBOARD_DEPENDENCY)
+        
+        indicators = dict(diagnostic["indicators"])
+        for name, method in INDICATOR_METHODS.items():
+            if name in affected:
+                indicators[name] = getattr(self, method)(data, integrated_data)
+        
+        if DASHBOARD_DEPENDENCY in affected:
+            kpis = self._calculate_dashboard_kpis(data, integrated_data)
+            chart_data = self._prepare_chart_data(data, integrated_data)
+        else:
+            kpis = diagnostic["dashboard"]["kpis"]
+            chart_data = diagnostic["dashboard"]["chart_data"]
+        
+        logger.info(f"Indicadores recalculados: {', '.join(sorted(affected & set(INDICATOR_METHODS))) or 'nenhum'}")
+        return self._assemble_diagnostic(data, integrated_data, indicators, kpis, chart_data)
+    
+    def _assemble_diagnostic(self, data, integrated_data, indicators, kpis, chart_data):
+        """Monta o diagnóstico a partir dos indicadores, KPIs e dados de gráficos."""
         # Calcula a pontuação geral
         scores = [
             indicators["rentabilidade"]["score"],
@@ -165,12 +304,6 @@ class FinancialDiagnostic:
         # Determina a classificação de saúde financeira
         health_status, health_color = self._get_health_status(overall_score)
         
-        # Calcula KPIs para o dashboard
-        kpis = self._calculate_dashboard_kpis(questionnaire_data, integrated_data)
-        
-        # Prepara dados para gráficos
-        chart_data = self._prepare_chart_data(questionnaire_data, integrated_data)
-        
         # Gera recomendações com base nos indicadores
         recommendations = self._generate_recommendations(indicators, integrated_data)
         
@@ -199,35 +332,42 @@ class FinancialDiagnostic:
                 
                 # Informações de negócio
                 "business_info": {
-                    "modelo_negocios": modelo_negocios or "Venda direta",
-                    "principais_produtos": principais_produtos or "Vendas de produtos",
-                    "principais_riscos": principais_riscos,
-                    "setor_atuacao": setor_atuacao,
-                    "num_funcionarios": num_funcionarios,
+                    "modelo_negocios": data.modelo_negocios or "Venda direta",
+                    "principais_produtos": data.principais_produtos or "Vendas de produtos",
+                    "principais_riscos": data.principais_riscos,
+                    "setor_atuacao": data.setor_atuacao,
+                    "num_funcionarios": int(data.num_funcionarios),
                     "produtividade_media": kpis["produtividade_media"]
                 },
                 
                 # Dados de mercado
                 "market_data": {
-                    "tam_valor": self._format_currency(tam_valor) if tam_valor > 0 else "Não informado",
-                    "sam_valor": self._format_currency(sam_valor) if sam_valor > 0 else "Não informado",
-                    "som_valor": self._format_currency(som_valor) if som_valor > 0 else "Não informado",
+                    "tam_valor": format_currency(data.tam_valor) if data.tam_valor > 0 else "Não informado",
+                    "sam_valor": format_currency(data.sam_valor) if data.sam_valor > 0 else "Não informado",
+                    "som_valor": format_currency(data.som_valor) if data.som_valor > 0 else "Não informado",
                     "tam_pct": 100,
-                    "sam_pct": round((sam_valor / tam_valor) * 100 if tam_valor > 0 and sam_valor > 0 else 60),
-                    "som_pct": round((som_valor / tam_valor) * 100 if tam_valor > 0 and som_valor > 0 else 30)
+                    "sam_pct": round((data.sam_valor / data.tam_valor) * 100 if data.tam_valor > 0 and data.sam_valor > 0 else 60),
+                    "som_pct": round((data.som_valor / data.tam_valor) * 100 if data.tam_valor > 0 and data.som_valor > 0 else 30)
                 },
                 
                 # Estrutura de custos
                 "cost_structure": {
-                    "fixos_pct": custos_fixos_pct,
-                    "variaveis_pct": custos_variaveis_pct
+                    "fixos_pct": data.custos_fixos_pct,
+                    "variaveis_pct": data.custos_variaveis_pct
                 }
             }
         }
         
+        # Estado da integração dos documentos, usado nas atualizações incrementais
+        diagnostic[INTEGRATED_DATA_KEY] = integrated_data
+        
+        # Informa respostas que não puderam ser usadas nos cálculos
+        if data.errors:
+            diagnostic["input_errors"] = data.errors
+        
         return diagnostic
     
-    def _integrate_document_data(self, documents_data, questionnaire_data):
+    def _integrate_document_data(self, documents_data, data):
         """Integra dados extraídos de documentos com dados do questionário."""
         logger.info("Integrando dados de documentos com questionário...")
         
@@ -248,89 +388,85 @@ class FinancialDiagnostic:
         try:
             # Processa cada documento e extrai dados relevantes
             for doc in documents_data:
-                if not doc.get("extracted_data"):
-                    continue
-                
-                doc_type = doc.get("document_type", "").lower()
-                extracted = doc.get("extracted_data", {})
-                
-                # Marca que temos dados de documentos
-                integrated_data["has_document_data"] = True
-                
-                # Integra dados de balanço patrimonial
-                if doc_type == "balanco_patrimonial":
-                    integrated_data["balance_sheet"].update(extracted)
-                    
-                    # Calcula índices financeiros do balanço
-                    if "ativo_circulante" in extracted and "passivo_circulante" in extracted and extracted["passivo_circulante"] > 0:
-                        integrated_data["financial_ratios"]["liquidez_corrente"] = extracted["ativo_circulante"] / extracted["passivo_circulante"]
-                    
-                    if "ativo_circulante" in extracted and "estoques" in extracted and "passivo_circulante" in extracted and extracted["passivo_circulante"] > 0:
-                        integrated_data["financial_ratios"]["liquidez_seca"] = (extracted["ativo_circulante"] - extracted["estoques"]) / extracted["passivo_circulante"]
-                    
-                    if "passivo_total" in extracted and "ativo_total" in extracted and extracted["ativo_total"] > 0:
-                        integrated_data["financial_ratios"]["endividamento_geral"] = extracted["passivo_total"] / extracted["ativo_total"]
-                
-                # Integra dados de DRE
-                elif doc_type == "dre":
-                    integrated_data["income_statement"].update(extracted)
-                    
-                    # Calcula índices financeiros da DRE
-                    if "lucro_liquido" in extracted and "receita_liquida" in extracted and extracted["receita_liquida"] > 0:
-                        integrated_data["financial_ratios"]["margem_liquida"] = extracted["lucro_liquido"] / extracted["receita_liquida"]
-                    
-                    if "lucro_bruto" in extracted and "receita_liquida" in extracted and extracted["receita_liquida"] > 0:
-                        integrated_data["financial_ratios"]["margem_bruta"] = extracted["lucro_bruto"] / extracted["receita_liquida"]
-                
-                # Integra dados de fluxo de caixa
-                elif doc_type == "fluxo_caixa":
-                    integrated_data["cash_flow"].update(extracted)
-                
-                # Integra dados de relatório de contas
-                elif doc_type == "relatorio_contas":
-                    if "prazo_medio_recebimento" in extracted:
-                        integrated_data["financial_ratios"]["prazo_medio_recebimento"] = extracted["prazo_medio_recebimento"]
-                    
-                    if "prazo_medio_pagamento" in extracted:
-                        integrated_data["financial_ratios"]["prazo_medio_pagamento"] = extracted["prazo_medio_pagamento"]
+                self._integrate_document(integrated_data, doc)
             
             # Ajusta dados do questionário com base nos documentos, se necessário
-            if integrated_data.get("has_document_data"):
-                # Se temos dados de receita da DRE, podemos ajustar a receita do ano 1
-                if "receita_liquida" in integrated_data.get("income_statement", {}):
-                    receita_ano1 = float(questionnaire_data.get("receita_ano1", 0) or 0)
-                    receita_dre = integrated_data["income_statement"]["receita_liquida"]
-                    
-                    # Se a diferença for significativa, usamos a média ou o valor da DRE
-                    if receita_ano1 > 0:
-                        if abs(receita_ano1 - receita_dre) / receita_ano1 > 0.2:  # Diferença > 20%
-                            integrated_data["adjusted_revenue"] = (receita_ano1 + receita_dre) / 2
-                        else:
-                            integrated_data["adjusted_revenue"] = receita_ano1
-                    else:
-                        integrated_data["adjusted_revenue"] = receita_dre
-                
-                # Se temos dados de custos da DRE, podemos ajustar os custos do ano 1
-                if "custo_produtos" in integrated_data.get("income_statement", {}):
-                    custos_ano1 = float(questionnaire_data.get("custos_ano1", 0) or 0)
-                    custos_dre = integrated_data["income_statement"]["custo_produtos"]
-                    
-                    # Se a diferença for significativa, usamos a média ou o valor da DRE
-                    if custos_ano1 > 0:
-                        if abs(custos_ano1 - custos_dre) / custos_ano1 > 0.2:  # Diferença > 20%
-                            integrated_data["adjusted_costs"] = (custos_ano1 + custos_dre) / 2
-                        else:
-                            integrated_data["adjusted_costs"] = custos_ano1
-                    else:
-                        integrated_data["adjusted_costs"] = custos_dre
+            self._adjust_questionnaire_data(integrated_data, data)
             
             logger.info(f"Integração de dados concluída. Dados de documentos disponíveis: {integrated_data['has_document_data']}")
             return integrated_data
             
         except Exception as e:
             logger.error(f"Erro ao integrar dados de documentos: {e}")
+            integrated_data["integration_error"] = True
             return integrated_data
     
+    def _integrate_document(self, integrated_data, doc):
+        """
+        Incorpora um documento aos dados integrados.
+        
+        Returns:
+            Tipo do documento (minúsculo), ou None se não houver dados extraídos
+        """
+        if not doc.get("extracted_data"):
+            return None
+        
+        doc_type = doc.get("document_type", "").lower()
+        extracted = doc.get("extracted_data", {})
+        
+        # Marca que temos dados de documentos
+        integrated_data["has_document_data"] = True
+        
+        # Integra os dados de cada demonstrativo
+        if doc_type == "balanco_patrimonial":
+            integrated_data["balance_sheet"].update(extracted)
+        elif doc_type == "dre":
+            integrated_data["income_statement"].update(extracted)
+        elif doc_type == "fluxo_caixa":
+            integrated_data["cash_flow"].update(extracted)
+        
+        # Índices calculados no envio do documento; documentos antigos, gravados sem
+        # os índices, são calculados aqui
+        ratios = doc.get("financial_ratios")
+        if ratios is None:
+            ratios = calculate_document_ratios(doc_type, extracted)
+        integrated_data["financial_ratios"].update(ratios)
+        
+        return doc_type
+    
+    def _adjust_questionnaire_data(self, integrated_data, data):
+        """Ajusta receita e custos do ano 1 do questionário com os dados da DRE."""
+        if not integrated_data.get("has_document_data"):
+            return
+        
+        # Se temos dados de receita da DRE, podemos ajustar a receita do ano 1
+        if "receita_liquida" in integrated_data.get("income_statement", {}):
+            receita_ano1 = data.receitas[0]
+            receita_dre = integrated_data["income_statement"]["receita_liquida"]
+            
+            # Se a diferença for significativa, usamos a média ou o valor da DRE
+            if receita_ano1 > 0:
+                if abs(receita_ano1 - receita_dre) / receita_ano1 > 0.2:  # Diferença > 20%
+                    integrated_data["adjusted_revenue"] = (receita_ano1 + receita_dre) / 2
+                else:
+                    integrated_data["adjusted_revenue"] = receita_ano1
+            else:
+                integrated_data["adjusted_revenue"] = receita_dre
+        
+        # Se temos dados de custos da DRE, podemos ajustar os custos do ano 1
+        if "custo_produtos" in integrated_data.get("income_statement", {}):
+            custos_ano1 = data.custos[0]
+            custos_dre = integrated_data["income_statement"]["custo_produtos"]
+            
+            # Se a diferença for significativa, usamos a média ou o valor da DRE
+            if custos_ano1 > 0:
+                if abs(custos_ano1 - custos_dre) / custos_ano1 > 0.2:  # Diferença > 20%
+                    integrated_data["adjusted_costs"] = (custos_ano1 + custos_dre) / 2
+                else:
+                    integrated_data["adjusted_costs"] = custos_ano1
+            else:
+                integrated_data["adjusted_costs"] = custos_dre
+    
     def _calculate_financial_indicators(self, data, integrated_data=None):
         """Calcula todos os indicadores financeiros."""
         # Se não temos dados integrados, inicializa um dicionário vazio
@@ -356,15 +492,14 @@ class FinancialDiagnostic:
             if integrated_data.get("has_document_data") and "adjusted_revenue" in integrated_data:
                 receita_ano1 = integrated_data["adjusted_revenue"]
             else:
-                receita_ano1 = float(data.get("receita_ano1", 0) or 0)
+                receita_ano1 = data.receitas[0]
                 
             if integrated_data.get("has_document_data") and "adjusted_costs" in integrated_data:
                 custos_ano1 = integrated_data["adjusted_costs"]
             else:
-                custos_ano1 = float(data.get("custos_ano1", 0) or 0)
+                custos_ano1 = data.custos[0]
                 
-            receita_ano5 = float(data.get("receita_ano5", 0) or 0)
-            num_funcionarios = int(data.get("num_funcionarios", 0) or 0)
+            num_funcionarios = int(data.num_funcionarios)
             
             # Calcula margem operacional
             if "margem_liquida" in integrated_data.get("financial_ratios", {}):
@@ -374,23 +509,24 @@ class FinancialDiagnostic:
                 # Calcula com dados do questionário
                 margem_operacional = round(((receita_ano1 - custos_ano1) / receita_ano1) * 100, 1) if receita_ano1 > 0 else 0
             
-            # Calcula CAGR
-            cagr = round((math.pow(receita_ano5 / receita_ano1, 1/4) - 1) * 100, 1) if receita_ano1 > 0 and receita_ano5 > 0 else 0
+            # Calcula CAGR até o último ano do horizonte
+            cagr = data.cagr(receita_ano1)
+            cagr = round(cagr, 1) if cagr is not None else 0
             
             # Calcula produtividade média
             produtividade_media = round(receita_ano1 / num_funcionarios) if num_funcionarios > 0 else 0
             
             # Estrutura de custos (padrão se não informado)
-            custos_fixos_pct = float(data.get("custos_fixos_pct", 60) or 60)
+            custos_fixos_pct = data.custos_fixos_pct
             
             return {
                 "faturamento_anual": receita_ano1,
-                "faturamento_anual_formatado": self._format_currency(receita_ano1),
+                "faturamento_anual_formatado": format_currency(receita_ano1),
                 "margem_operacional": margem_operacional,
                 "crescimento_projetado": cagr,
                 "estrutura_custos": custos_fixos_pct,
                 "produtividade_media": produtividade_media,
-                "produtividade_media_formatada": self._format_currency(produtividade_media)
+                "produtividade_media_formatada": format_currency(produtividade_media)
             }
         except Exception as e:
             logger.error(f"Erro ao calcular KPIs do dashboard: {e}")
@@ -415,44 +551,31 @@ class FinancialDiagnostic:
             if integrated_data.get("has_document_data") and "adjusted_revenue" in integrated_data:
                 receita_ano1_ajustada = integrated_data["adjusted_revenue"]
             else:
-                receita_ano1_ajustada = float(data.get("receita_ano1", 0) or 0)
+                receita_ano1_ajustada = data.receitas[0]
                 
             # Ajusta custos do ano 1 se temos dados de documentos
             if integrated_data.get("has_document_data") and "adjusted_costs" in integrated_data:
                 custos_ano1_ajustados = integrated_data["adjusted_costs"]
             else:
-                custos_ano1_ajustados = float(data.get("custos_ano1", 0) or 0)
-            
-            # Extrai dados de receita e custos
-            receitas = [
-                receita_ano1_ajustada,
-                float(data.get("receita_ano2", 0) or 0),
-                float(data.get("receita_ano3", 0) or 0),
-                float(data.get("receita_ano4", 0) or 0),
-                float(data.get("receita_ano5", 0) or 0)
-            ]
+                custos_ano1_ajustados = data.custos[0]
             
-            custos = [
-                custos_ano1_ajustados,
-                float(data.get("custos_ano2", 0) or 0),
-                float(data.get("custos_ano3", 0) or 0),
-                float(data.get("custos_ano4", 0) or 0),
-                float(data.get("custos_ano5", 0) or 0)
-            ]
+            # Extrai dados de receita e custos, reduzidos para exibição se a série for longa
+            receitas, custos, anos = self._chart_series(data, receita_ano1_ajustada, custos_ano1_ajustados)
             
             # Se não houver dados suficientes, cria dados de exemplo
             if sum(receitas) == 0:
                 receitas = [1000000, 1200000, 1500000, 1750000, 2000000]
                 custos = [800000, 900000, 1100000, 1200000, 1300000]
+                anos = ["Ano 1", "Ano 2", "Ano 3", "Ano 4", "Ano 5"]
             
             # Estrutura de custos (padrão se não informado)
-            custos_fixos_pct = float(data.get("custos_fixos_pct", 60) or 60)
-            custos_variaveis_pct = 100 - custos_fixos_pct
+            custos_fixos_pct = data.custos_fixos_pct
+            custos_variaveis_pct = data.custos_variaveis_pct
             
             return {
                 "receitas": receitas,
                 "custos": custos,
-                "anos": ["Ano 1", "Ano 2", "Ano 3", "Ano 4", "Ano 5"],
+                "anos": anos,
                 "custos_fixos_pct": custos_fixos_pct,
                 "custos_variaveis_pct": custos_variaveis_pct
             }
@@ -467,6 +590,56 @@ class FinancialDiagnostic:
                 "custos_variaveis_pct": 40
             }
     
+    def _chart_series(self, data, receita_ano1, custos_ano1):
+        """
+        Séries de receitas e custos do gráfico, com no máximo CHART_MAX_POINTS pontos:
+        séries longas são somadas em trimestres, semestres, anos ou grupos de anos.
+        O primeiro ano usa a receita e os custos ajustados pelos documentos.
+        
+        Returns:
+            Tupla (receitas, custos, rótulos dos pontos)
+        """
+        periods_per_year = data.periods_per_year
+        if periods_per_year == 1:
+            receitas = [receita_ano1] + data.receitas[1:data.anos].tolist()
+            custos = [custos_ano1] + data.custos[1:data.anos].tolist()
+        else:
+            # Períodos do primeiro ano proporcionais aos valores anuais ajustados
+            receitas = data.receitas_periodos.tolist()
+            custos = data.custos_periodos.tolist()
+            for series, annual, adjusted in ((receitas, data.receitas[0], receita_ano1), (custos, data.custos[0], custos_ano1)):
+                if annual > 0 and adjusted != annual:
+                    for i in range(min(periods_per_year, len(series))):
+                        series[i] = series[i] * adjusted / annual
+        
+        # Menor agrupamento (com nome de período) que cabe no gráfico
+        size = len(receitas)
+        group = None
+        for candidate in sorted(periods_per_year // per_year for per_year in PERIOD_LABELS if periods_per_year % per_year == 0):
+            if -(-size // candidate) <= CHART_MAX_POINTS:
+                group = candidate
+                break
+        if group is None:
+            # Nem por ano cabe: agrupa anos inteiros
+            years_per_point = -(-size // (periods_per_year * CHART_MAX_POINTS))
+            group = periods_per_year * years_per_point
+        
+        if group == 1:
+            label = PERIOD_LABELS[periods_per_year]
+            return receitas, custos, [f"{label} {i + 1}" for i in range(size)]
+        
+        starts = range(0, size, group)
+        receitas = [sum(receitas[start:start + group]) for start in starts]
+        custos = [sum(custos[start:start + group]) for start in starts]
+        if group <= periods_per_year:
+            label = PERIOD_LABELS[periods_per_year // group]
+            labels = [f"{label} {i + 1}" for i in range(len(starts))]
+        else:
+            years = -(-size // periods_per_year)
+            years_per_point = group // periods_per_year
+            labels = [f"Anos {first}-{min(first + years_per_point - 1, years)}" for first in range(1, years + 1, years_per_point)]
+        return receitas, custos, labels
+    
     def _get_health_status(self, score):
         """Determina o status de saúde financeira com base na pontuação geral."""
         if score >= 7:
@@ -489,20 +662,7 @@ class FinancialDiagnostic:
                 margem_liquida = integrated_data["financial_ratios"]["margem_liquida"] * 100
                 
                 # Calcula score (0-10) baseado na margem líquida
-                if margem_liquida >= 30:
-                    score = 10
-                elif margem_liquida >= 25:
-                    score = 9
-                elif margem_liquida >= 20:
-                    score = 8
-                elif margem_liquida >= 15:
-                    score = 7
-                elif margem_liquida >= 10:
-                    score = 6
-                elif margem_liquida >= 5:
-                    score = 5
-                else:
-                    score = max(0, min(4, margem_liquida))
+                score = self._score("margem", margem_liquida, data)
                 
                 return {
                     "score": score,
@@ -513,10 +673,8 @@ class FinancialDiagnostic:
             else:
                 # Usa dados do questionário
                 # Extrai dados relevantes do questionário
-                receita_ano1 = float(data.get("receita_ano1", 0) or 0)
-                receita_ano2 = float(data.get("receita_ano2", 0) or 0)
-                custos_ano1 = float(data.get("custos_ano1", 0) or 0)
-                custos_ano2 = float(data.get("custos_ano2", 0) or 0)
+                receita_ano1, receita_ano2 = data.receitas[0], data.receitas[1]
+                custos_ano1, custos_ano2 = data.custos[0], data.custos[1]
                 
                 # Calcula margens
                 if receita_ano1 > 0:
@@ -541,20 +699,7 @@ class FinancialDiagnostic:
                 if margem_ano1 > 0 or margem_ano2 > 0:
                     media_margem = (margem_ano1 + margem_ano2) / 2
                     # Pontuação baseada na margem média
-                    if media_margem >= 30:
-                        score = 10
-                    elif media_margem >= 25:
-                        score = 9
-                    elif media_margem >= 20:
-                        score = 8
-                    elif media_margem >= 15:
-                        score = 7
-                    elif media_margem >= 10:
-                        score = 6
-                    elif media_margem >= 5:
-                        score = 5
-                    else:
-                        score = max(0, min(4, media_margem))
+                    score = self._score("margem", media_margem, data)
                     
                     # Ajuste pela tendência
                     if tendencia == "crescente":
@@ -585,26 +730,7 @@ class FinancialDiagnostic:
                 liquidez_corrente = integrated_data["financial_ratios"]["liquidez_corrente"]
                 
                 # Calcula score (0-10) baseado na liquidez corrente
-                if liquidez_corrente >= 2.0:
-                    score = 10
-                elif liquidez_corrente >= 1.8:
-                    score = 9
-                elif liquidez_corrente >= 1.5:
-                    score = 8
-                elif liquidez_corrente >= 1.3:
-                    score = 7
-                elif liquidez_corrente >= 1.1:
-                    score = 6
-                elif liquidez_corrente >= 1.0:
-                    score = 5
-                elif liquidez_corrente >= 0.8:
-                    score = 4
-                elif liquidez_corrente >= 0.6:
-                    score = 3
-                elif liquidez_corrente >= 0.4:
-                    score = 2
-                else:
-                    score = 1
+                score = self._score("liquidez", liquidez_corrente, data)
                 
                 return {
                     "score": score,
@@ -614,34 +740,15 @@ class FinancialDiagnostic:
                 }
             else:
                 # Para o MVP, usamos uma estimativa baseada na relação entre receitas e custos
-                receita_ano1 = float(data.get("receita_ano1", 0) or 0)
-                custos_ano1 = float(data.get("custos_ano1", 0) or 0)
+                receita_ano1 = data.receitas[0]
+                custos_ano1 = data.custos[0]
                 
                 if receita_ano1 > 0 and custos_ano1 > 0:
                     # Índice de liquidez estimado (receita/custos)
                     indice_liquidez = receita_ano1 / custos_ano1
                     
                     # Calcula score (0-10)
-                    if indice_liquidez >= 2.0:
-                        score = 10
-                    elif indice_liquidez >= 1.8:
-                        score = 9
-                    elif indice_liquidez >= 1.5:
-                        score = 8
-                    elif indice_liquidez >= 1.3:
-                        score = 7
-                    elif indice_liquidez >= 1.1:
-                        score = 6
-                    elif indice_liquidez >= 1.0:
-                        score = 5
-                    elif indice_liquidez >= 0.8:
-                        score = 4
-                    elif indice_liquidez >= 0.6:
-                        score = 3
-                    elif indice_liquidez >= 0.4:
-                        score = 2
-                    else:
-                        score = 1
+                    score = self._score("liquidez", indice_liquidez, data)
                     
                     return {
                         "score": score,
@@ -668,26 +775,7 @@ class FinancialDiagnostic:
                 endividamento_geral = integrated_data["financial_ratios"]["endividamento_geral"]
                 
                 # Calcula score (0-10) baseado no endividamento geral
-                if endividamento_geral <= 0.3:
-                    score = 10
-                elif endividamento_geral <= 0.4:
-                    score = 9
-                elif endividamento_geral <= 0.5:
-                    score = 8
-                elif endividamento_geral <= 0.6:
-                    score = 7
-                elif endividamento_geral <= 0.7:
-                    score = 6
-                elif endividamento_geral <= 0.8:
-                    score = 5
-                elif endividamento_geral <= 0.9:
-                    score = 4
-                elif endividamento_geral <= 1.0:
-                    score = 3
-                elif endividamento_geral <= 1.2:
-                    score = 2
-                else:
-                    score = 1
+                score = self._score("endividamento", endividamento_geral, data)
                 
                 return {
                     "score": score,
@@ -697,9 +785,7 @@ class FinancialDiagnostic:
                 }
             else:
                 # Para o MVP, usamos uma estimativa baseada no crescimento projetado
-                receita_ano1 = float(data.get("receita_ano1", 0) or 0)
-                receita_ano2 = float(data.get("receita_ano2", 0) or 0)
-                receita_ano3 = float(data.get("receita_ano3", 0) or 0)
+                receita_ano1, receita_ano2, receita_ano3 = data.receitas[0], data.receitas[1], data.receitas[2]
                 
                 if receita_ano1 > 0 and receita_ano2 > 0 and receita_ano3 > 0:
                     # Calcula taxas de crescimento
@@ -710,14 +796,8 @@ class FinancialDiagnostic:
                     media_crescimento = (taxa_crescimento_ano2 + taxa_crescimento_ano3) / 2
                     
                     # Calcula score (0-10) - crescimento muito alto pode indicar risco de endividamento
-                    if media_crescimento <= 0.2:  # Crescimento sustentável
-                        score = 8
-                    elif media_crescimento <= 0.5:  # Crescimento acelerado mas ainda gerenciável
-                        score = 6
-                    elif media_crescimento <= 1.0:  # Crescimento muito rápido, possível risco
-                        score = 4
-                    else:  # Crescimento extremamente agressivo, alto risco
-                        score = 2
+                    # (até 20% sustentável, até 50% gerenciável, até 100% arriscado, acima disso alto risco)
+                    score = self._score("endividamento_crescimento", media_crescimento, data)
                     
                     return {
                         "score": score,
@@ -744,14 +824,14 @@ class FinancialDiagnostic:
             if integrated_data.get("has_document_data") and "adjusted_revenue" in integrated_data:
                 receita_ano1 = integrated_data["adjusted_revenue"]
             else:
-                receita_ano1 = float(data.get("receita_ano1", 0) or 0)
+                receita_ano1 = data.receitas[0]
                 
             if integrated_data.get("has_document_data") and "adjusted_costs" in integrated_data:
                 custos_ano1 = integrated_data["adjusted_costs"]
             else:
-                custos_ano1 = float(data.get("custos_ano1", 0) or 0)
+                custos_ano1 = data.custos[0]
                 
-            num_funcionarios = float(data.get("num_funcionarios", 0) or 0)
+            num_funcionarios = data.num_funcionarios
             
             # Verifica se temos dados de prazos médios
             has_prazo_data = False
@@ -771,58 +851,16 @@ class FinancialDiagnostic:
                     margem_operacional = (receita_ano1 - custos_ano1) / receita_ano1 * 100 if receita_ano1 > 0 else 0
                 
                 # Calcula score (0-10) baseado na receita por funcionário e margem
-                score_receita = 0
-                if receita_por_funcionario >= 500000:
-                    score_receita = 10
-                elif receita_por_funcionario >= 400000:
-                    score_receita = 9
-                elif receita_por_funcionario >= 300000:
-                    score_receita = 8
-                elif receita_por_funcionario >= 250000:
-                    score_receita = 7
-                elif receita_por_funcionario >= 200000:
-                    score_receita = 6
-                elif receita_por_funcionario >= 150000:
-                    score_receita = 5
-                elif receita_por_funcionario >= 100000:
-                    score_receita = 4
-                elif receita_por_funcionario >= 75000:
-                    score_receita = 3
-                elif receita_por_funcionario >= 50000:
-                    score_receita = 2
-                else:
-                    score_receita = 1
+                score_receita = self._score("receita_por_funcionario", receita_por_funcionario, data)
                 
-                score_margem = 0
-                if margem_operacional >= 30:
-                    score_margem = 10
-                elif margem_operacional >= 25:
-                    score_margem = 9
-                elif margem_operacional >= 20:
-                    score_margem = 8
-                elif margem_operacional >= 15:
-                    score_margem = 7
-                elif margem_operacional >= 10:
-                    score_margem = 6
-                elif margem_operacional >= 5:
-                    score_margem = 5
-                else:
-                    score_margem = max(0, min(4, margem_operacional))
+                score_margem = self._score("margem", margem_operacional, data)
                 
                 # Score adicional para ciclo financeiro, se disponível
                 score_ciclo = None
                 if has_prazo_data:
                     ciclo_financeiro = prazo_recebimento - prazo_pagamento
-                    if ciclo_financeiro <= 0:
-                        score_ciclo = 10  # Excelente: recebe antes de pagar
-                    elif ciclo_financeiro <= 15:
-                        score_ciclo = 8
-                    elif ciclo_financeiro <= 30:
-                        score_ciclo = 6
-                    elif ciclo_financeiro <= 45:
-                        score_ciclo = 4
-                    else:
-                        score_ciclo = 2  # Ruim: demora muito para receber
+                    # Excelente quando recebe antes de pagar; ruim quando demora muito para receber
+                    score_ciclo = self._score("ciclo_financeiro", ciclo_financeiro, data)
                 
                 # Score final é a média dos scores disponíveis
                 if score_ciclo is not None:
@@ -861,41 +899,15 @@ class FinancialDiagnostic:
             if integrated_data.get("has_document_data") and "adjusted_revenue" in integrated_data:
                 receita_ano1 = integrated_data["adjusted_revenue"]
             else:
-                receita_ano1 = float(data.get("receita_ano1", 0) or 0)
-                
-            receita_ano2 = float(data.get("receita_ano2", 0) or 0)
-            receita_ano3 = float(data.get("receita_ano3", 0) or 0)
-            receita_ano4 = float(data.get("receita_ano4", 0) or 0)
-            receita_ano5 = float(data.get("receita_ano5", 0) or 0)
+                receita_ano1 = data.receitas[0]
+            
+            # Calcula CAGR (Taxa Composta de Crescimento Anual) até o último ano do horizonte
+            cagr = data.cagr(receita_ano1)
             
             # Verifica se temos dados suficientes
-            if receita_ano1 > 0 and receita_ano5 > 0:
-                # Calcula CAGR (Taxa Composta de Crescimento Anual)
-                cagr = (math.pow(receita_ano5 / receita_ano1, 1/4) - 1) * 100
-                
+            if cagr is not None:
                 # Calcula score (0-10)
-                if cagr >= 100:  # Crescimento extremamente alto (100%+ ao ano)
-                    score = 10
-                elif cagr >= 80:
-                    score = 9
-                elif cagr >= 60:
-                    score = 8
-                elif cagr >= 40:
-                    score = 7
-                elif cagr >= 30:
-                    score = 6
-                elif cagr >= 20:
-                    score = 5
-                elif cagr >= 15:
-                    score = 4
-                elif cagr >= 10:
-                    score = 3
-                elif cagr >= 5:
-                    score = 2
-                elif cagr > 0:
-                    score = 1
-                else:
-                    score = 0
+                score = self._score("crescimento", cagr, data)
                 
                 return {
                     "score": score,
@@ -908,6 +920,11 @@ class FinancialDiagnostic:
             logger.warning(f"Erro ao calcular score de crescimento: {e}")
             return {"score": None, "avaliacao": "Dados insuficientes para análise"}
     
+    def _score(self, table, value, data):
+        """Pontua um valor na tabela de faixas do indicador, considerando o setor da empresa."""
+        tables = self.scoring_tables or default_scoring_tables()
+        return tables.score(table, value, data.setor_atuacao)
+    
     def _get_evaluation_text(self, score):
         """Retorna texto de avaliação com base no score."""
         if score is None:
@@ -993,48 +1010,42 @@ class FinancialDiagnostic:
             data_source = " Este diagnóstico é baseado apenas nas respostas do questionário."
         
         return base_summary + data_source
-    
-    def _format_currency(self, value):
-        """Formata um valor monetário."""
-        if value is None or value == 0:
-            return "R$ 0"
-            
-        if value >= 1_000_000_000:  # Bilhões
-            return f"R$ {value/1_000_000_000:.2f} bilhões"
-        elif value >= 1_000_000:  # Milhões
-            return f"R$ {value/1_000_000:.2f} milhões"
-        elif value >= 1_000:  # Milhares
-            return f"R$ {value/1_000:.2f} mil"
-        else:
-            return f"R$ {value:.2f}"
 
 
 class ValuationCalculator:
     """Calcula o valuation da empresa com base nas respostas do questionário."""
     
-    def calculate_valuation(self, financial_data, questionnaire_data):
-        """Calcula o valuation com base nas respostas do questionário."""
+    def __init__(self, tables=None):
+        self._tables = tables
+    
+    @property
+    def tables(self):
+        """Tabelas de valuation fixadas no calculador ou as do arquivo padrão (relidas quando ele muda)."""
+        return self._tables or default_valuation_tables()
+    
+    def calculate_valuation(self, financial_data, questionnaire_data, tables=None):
+        """
+        Calcula o valuation com base nas respostas do questionário.
+        tables fixa a versão das tabelas de valuation (padrão: as do arquivo atual).
+        """
         logger.info("Calculando valuation...")
         
         try:
-            # Extrai dados relevantes do questionário
-            receita_ano1 = float(questionnaire_data.get("receita_ano1", 0) or 0)
-            receita_ano2 = float(questionnaire_data.get("receita_ano2", 0) or 0)
-            receita_ano3 = float(questionnaire_data.get("receita_ano3", 0) or 0)
-            receita_ano4 = float(questionnaire_data.get("receita_ano4", 0) or 0)
-            receita_ano5 = float(questionnaire_data.get("receita_ano5", 0) or 0)
-            
-            custos_ano1 = float(questionnaire_data.get("custos_ano1", 0) or 0)
-            custos_ano2 = float(questionnaire_data.get("custos_ano2", 0) or 0)
-            custos_ano3 = float(questionnaire_data.get("custos_ano3", 0) or 0)
-            custos_ano4 = float(questionnaire_data.get("custos_ano4", 0) or 0)
-            custos_ano5 = float(questionnaire_data.get("custos_ano5", 0) or 0)
-            
-            setor = questionnaire_data.get("setor_atuacao", "")
-            modelo_negocios = questionnaire_data.get("modelo_negocios", "")
+            # Converte as respostas do questionário uma única vez
+            data = QuestionnaireInput.parse(questionnaire_data)
+            if data.errors:
+                return {
+                    "status": "Erro no cálculo",
+                    "message": f"Ocorreu um erro ao calcular o valuation: {'; '.join(data.errors)}"
+                }
+            receita_final = data.receita_final  # último ano do horizonte
+            setor = data.setor_atuacao
+            modelo_negocios = data.modelo_negocios
+            # Uma única versão das tabelas em todo o cálculo, mesmo se o arquivo mudar
+            tables = tables or self.tables
             
             # Verifica se temos dados suficientes para o cálculo
-            if receita_ano5 <= 0:
+            if receita_final <= 0:
                 return {
                     "status": "Dados insuficientes",
                     "message": "É necessário fornecer projeções de receita para calcular o valuation."
@@ -1042,43 +1053,13 @@ class ValuationCalculator:
             
             # Calcula o valuation por múltiplos de receita
             valuation_multiplos = self._calculate_revenue_multiple_valuation(
-                receita_ano5, setor, modelo_negocios
+                receita_final, setor, modelo_negocios, tables
             )
             
             # Calcula o valuation por DCF (Fluxo de Caixa Descontado)
-            valuation_dcf = self._calculate_dcf_valuation(
-                [receita_ano1, receita_ano2, receita_ano3, receita_ano4, receita_ano5],
-                [custos_ano1, custos_ano2, custos_ano3, custos_ano4, custos_ano5],
-                setor
-            )
+            valuation_dcf = self._calculate_dcf_valuation(data.receitas[:data.anos], data.custos[:data.anos], setor, tables)
             
-            # Calcula o valuation final (média dos métodos)
-            valuation_final = (valuation_multiplos + valuation_dcf) / 2
-            
-            # Calcula o range (±20%)
-            valuation_min = valuation_final * 0.8
-            valuation_max = valuation_final * 1.2
-            
-            # Formata os valores para exibição
-            valuation_min_formatted = self._format_currency(valuation_min)
-            valuation_max_formatted = self._format_currency(valuation_max)
-            valuation_final_formatted = self._format_currency(valuation_final)
-            
-            # Prepara o resultado
-            result = {
-                "status": "Valuation calculado com base nas projeções financeiras",
-                "valuation": valuation_final_formatted,
-                "range_min": valuation_min_formatted,
-                "range_max": valuation_max_formatted,
-                "methods_used": ["Múltiplos de Receita", "Fluxo de Caixa Descontado (DCF)"],
-                "assumptions": self._generate_assumptions(questionnaire_data),
-                "details": {
-                    "multiplos": self._format_currency(valuation_multiplos),
-                    "dcf": self._format_currency(valuation_dcf)
-                }
-            }
-            
-            return result
+            return self.valuation_result(data, valuation_multiplos, valuation_dcf, tables)
             
         except Exception as e:
             logger.error(f"Erro ao calcular valuation: {e}")
@@ -1087,62 +1068,50 @@ class ValuationCalculator:
                 "message": f"Ocorreu um erro ao calcular o valuation: {str(e)}"
             }
     
-    def _calculate_revenue_multiple_valuation(self, receita_ano5, setor, modelo_negocios):
-        """Calcula o valuation baseado em múltiplos de receita."""
-        # Define múltiplos por setor (valores típicos de mercado)
-        multiplos_setor = {
-            "Tecnologia": 5.0,
-            "SaaS": 6.0,
-            "Saúde": 4.0,
-            "Varejo": 1.0,
-            "Indústria": 1.5,
-            "Serviços": 2.0,
-            "Agro": 1.2,
-            "Construção": 1.0,
-            "Educação": 2.5,
-            "Outros": 2.0
-        }
+    def valuation_result(self, data, valuation_multiplos, valuation_dcf, tables=None):
+        """Monta o resultado do valuation a partir dos dois métodos (usado também pelo cálculo em lote)."""
+        # Calcula o valuation final (média dos métodos)
+        valuation_final = (valuation_multiplos + valuation_dcf) / 2
         
-        # Define ajustes por modelo de negócio
-        ajustes_modelo = {
-            "Assinatura": 1.5,
-            "Venda direta": 1.0,
-            "Licenciamento": 1.3,
-            "Intermediação": 1.2,
-            "Freemium": 1.4,
-            "Outro": 1.0
-        }
+        # Calcula o range (±20%)
+        valuation_min = valuation_final * 0.8
+        valuation_max = valuation_final * 1.2
         
-        # Obtém o múltiplo base pelo setor (ou usa o padrão)
-        multiplo_base = multiplos_setor.get(setor, multiplos_setor["Outros"])
-        
-        # Aplica ajuste pelo modelo de negócio
-        ajuste = ajustes_modelo.get(modelo_negocios, ajustes_modelo["Outro"])
-        multiplo_final = multiplo_base * ajuste
+        # Formata os valores para exibição
+        valuation_min_formatted = format_currency(valuation_min)
+        valuation_max_formatted = format_currency(valuation_max)
+        valuation_final_formatted = format_currency(valuation_final)
         
+        # Prepara o resultado
+        return {
+            "status": VALUATION_STATUS,
+            "valuation": valuation_final_formatted,
+            "range_min": valuation_min_formatted,
+            "range_max": valuation_max_formatted,
+            "methods_used": ["Múltiplos de Receita", "Fluxo de Caixa Descontado (DCF)"],
+            "assumptions": self._generate_assumptions(data),
+            "details": {
+                "multiplos": format_currency(valuation_multiplos),
+                "dcf": format_currency(valuation_dcf)
+            },
+            "tables_version": (tables or self.tables).version
+        }
+    
+    def _calculate_revenue_multiple_valuation(self, receita_final, setor, modelo_negocios, tables=None):
+        """Calcula o valuation baseado em múltiplos de receita."""
         # Calcula o valuation
-        valuation = receita_ano5 * multiplo_final
+        valuation = receita_final * self._revenue_multiple(setor, modelo_negocios, tables)
         
         return valuation
     
-    def _calculate_dcf_valuation(self, receitas, custos, setor):
+    def _revenue_multiple(self, setor, modelo_negocios, tables=None):
+        """Múltiplo de receita do setor, ajustado pelo modelo de negócio (valuation_tables.json)."""
+        return (tables or self.tables).revenue_multiple(setor, modelo_negocios)
+    
+    def _calculate_dcf_valuation(self, receitas, custos, setor, tables=None):
         """Calcula o valuation pelo método de Fluxo de Caixa Descontado."""
-        # Define taxas de desconto por setor
-        taxas_desconto = {
-            "Tecnologia": 0.20,  # 20%
-            "SaaS": 0.18,
-            "Saúde": 0.15,
-            "Varejo": 0.12,
-            "Indústria": 0.14,
-            "Serviços": 0.15,
-            "Agro": 0.13,
-            "Construção": 0.14,
-            "Educação": 0.16,
-            "Outros": 0.15
-        }
-        
-        # Obtém a taxa de desconto (ou usa o padrão)
-        taxa_desconto = taxas_desconto.get(setor, taxas_desconto["Outros"])
+        # Obtém a taxa de desconto do setor
+        taxa_desconto = self._discount_rate(setor, tables)
         
         # Calcula fluxos de caixa (simplificado: receita - custos)
         fluxos_caixa = []
@@ -1160,7 +1129,7 @@ class ValuationCalculator:
             valor_presente += fluxo / math.pow(1 + taxa_desconto, i + 1)
         
         # Calcula valor terminal (perpetuidade com crescimento de 3%)
-        taxa_crescimento_perpetuidade = 0.03
+        taxa_crescimento_perpetuidade = PERPETUITY_GROWTH_RATE
         valor_terminal = fluxos_caixa[-1] * (1 + taxa_crescimento_perpetuidade) / (taxa_desconto - taxa_crescimento_perpetuidade)
         valor_terminal_presente = valor_terminal / math.pow(1 + taxa_desconto, len(fluxos_caixa))
         
@@ -1169,25 +1138,15 @@ class ValuationCalculator:
         
         return valuation
     
+    def _discount_rate(self, setor, tables=None):
+        """Taxa de desconto do setor, ou a padrão (valuation_tables.json)."""
+        return (tables or self.tables).discount_rate(setor)
+    
     def _generate_assumptions(self, data):
         """Gera premissas utilizadas no cálculo do valuation."""
         return [
             "Projeções de receita e custos conforme informado no questionário",
             "Taxa de crescimento na perpetuidade de 3%",
             "Múltiplos de receita ajustados por setor e modelo de negócio",
-            "Horizonte de projeção de 5 anos"
+            f"Horizonte de projeção de {data.anos} anos"
         ]
-    
-    def _format_currency(self, value):
-        """Formata um valor monetário."""
-        if value is None or value == 0:
-            return "R$ 0"
-            
-        if value >= 1_000_000_000:  # Bilhões
-            return f"R$ {value/1_000_000_000:.2f} bilhões"
-        elif value >= 1_000_000:  # Milhões
-            return f"R$ {value/1_000_000:.2f} milhões"
-        elif value >= 1_000:  # Milhares
-            return f"R$ {value/1_000:.2f} mil"
-        else:
-            return f"R$ {value:.2f}"
@@ -0,0 +1,321 @@
+"""
+Meta de pontuação do diagnóstico: valor mínimo de margem operacional, faturamento ou
+liquidez corrente para a pontuação geral atingir a meta (padrão: 7, "Saudável").
+
+Como função de uma alavanca, cada score é constante entre os limites das tabelas,
+exceto nas faixas "otherwise" com clamp (ex.: margem abaixo de 5%), em que acompanha
+continuamente o próprio valor. Os pontos em que algum valor pontuado cruza um limite
+são obtidos em forma fechada a partir das tabelas (scoring_tables) e dividem a
+alavanca em segmentos; a pontuação é avaliada nesses pontos e no meio de cada
+segmento, em um único cálculo em lote (diagnostic_batch). O primeiro valor avaliado
+que atinge a meta é então refinado por bisseção entre ele e o último valor abaixo da
+meta, também em lote, o que cobre os segmentos contínuos sem uma busca exaustiva.
+
+Alavancas (as demais entradas ficam como estão):
+    margem: margem operacional (%) de todos os anos, com os custos ajustados à receita
+        (inclusive a margem líquida e os custos ajustados dos documentos, quando houver)
+    receita: faturamento do ano 1, com toda a série de receitas na mesma proporção e os
+        custos mantidos
+    liquidez: liquidez corrente, como se informada por um balanço patrimonial
+"""
+
+import math
+import logging
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from diagnostic_batch import diagnostic_columns, generate_diagnostic_batch, DOCUMENT_COLUMNS
+from scoring_tables import default_scoring_tables
+
+logger = logging.getLogger(__name__)
+
+# Pontuação geral a partir da qual a saúde financeira é "Saudável"
+TARGET_SCORE = 7
+
+LEVERS = ("margem", "receita", "liquidez")
+
+# Faixa de busca da margem operacional (%); com 100% os custos zerariam a liquidez
+MARGIN_RANGE = (-100.0, 99.9)
+
+
+def _linear_breakpoints(alpha, beta, thresholds):
+    """Valores de R > 0 em que alpha - beta / R cruza cada limite."""
+    points = []
+    for threshold in thresholds:
+        if alpha != threshold:
+            value = beta / (alpha - threshold)
+            if value > 0 and math.isfinite(value):
+                points.append(value)
+    return points
+
+
+class _Company:
+    """Valores de uma empresa usados no cálculo dos pontos de mudança."""
+
+    def __init__(self, columns):
+        self.receitas = columns["receitas"][0]
+        self.custos = columns["custos"][0]
+        self.num_funcionarios = float(columns["num_funcionarios"][0])
+        self.sector = columns["setor_atuacao"][0]
+        self.has_docs = bool(columns["has_document_data"][0])
+        self.doc = {name: float(columns[name][0]) for name in DOCUMENT_COLUMNS}
+        r1 = float(self.receitas[0])
+        c1 = float(self.custos[0])
+        adjusted_revenue = self.doc["adjusted_revenue"]
+        adjusted_costs = self.doc["adjusted_costs"]
+        self.r1_adj = adjusted_revenue if self.has_docs and not math.isnan(adjusted_revenue) else r1
+        self.c1_adj = adjusted_costs if self.has_docs and not math.isnan(adjusted_costs) else c1
+
+
+def _margin_points(company, thresholds):
+    """Pontos de mudança da margem: limites de margem, margem zero e limites de liquidez."""
+    margem = thresholds("margem")
+    points = [0.0] + margem
+    # A média das margens dos dois anos conta 0 para um ano sem receita
+    years = sum(1 for value in company.receitas[:2] if value > 0)
+    if years == 1:
+        points += [2 * limit for limit in margem]
+    return points + [100 * (1 - 1 / limit) for limit in thresholds("liquidez") if limit > 0]
+
+
+def _margin_columns(company, values):
+    """Colunas com a margem operacional de cada valor aplicada a todos os anos."""
+    factor = 1 - values / 100
+    return {
+        "custos": company.receitas[np.newaxis, :] * factor[:, np.newaxis],
+        "adjusted_costs": np.where(np.isnan(company.doc["adjusted_costs"]), np.nan, company.r1_adj * factor),
+        "margem_liquida": np.where(np.isnan(company.doc["margem_liquida"]), np.nan, values / 100)
+    }
+
+
+def _revenue_points(company, thresholds):
+    """
+    Pontos de mudança do faturamento R: cada margem é da forma alpha - beta / R, e a
+    liquidez e a receita por funcionário são proporcionais a R.
+    """
+    r1_adj = company.r1_adj
+    r = [float(value) for value in company.receitas[:2]]
+    c = [float(value) for value in company.custos[:2]]
+    # Margem do ano k = alpha_k - beta_k / R (0 quando a receita do ano é nula)
+    alpha = [100.0 if r[k] > 0 else 0.0 for k in range(2)]
+    beta = [100 * c[k] * r1_adj / r[k] if r[k] > 0 else 0.0 for k in range(2)]
+
+    margem = thresholds("margem")
+    points = []
+    for k in range(2):
+        points += _linear_breakpoints(alpha[k], beta[k], [0.0])
+    # Média das margens dos dois anos
+    points += _linear_breakpoints((alpha[0] + alpha[1]) / 2, (beta[0] + beta[1]) / 2, margem)
+    # Tendência da margem: ano 2 acima de 110% ou abaixo de 90% do ano 1
+    for ratio in (1.1, 0.9):
+        points += _linear_breakpoints(alpha[1] - ratio * alpha[0], beta[1] - ratio * beta[0], [0.0])
+    # Margem operacional com a receita e os custos ajustados
+    points += _linear_breakpoints(100.0, 100 * company.c1_adj, margem)
+    # Liquidez do questionário (receita / custos do ano 1)
+    if r[0] > 0 and c[0] > 0:
+        points += [limit * c[0] * r1_adj / r[0] for limit in thresholds("liquidez") if limit > 0]
+    # Receita por funcionário
+    if company.num_funcionarios > 0:
+        points += [limit * company.num_funcionarios for limit in thresholds("receita_por_funcionario") if limit > 0]
+    return points
+
+
+def _revenue_columns(company, values):
+    """Colunas com toda a série de receitas escalada para o faturamento de cada valor."""
+    scale = values / company.r1_adj
+    return {
+        "receitas": company.receitas[np.newaxis, :] * scale[:, np.newaxis],
+        "adjusted_revenue": company.doc["adjusted_revenue"] * scale
+    }
+
+
+def _liquidity_points(company, thresholds):
+    """Pontos de mudança da liquidez corrente: os limites da tabela de liquidez."""
+    return list(thresholds("liquidez"))
+
+
+def _liquidity_columns(company, values):
+    """Colunas com a liquidez corrente de cada valor, como se vinda de um balanço."""
+    return {
+        "liquidez_corrente": values,
+        "has_document_data": np.ones(len(values), dtype=bool)
+    }
+
+
+def _evaluation_points(breakpoints, lower, upper, open_lower):
+    """
+    Pontos de mudança ordenados (a partir de lower) e o meio de cada intervalo entre
+    eles, mais um ponto acima do último; pontos fora de [lower, upper] são descartados.
+
+    Returns:
+        Tupla (pontos de mudança, lista de (valor avaliado, índice do ponto de mudança,
+        é o próprio ponto de mudança))
+    """
+    points = sorted({point for point in breakpoints if point > lower and (upper is None or point <= upper)})
+    points.insert(0, lower)
+    evaluation = []
+    for i, point in enumerate(points):
+        # Com o limite inferior aberto, o primeiro intervalo é representado pelo seu meio
+        if i > 0 or not open_lower:
+            evaluation.append((point, i, True))
+        if i + 1 < len(points):
+            evaluation.append(((point + points[i + 1]) / 2, i, False))
+    last = points[-1]
+    beyond = upper if upper is not None else last + max(1.0, abs(last))
+    if beyond > last:
+        evaluation.append(((last + beyond) / 2, len(points) - 1, False))
+    return points, evaluation
+
+
+# Alavanca -> (pontos de mudança, colunas alteradas, limite inferior, limite superior, inferior aberto)
+LEVER_SPECS = {
+    "margem": (_margin_points, _margin_columns, MARGIN_RANGE[0], MARGIN_RANGE[1], False),
+    "receita": (_revenue_points, _revenue_columns, 0.0, None, True),
+    "liquidez": (_liquidity_points, _liquidity_columns, 0.0, None, False)
+}
+
+
+# Valores avaliados por rodada da bisseção em cada alavanca e precisão relativa final
+BISECTION_POINTS = 32
+BISECTION_TOLERANCE = 1e-12
+
+
+def _evaluate(columns, company, tables, requests):
+    """
+    Pontuação geral de cada valor das alavancas, em um único lote.
+
+    Args:
+        requests: Lista de (alavanca, array de valores)
+
+    Returns:
+        Lista com o array de pontuações de cada pedido
+    """
+    blocks = []
+    for lever, values in requests:
+        block = {name: np.repeat(array, len(values), axis=0) for name, array in columns.items()}
+        block.update(LEVER_SPECS[lever][1](company, values))
+        blocks.append(block)
+    if not blocks:
+        return []
+    batch = {name: np.concatenate([block[name] for block in blocks]) for name in blocks[0]}
+    overall = generate_diagnostic_batch(batch, tables)["overall_score"]
+    scores = []
+    offset = 0
+    for _, values in requests:
+        scores.append(overall[offset:offset + len(values)])
+        offset += len(values)
+    return scores
+
+
+def _bisect(columns, company, tables, target, brackets):
+    """
+    Refina, por bisseção em lote, o menor valor com pontuação >= target de cada alavanca.
+
+    Args:
+        brackets: {alavanca: [abaixo, acima, pontuação acima]}, com a pontuação abaixo da
+            meta no primeiro valor e atingindo-a no segundo
+
+    Returns:
+        Tupla (brackets refinados, valores avaliados)
+    """
+    evaluated = 0
+    steps = np.arange(1, BISECTION_POINTS) / BISECTION_POINTS
+    while True:
+        pending = [
+            lever for lever, (low, high, _) in brackets.items()
+            if high - low > BISECTION_TOLERANCE * max(1.0, abs(high))
+        ]
+        requests = []
+        for lever in pending:
+            low, high, _ = brackets[lever]
+            values = np.unique(low + (high - low) * steps)
+            values = values[(values > low) & (values < high)]
+            if len(values):
+                requests.append((lever, values))
+        if not requests:
+            return brackets, evaluated
+        for (lever, values), scores in zip(requests, _evaluate(columns, company, tables, requests)):
+            evaluated += len(values)
+            passing = np.flatnonzero(scores >= target)
+            bracket = brackets[lever]
+            if len(passing):
+                j = passing[0]
+                bracket[1], bracket[2] = float(values[j]), float(scores[j])
+                if j > 0:
+                    bracket[0] = float(values[j - 1])
+            else:
+                bracket[0] = float(values[-1])
+
+
+def goal_seek(documents_data, questionnaire_data, target=TARGET_SCORE, levers=LEVERS, scoring_tables=None):
+    """
+    Calcula, para cada alavanca, o menor valor com pontuação geral >= target.
+
+    Args:
+        documents_data: Documentos da empresa
+        questionnaire_data: Respostas do questionário (ou QuestionnaireInput)
+        target: Pontuação geral desejada
+        levers: Alavancas a calcular (ver LEVERS)
+        scoring_tables: Tabelas de pontuação (padrão: as mesmas do cálculo escalar)
+
+    Returns:
+        Dicionário com "meta" e "alavancas": {alavanca: {"minimo", "inclusivo", "pontuacao"}};
+        minimo é None se a meta não for atingível pela alavanca e, com inclusivo False,
+        a meta só é atingida acima do valor informado
+    """
+    if np is None:
+        raise RuntimeError("A meta de pontuação requer o pacote numpy (pip install numpy)")
+    unknown = set(levers) - set(LEVER_SPECS)
+    if unknown:
+        raise ValueError(f"Alavancas desconhecidas: {', '.join(sorted(unknown))} (opções: {', '.join(LEVERS)})")
+    tables = scoring_tables or default_scoring_tables()
+    columns = diagnostic_columns([(documents_data, questionnaire_data)])
+    company = _Company(columns)
+
+    def thresholds(name):
+        return tables.table(name, company.sector).thresholds
+
+    # Pontos de mudança e meio de cada segmento, de todas as alavancas em um único lote
+    plans = {}
+    for lever in levers:
+        points_fn, _, lower, upper, open_lower = LEVER_SPECS[lever]
+        if lever == "receita" and company.r1_adj <= 0:
+            # Sem faturamento não há proporção para escalar a série de receitas
+            continue
+        points, evaluation = _evaluation_points(points_fn(company, thresholds), lower, upper, open_lower)
+        plans[lever] = (points, evaluation, lower, open_lower)
+    requests = [(lever, np.array([value for value, _, _ in plan[1]])) for lever, plan in plans.items()]
+    evaluated = sum(len(values) for _, values in requests)
+
+    result = {"meta": target, "alavancas": {lever: {"minimo": None, "inclusivo": None, "pontuacao": None} for lever in levers}}
+    # Por alavanca: último valor abaixo da meta e se ele é um ponto avaliado exatamente
+    brackets = {}
+    boundaries = {}
+    for (lever, _), scores in zip(requests, _evaluate(columns, company, tables, requests)):
+        points, evaluation, lower, open_lower = plans[lever]
+        below, below_exact = (lower, True) if open_lower else (None, False)
+        for j, (value, _, exact) in enumerate(evaluation):
+            score = float(scores[j])
+            if score < target:
+                below, below_exact = value, exact
+                continue
+            if below is None:
+                # O limite inferior da alavanca já atinge a meta
+                result["alavancas"][lever] = {"minimo": value, "inclusivo": True, "pontuacao": score}
+            else:
+                brackets[lever] = [below, value, score]
+                boundaries[lever] = below if below_exact else None
+            break
+
+    brackets, refined = _bisect(columns, company, tables, target, brackets)
+    for lever, (low, high, score) in brackets.items():
+        if low == boundaries[lever]:
+            # A meta é atingida logo acima de um ponto de mudança (faixa "above" ou limite aberto)
+            result["alavancas"][lever] = {"minimo": low, "inclusivo": False, "pontuacao": score}
+        else:
+            result["alavancas"][lever] = {"minimo": high, "inclusivo": True, "pontuacao": score}
+    logger.info(f"Meta de pontuação {target}: {evaluated} pontos avaliados e {refined} na bisseção")
+    return result
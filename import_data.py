@@ -0,0 +1,233 @@
+"""
+Importação em lote de empresas, questionários e documentos.
+Lê arquivos CSV ou JSONL em streaming, valida cada linha (questionários contra o
+QuestionnaireTemplate) e grava em lotes no backend de armazenamento configurado
+(STORAGE_BACKEND etc.), reportando a vazão ao final.
+
+Uso:
+    python import_data.py companies empresas.csv --user-id <id do usuário>
+    python import_data.py questionnaires historico.jsonl --batch-size 5000
+    python import_data.py documents documentos.jsonl
+
+Formato das linhas:
+    companies: name (obrigatório), id, user_id, cnpj, segment, description, created_at
+    questionnaires: company_id (obrigatório), id, created_at e as respostas, em colunas
+        com o id de cada pergunta ou (JSONL) em um objeto "responses"
+    documents: company_id e document_type (obrigatórios), id, original_filename,
+        extracted_data (objeto, ou JSON em uma coluna do CSV), upload_date
+"""
+
+import os
+import csv
+import sys
+import json
+import time
+import uuid
+import logging
+import argparse
+from datetime import datetime
+
+from questionnaire_storage import QuestionnaireTemplate
+from document_processor import calculate_document_ratios
+from repositories import create_repository, storage_config_from_env
+
+logger = logging.getLogger(__name__)
+
+IMPORT_KINDS = ("companies", "questionnaires", "documents")
+DEFAULT_BATCH_SIZE = 1000
+
+# Limite de erros guardados no relatório (a contagem de rejeitados continua exata)
+MAX_REPORTED_ERRORS = 100
+
+# Colunas que não são respostas em um CSV de questionários
+QUESTIONNAIRE_META_FIELDS = ("id", "company_id", "created_at")
+
+
+def iter_rows(path):
+    """Lê um arquivo CSV ou JSONL linha a linha, gerando (número da linha, registro, erro)."""
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row, None
+        return
+
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_no, None, f"JSON inválido: {e}"
+                continue
+            if not isinstance(row, dict):
+                yield line_no, None, "a linha deve ser um objeto JSON"
+                continue
+            yield line_no, row, None
+
+
+def _required(row, field):
+    """Retorna um campo obrigatório da linha ou levanta ValueError."""
+    value = row.get(field)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        raise ValueError(f"{field}: campo obrigatório")
+    return value.strip() if isinstance(value, str) else value
+
+
+def build_company(row, user_id, now):
+    """Monta o registro de uma empresa a partir de uma linha."""
+    owner = row.get("user_id") or user_id
+    if not owner:
+        raise ValueError("user_id: informe a coluna ou a opção --user-id")
+    return {
+        "id": row.get("id") or str(uuid.uuid4()),
+        "user_id": owner,
+        "name": _required(row, "name"),
+        "cnpj": row.get("cnpj"),
+        "segment": row.get("segment"),
+        "description": row.get("description"),
+        "created_at": row.get("created_at") or now
+    }
+
+
+def build_questionnaire(row, template, now):
+    """Monta e valida uma revisão do questionário a partir de uma linha."""
+    company_id = _required(row, "company_id")
+    responses = row.get("responses")
+    if responses is None:
+        responses = {k: v for k, v in row.items() if k not in QUESTIONNAIRE_META_FIELDS}
+    elif not isinstance(responses, dict):
+        raise ValueError("responses: deve ser um objeto")
+
+    responses, errors = QuestionnaireTemplate.validate_responses(responses, template)
+    if errors:
+        raise ValueError("; ".join(errors))
+    return {
+        "id": row.get("id") or str(uuid.uuid4()),
+        "company_id": company_id,
+        "responses": responses,
+        "created_at": row.get("created_at") or now
+    }
+
+
+def build_document(row, now):
+    """Monta o registro de um documento (apenas metadados e dados extraídos) a partir de uma linha."""
+    extracted_data = row.get("extracted_data") or {}
+    if isinstance(extracted_data, str):
+        try:
+            extracted_data = json.loads(extracted_data)
+        except ValueError:
+            raise ValueError("extracted_data: JSON inválido")
+    if not isinstance(extracted_data, dict):
+        raise ValueError("extracted_data: deve ser um objeto")
+    document = {
+        "id": row.get("id") or str(uuid.uuid4()),
+        "company_id": _required(row, "company_id"),
+        "original_filename": row.get("original_filename"),
+        "stored_filename": None,
+        "document_type": _required(row, "document_type"),
+        "file_path": None,
+        "extracted_data": extracted_data,
+        "status": "Importado",
+        "upload_date": row.get("upload_date") or now
+    }
+    # Índices calculados na importação; com valores não numéricos, o documento é gravado
+    # sem eles e o diagnóstico os calcula (e registra o erro) como nos documentos antigos
+    try:
+        document["financial_ratios"] = calculate_document_ratios(document["document_type"], extracted_data)
+    except (TypeError, ValueError):
+        pass
+    return document
+
+
+def import_file(repository, kind, path, batch_size=DEFAULT_BATCH_SIZE, user_id=None, progress=None):
+    """
+    Importa um arquivo para o repositório em lotes.
+
+    Args:
+        repository: Repositório de destino
+        kind: "companies", "questionnaires" ou "documents"
+        path: Arquivo CSV ou JSONL
+        batch_size: Registros por gravação
+        user_id: Dono das empresas importadas (quando a linha não informa)
+        progress: Função chamada com o total importado após cada lote
+
+    Returns:
+        Dicionário com linhas lidas, importadas, rejeitadas, erros e tempo decorrido
+    """
+    if kind not in IMPORT_KINDS:
+        raise ValueError(f"Tipo de importação desconhecido: {kind} (opções: {', '.join(IMPORT_KINDS)})")
+
+    now = datetime.utcnow().isoformat()
+    if kind == "companies":
+        build, write = (lambda row: build_company(row, user_id, now)), repository.add_companies
+    elif kind == "questionnaires":
+        # O template é montado uma única vez para todo o arquivo
+        template = QuestionnaireTemplate.get_template()
+        build, write = (lambda row: build_questionnaire(row, template, now)), repository.add_questionnaires
+    else:
+        build, write = (lambda row: build_document(row, now)), repository.add_documents
+
+    stats = {"read": 0, "imported": 0, "rejected": 0, "errors": []}
+    start = time.perf_counter()
+    batch = []
+
+    def flush():
+        write(batch)
+        stats["imported"] += len(batch)
+        batch.clear()
+        if progress:
+            progress(stats["imported"])
+
+    for line_no, row, error in iter_rows(path):
+        stats["read"] += 1
+        if error is None:
+            try:
+                batch.append(build(row))
+            except ValueError as e:
+                error = str(e)
+        if error is not None:
+            stats["rejected"] += 1
+            if len(stats["errors"]) < MAX_REPORTED_ERRORS:
+                stats["errors"].append((line_no, error))
+            continue
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa empresas, questionários e documentos em lote")
+    parser.add_argument("kind", choices=IMPORT_KINDS)
+    parser.add_argument("path", help="Arquivo CSV ou JSONL")
+    parser.add_argument("--user-id", help="Dono das empresas importadas, se o arquivo não tiver a coluna user_id")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Registros por gravação")
+    parser.add_argument("--data-folder", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    repository = create_repository(storage_config_from_env(args.data_folder), args.data_folder)
+
+    def progress(imported):
+        print(f"{imported} registros importados...", file=sys.stderr, flush=True)
+
+    stats = import_file(repository, args.kind, args.path, args.batch_size, args.user_id, progress)
+
+    for line_no, error in stats["errors"]:
+        print(f"linha {line_no}: {error}", file=sys.stderr)
+    if stats["rejected"] > len(stats["errors"]):
+        print(f"... e mais {stats['rejected'] - len(stats['errors'])} linhas rejeitadas", file=sys.stderr)
+
+    rate = stats["imported"] / stats["seconds"] if stats["seconds"] > 0 else float("inf")
+    print(f"{stats['read']} linhas lidas, {stats['imported']} importadas, {stats['rejected']} rejeitadas "
+          f"em {stats['seconds']:.2f}s ({rate:,.0f} registros/s)")
+    return 1 if stats["rejected"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+Memoização dos cálculos de diagnóstico e valuation por hash do conteúdo das entradas.
+A chave é o SHA-256 do JSON canônico de (respostas do questionário, dados extraídos
+e índices gravados dos documentos, versão do motor de cálculo e versão das tabelas de pontuação ou de
+valuation), então entradas idênticas nunca são
+recalculadas, seja na mesma requisição, em outra empresa ou em outro worker.
+Os resultados ficam em um cache LRU limitado em bytes e, opcionalmente, em disco,
+compartilhados entre processos.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import tempfile
+
+import storage_codecs
+from storage import ReadCache
+from document_processor import ENGINE_VERSION, ValuationCalculator
+from valuation_monte_carlo import monte_carlo_valuation, SIMULATION_VERSION
+
+logger = logging.getLogger(__name__)
+
+# Orçamento padrão do cache em memória (bytes dos resultados serializados)
+DEFAULT_MEMO_BYTES = 16 * 1024 * 1024
+
+# Metadados gravados nos resultados que não influenciam os cálculos (ex.: a versão
+# das entradas do diagnóstico armazenado); ficam fora da chave
+VOLATILE_KEYS = ("inputs_version",)
+
+
+def content_key(namespace, inputs):
+    """Calcula a chave de memoização de um cálculo a partir do conteúdo das entradas."""
+    canonical = json.dumps(
+        [namespace, ENGINE_VERSION, inputs],
+        sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def document_inputs(documents_data):
+    """
+    Extrai dos documentos apenas o que o diagnóstico usa, na ordem de integração: tipo,
+    dados extraídos e os índices gravados com o documento (que têm precedência).
+    """
+    return [
+        (doc.get("document_type"), doc.get("extracted_data"), doc.get("financial_ratios"))
+        for doc in documents_data or []
+    ]
+
+
+class Memoizer:
+    """Cache de resultados por hash do conteúdo, em memória (LRU) e opcionalmente em disco."""
+
+    def __init__(self, max_bytes=DEFAULT_MEMO_BYTES, folder=None):
+        self.cache = ReadCache(max_bytes) if max_bytes > 0 else None
+        self.folder = folder or None
+        self.disk_hits = 0
+        self.computed = 0
+
+    def get_or_compute(self, namespace, inputs, compute):
+        """
+        Retorna o resultado memoizado para as entradas ou o calcula com compute().
+        Cada chamada recebe uma cópia própria do resultado, que pode ser modificada.
+        """
+        key = content_key(namespace, inputs)
+        raw = self._get(key)
+        if raw is None:
+            raw = storage_codecs.encode(compute())
+            self.computed += 1
+            self._put(key, raw, persist=True)
+        return storage_codecs.decode(raw)
+
+    def stats(self):
+        """Retorna os contadores do cache."""
+        stats = self.cache.stats() if self.cache is not None else {"hits": 0, "misses": 0, "entries": 0, "bytes": 0, "max_bytes": 0}
+        stats.update({"disk_hits": self.disk_hits, "computed": self.computed})
+        return stats
+
+    def _get(self, key):
+        """Busca o resultado serializado na memória e, em seguida, no disco."""
+        if self.cache is not None:
+            found, raw = self.cache.get(key, None)
+            if found:
+                return raw
+        if self.folder is None:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                raw = f.read()
+            storage_codecs.decode(raw)
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            logger.warning(f"Resultado memoizado inválido em {self._path(key)}: {e}")
+            return None
+        self.disk_hits += 1
+        self._put(key, raw, persist=False)
+        return raw
+
+    def _put(self, key, raw, persist):
+        """Armazena o resultado serializado na memória e, se configurado, no disco."""
+        if self.cache is not None:
+            self.cache.put(key, None, raw, len(raw))
+        if persist and self.folder is not None:
+            try:
+                self._write(self._path(key), raw)
+            except OSError as e:
+                logger.warning(f"Não foi possível persistir o resultado memoizado {key}: {e}")
+
+    def _path(self, key):
+        """Caminho do resultado em disco, particionado pelos dois primeiros caracteres da chave."""
+        return os.path.join(self.folder, key[:2], key + ".json")
+
+    def _write(self, filepath, raw):
+        """Grava o arquivo de forma atômica; workers concorrentes gravam o mesmo conteúdo."""
+        directory = os.path.dirname(filepath)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(raw)
+            os.replace(tmp_path, filepath)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+class MemoizedFinancialDiagnostic:
+    """
+    FinancialDiagnostic com resultados memoizados pelas respostas, dados dos documentos
+    e versão das tabelas de pontuação.
+    """
+
+    def __init__(self, engine, memoizer):
+        self.engine = engine
+        self.memoizer = memoizer
+
+    @property
+    def scoring_tables(self):
+        """Tabelas de pontuação do motor (None: as padrão)."""
+        return self.engine.scoring_tables
+
+    @property
+    def tables_version(self):
+        """Versão das tabelas de pontuação do motor."""
+        return self.engine.tables_version
+
+    def generate_diagnostic(self, documents_data, questionnaire_data):
+        """Gera (ou reaproveita) o diagnóstico financeiro."""
+        inputs = [questionnaire_data, document_inputs(documents_data), self.engine.tables_version]
+        return self.memoizer.get_or_compute(
+            "diagnostic", inputs, lambda: self.engine.generate_diagnostic(documents_data, questionnaire_data)
+        )
+
+    def update_diagnostic(self, diagnostic, documents_data, questionnaire_data, new_count):
+        """Atualiza (ou reaproveita) o diagnóstico com documentos novos; a chave é a mesma do diagnóstico completo."""
+        inputs = [questionnaire_data, document_inputs(documents_data), self.engine.tables_version]
+        return self.memoizer.get_or_compute(
+            "diagnostic", inputs,
+            lambda: self.engine.update_diagnostic(diagnostic, documents_data, questionnaire_data, new_count)
+        )
+
+
+class MemoizedValuationCalculator:
+    """
+    ValuationCalculator com resultados memoizados pelo diagnóstico, respostas e versão
+    das tabelas de valuation (uma nova versão invalida apenas os valuations).
+    """
+
+    def __init__(self, engine, memoizer):
+        self.engine = engine
+        self.memoizer = memoizer
+
+    def calculate_valuation(self, financial_data, questionnaire_data):
+        """Calcula (ou reaproveita) o valuation."""
+        financial_inputs = {k: v for k, v in (financial_data or {}).items() if k not in VOLATILE_KEYS}
+        # A chave e o cálculo usam a mesma versão, mesmo se o arquivo mudar entre eles
+        tables = self.engine.tables
+        return self.memoizer.get_or_compute(
+            "valuation", [questionnaire_data, financial_inputs, tables.version],
+            lambda: self.engine.calculate_valuation(financial_data, questionnaire_data, tables)
+        )
+
+    def monte_carlo_valuation(self, questionnaire_data):
+        """
+        Distribuição do valuation por Monte Carlo (sorteios e semente padrão), memoizada
+        pelas respostas, pela versão das tabelas e pela versão da simulação.
+        """
+        tables = self.engine.tables
+        return self.memoizer.get_or_compute(
+            "monte_carlo", [questionnaire_data, tables.version, SIMULATION_VERSION],
+            lambda: monte_carlo_valuation(questionnaire_data, calculator=ValuationCalculator(tables))
+        )
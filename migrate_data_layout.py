@@ -0,0 +1,91 @@
+"""
+Migra a pasta de dados JSON do layout plano para o layout particionado por hash.
+Percorre a pasta em streaming (os.scandir), movendo snapshot, journal e arquivos
+auxiliares de cada coleção com os.replace, sem carregar a listagem inteira em memória.
+Os arquivos de lock (na subpasta .locks ou, em pastas antigas, ao lado de cada
+coleção) não são migrados: os das coleções movidas são removidos e recriados sob
+demanda. Execute com a aplicação parada.
+
+Uso:
+    python migrate_data_layout.py [--data-folder data] [--dry-run]
+"""
+
+import os
+import time
+import logging
+import argparse
+
+from storage import JOURNAL_SUFFIX, COMPACTING_SUFFIX, LOCK_SUFFIX, LOCK_FOLDER, shard_key, sharded_path
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Sufixos que acompanham o snapshot de cada coleção (e são movidos com ele)
+AUXILIARY_SUFFIXES = (COMPACTING_SUFFIX, JOURNAL_SUFFIX)
+
+# Intervalo de arquivos entre mensagens de progresso
+PROGRESS_EVERY = 10000
+
+
+def base_filename(name):
+    """Retorna o nome do snapshot ao qual um arquivo pertence."""
+    for suffix in AUXILIARY_SUFFIXES:
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def migrate(data_folder, dry_run=False):
+    """Move os arquivos particionáveis da raiz para as subpastas de hash."""
+    moved = skipped = removed = 0
+    start = time.perf_counter()
+    with os.scandir(data_folder) as entries:
+        for entry in entries:
+            if not entry.is_file(follow_symlinks=False):
+                continue
+            if entry.name.endswith(LOCK_SUFFIX):
+                # Lock ao lado da coleção (versões antigas): não é mais usado
+                if not dry_run:
+                    os.remove(entry.path)
+                removed += 1
+                continue
+            filename = base_filename(entry.name)
+            if shard_key(filename) is None:
+                continue
+
+            target_dir = os.path.dirname(sharded_path(data_folder, filename))
+            target = os.path.join(target_dir, entry.name)
+            if os.path.exists(target):
+                logger.warning(f"{entry.name} já existe no layout particionado; mantido na raiz")
+                skipped += 1
+                continue
+
+            if not dry_run:
+                os.makedirs(target_dir, exist_ok=True)
+                os.replace(entry.path, target)
+                # O lock do caminho antigo não protege mais a coleção
+                lock_path = os.path.join(data_folder, LOCK_FOLDER, entry.name + LOCK_SUFFIX)
+                if os.path.exists(lock_path):
+                    os.remove(lock_path)
+            moved += 1
+            if moved % PROGRESS_EVERY == 0:
+                logger.info(f"{moved} arquivos migrados ({moved / (time.perf_counter() - start):.0f} arquivos/s)")
+
+    logger.info(
+        f"Migração concluída: {moved} arquivos {'a migrar' if dry_run else 'migrados'}, {skipped} ignorados, "
+        f"{removed} locks antigos {'a remover' if dry_run else 'removidos'}"
+    )
+    return moved, skipped
+
+
+def main():
+    default_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+    parser = argparse.ArgumentParser(description="Migra a pasta de dados para o layout particionado")
+    parser.add_argument("--data-folder", default=default_folder)
+    parser.add_argument("--dry-run", action="store_true", help="Apenas conta os arquivos a migrar")
+    args = parser.parse_args()
+    migrate(args.data_folder, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Benchmark setorial: percentil de cada indicador da empresa entre as empresas do
+mesmo setor_atuacao.
+
+Os scores vão de 0 a 10, então o sketch de quantis de cada setor e indicador é um
+histograma de 101 faixas de 0,1 ponto: exato na resolução dos scores, com consulta
+de percentil em tempo constante (independente do número de empresas) e, ao
+contrário de um t-digest, com remoção, o que permite substituir a contribuição
+anterior de uma empresa quando seu diagnóstico é recalculado.
+
+Os histogramas são atualizados a cada diagnóstico armazenado. O comando de
+reconstrução percorre os diagnósticos armazenados uma única vez:
+
+    python peer_benchmarks.py rebuild [--data-folder data]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+
+from document_processor import INDICATOR_METHODS
+from repositories import create_repository, storage_config_from_env
+
+logger = logging.getLogger(__name__)
+
+# Arquivo com os histogramas de todos os setores
+BENCHMARKS_FILENAME = "peer_benchmarks.json"
+
+# Faixas do histograma: scores de 0 a 10 com resolução de 0,1 ponto
+SCORE_BINS = 101
+
+# Mínimo de empresas no setor para informar percentis
+MIN_PEERS = 5
+
+
+def diagnostic_scores(diagnostic):
+    """
+    Extrai de um diagnóstico o setor e os scores comparados entre empresas.
+
+    Returns:
+        Tupla (setor, {indicador: score}), sem os indicadores sem score
+    """
+    sector = (diagnostic.get("dashboard") or {}).get("business_info", {}).get("setor_atuacao") or ""
+    indicators = diagnostic.get("indicators") or {}
+    scores = {name: (indicators.get(name) or {}).get("score") for name in INDICATOR_METHODS}
+    scores["overall_score"] = diagnostic.get("overall_score")
+    return sector, {name: score for name, score in scores.items() if score is not None}
+
+
+def score_bin(score):
+    """Faixa do histograma de um score."""
+    return min(SCORE_BINS - 1, max(0, int(round(score * 10))))
+
+
+def add_scores(benchmarks, sector, scores, delta=1):
+    """Soma (ou, com delta=-1, remove) os scores de uma empresa nos histogramas do setor."""
+    histograms = benchmarks.setdefault("sectors", {}).setdefault(sector, {})
+    for name, score in scores.items():
+        counts = histograms.setdefault(name, [0] * SCORE_BINS)
+        i = score_bin(score)
+        counts[i] = max(0, counts[i] + delta)
+    return benchmarks
+
+
+def percentile_rank(counts, score):
+    """Percentil (0-100) de um score em um histograma, com empates contando pela metade."""
+    total = sum(counts)
+    if not total:
+        return None
+    i = score_bin(score)
+    below = sum(counts[:i])
+    return round((below + counts[i] / 2) / total * 100, 1)
+
+
+class PeerBenchmarks:
+    """Mantém os histogramas por setor e calcula percentis de diagnósticos."""
+
+    def __init__(self, repository, min_peers=MIN_PEERS):
+        self.repository = repository
+        self.min_peers = min_peers
+
+    def record(self, previous, diagnostic):
+        """
+        Atualiza os histogramas com um diagnóstico armazenado, removendo a contribuição
+        do diagnóstico anterior da mesma empresa (se houver).
+        """
+        removed = diagnostic_scores(previous) if previous else None
+        added = diagnostic_scores(diagnostic)
+        if removed == added:
+            return
+
+        def apply(benchmarks):
+            benchmarks = benchmarks or {"sectors": {}}
+            if removed:
+                add_scores(benchmarks, removed[0], removed[1], delta=-1)
+            return add_scores(benchmarks, added[0], added[1])
+
+        self.repository.update_benchmarks(BENCHMARKS_FILENAME, apply)
+
+    def percentiles(self, diagnostic):
+        """
+        Percentil de cada indicador do diagnóstico entre as empresas do mesmo setor.
+
+        Returns:
+            Dicionário com "setor", "empresas" (quantidade no setor) e "percentis"
+            ({indicador: percentil}); None se o setor tiver menos de min_peers empresas
+        """
+        sector, scores = diagnostic_scores(diagnostic)
+        benchmarks = self.repository.get_benchmarks(BENCHMARKS_FILENAME) or {}
+        histograms = benchmarks.get("sectors", {}).get(sector)
+        if not histograms:
+            return None
+        peers = sum(histograms.get("overall_score", []))
+        if peers < self.min_peers:
+            return None
+        return {
+            "setor": sector,
+            "empresas": peers,
+            "percentis": {
+                name: percentile_rank(histograms[name], score)
+                for name, score in scores.items() if name in histograms
+            }
+        }
+
+    def rebuild(self, progress=None):
+        """
+        Reconstrói os histogramas a partir dos diagnósticos armazenados, em uma única
+        passagem em streaming.
+
+        Returns:
+            Quantidade de diagnósticos processados
+        """
+        benchmarks = {"sectors": {}}
+        count = 0
+        for _, diagnostic in self.repository.iter_diagnostics():
+            sector, scores = diagnostic_scores(diagnostic)
+            add_scores(benchmarks, sector, scores)
+            count += 1
+            if progress and count % 10000 == 0:
+                progress(count)
+        self.repository.save_benchmarks(BENCHMARKS_FILENAME, benchmarks)
+        logger.info(f"Benchmarks setoriais reconstruídos com {count} diagnósticos em {len(benchmarks['sectors'])} setores")
+        return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manutenção dos benchmarks setoriais")
+    parser.add_argument("command", choices=["rebuild"], help="rebuild: recalcula os histogramas a partir dos diagnósticos armazenados")
+    parser.add_argument("--data-folder", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    repository = create_repository(storage_config_from_env(args.data_folder), args.data_folder)
+
+    def progress(count):
+        print(f"{count} diagnósticos processados...", file=sys.stderr, flush=True)
+
+    start = time.perf_counter()
+    count = PeerBenchmarks(repository).rebuild(progress)
+    print(f"{count} diagnósticos processados em {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
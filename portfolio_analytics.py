@@ -0,0 +1,233 @@
+"""
+Indicadores agregados da carteira de empresas de um usuário: distribuição da
+pontuação geral, empresas por status de saúde, margem operacional mediana e
+faturamento total por setor.
+
+Cada diagnóstico armazenado é reduzido a uma linha compacta (score, status, margem,
+faturamento e setor), mantida em memória por usuário. O resumo é calculado em uma
+única passagem sobre as linhas e guardado até a próxima gravação: um diagnóstico
+recalculado invalida apenas a linha da sua empresa, e uma empresa nova apenas a
+lista de empresas do usuário, sem reler os demais diagnósticos. As gravações de
+qualquer processo (outros workers, import_data.py) chegam pelo registro de alterações
+do repositório, consultado a cada resumo; as leituras do repositório são feitas fora
+do mutex.
+"""
+
+import logging
+import threading
+from statistics import median
+
+logger = logging.getLogger(__name__)
+
+# Faixas do histograma da pontuação geral (0 a 10, de um em um ponto; 10 entra na última)
+SCORE_HISTOGRAM_BINS = 10
+
+# Status de saúde na ordem de exibição
+HEALTH_STATUSES = ("Saudável", "Estável", "Atenção")
+
+# Setor das empresas sem setor informado no questionário
+UNKNOWN_SECTOR = "Não informado"
+
+
+def portfolio_row(diagnostic):
+    """
+    Reduz um diagnóstico armazenado aos valores agregados na carteira.
+
+    Returns:
+        Tupla (pontuação geral, status de saúde, margem operacional, faturamento anual, setor)
+    """
+    dashboard = diagnostic.get("dashboard") or {}
+    kpis = dashboard.get("kpis") or {}
+    sector = (dashboard.get("business_info") or {}).get("setor_atuacao") or UNKNOWN_SECTOR
+    return (
+        diagnostic.get("overall_score") or 0,
+        dashboard.get("health_status"),
+        kpis.get("margem_operacional"),
+        kpis.get("faturamento_anual") or 0,
+        sector
+    )
+
+
+def summarize(rows, companies=None):
+    """
+    Agrega as linhas da carteira em uma única passagem.
+
+    Args:
+        rows: Iterável de linhas (ver portfolio_row)
+        companies: Total de empresas da carteira, incluindo as sem diagnóstico (padrão: as linhas)
+
+    Returns:
+        Dicionário com o resumo da carteira
+    """
+    histogram = [0] * SCORE_HISTOGRAM_BINS
+    statuses = dict.fromkeys(HEALTH_STATUSES, 0)
+    margins = []
+    sectors = {}
+    count = 0
+    score_total = 0.0
+    for score, status, margin, revenue, sector in rows:
+        count += 1
+        score_total += score
+        histogram[min(SCORE_HISTOGRAM_BINS - 1, max(0, int(score)))] += 1
+        statuses[status] = statuses.get(status, 0) + 1
+        totals = sectors.get(sector)
+        if totals is None:
+            totals = sectors[sector] = [0, 0.0, []]
+        totals[0] += 1
+        totals[1] += revenue
+        if margin is not None:
+            margins.append(margin)
+            totals[2].append(margin)
+
+    return {
+        "empresas": count if companies is None else companies,
+        "com_diagnostico": count,
+        "pontuacao_geral": {
+            "media": round(score_total / count, 1) if count else None,
+            "histograma": [
+                {"faixa": f"{i}-{i + 1}", "empresas": histogram[i]}
+                for i in range(SCORE_HISTOGRAM_BINS)
+            ]
+        },
+        "status_saude": statuses,
+        "margem_operacional_mediana": round(median(margins), 1) if margins else None,
+        "setores": {
+            sector: {
+                "empresas": totals[0],
+                "faturamento_total": totals[1],
+                "margem_operacional_mediana": round(median(totals[2]), 1) if totals[2] else None
+            }
+            for sector, totals in sorted(sectors.items(), key=lambda item: -item[1][1])
+        }
+    }
+
+
+class PortfolioAnalytics:
+    """Resumo da carteira de cada usuário, mantido em memória e invalidado nas gravações."""
+
+    def __init__(self, repository):
+        self.repository = repository
+        self._mutex = threading.Lock()
+        # Por usuário: {id da empresa: linha ou None}, resumo calculado e empresas a reler
+        self._rows = {}
+        self._summaries = {}
+        self._stale = {}
+        self._stale_users = set()
+        # Dono de cada empresa já carregada, para invalidar pelo id da empresa
+        self._owners = {}
+        # Versão do registro de alterações já aplicada e contador de invalidações
+        self._version = None
+        self._generation = 0
+
+    def summary(self, user_id):
+        """Retorna o resumo da carteira do usuário, recalculando apenas o que mudou."""
+        self._sync()
+        while True:
+            with self._mutex:
+                cached = self._summaries.get(user_id)
+                if cached is not None:
+                    return cached
+                rows = self._rows.get(user_id)
+                relist = rows is None or user_id in self._stale_users
+                self._stale_users.discard(user_id)
+                reload = self._stale.pop(user_id, set())
+                known = set(rows or ())
+                generation = self._generation
+
+            # Leituras do repositório fora do mutex
+            try:
+                company_ids = None
+                if relist:
+                    company_ids = [company["id"] for company in self.repository.list_companies(user_id)]
+                    reload.update(company_id for company_id in company_ids if company_id not in known)
+                diagnostics = {company_id: self.repository.get_diagnostic(company_id) for company_id in reload}
+            except Exception:
+                with self._mutex:
+                    if relist:
+                        self._stale_users.add(user_id)
+                    self._stale.setdefault(user_id, set()).update(reload)
+                raise
+
+            with self._mutex:
+                if self._rows.get(user_id) is not rows:
+                    # Carteira recarregada por outra chamada ou descartada nesse meio tempo
+                    self._stale.setdefault(user_id, set()).update(reload)
+                    continue
+                rows = self._merge(user_id, rows, company_ids, diagnostics)
+                values = [row for row in rows.values() if row is not None]
+
+            summary = summarize(values, len(rows))
+            with self._mutex:
+                # Uma invalidação durante a leitura: o resumo vale para esta chamada, mas não fica em cache
+                if self._generation == generation and self._rows.get(user_id) is rows:
+                    self._summaries[user_id] = summary
+            return summary
+
+    def invalidate_user(self, user_id):
+        """Marca a lista de empresas do usuário como alterada (ex.: empresa adicionada)."""
+        with self._mutex:
+            self._invalidate_user(user_id)
+
+    def invalidate_company(self, company_id):
+        """Marca o diagnóstico de uma empresa como alterado."""
+        with self._mutex:
+            self._invalidate_company(company_id)
+
+    def _invalidate_user(self, user_id):
+        self._generation += 1
+        self._stale_users.add(user_id)
+        self._summaries.pop(user_id, None)
+
+    def _invalidate_company(self, company_id):
+        self._generation += 1
+        user_id = self._owners.get(company_id)
+        if user_id is None:
+            # Empresa de uma carteira ainda não carregada: nada em cache a invalidar
+            return
+        self._stale.setdefault(user_id, set()).add(company_id)
+        self._summaries.pop(user_id, None)
+
+    def _sync(self):
+        """
+        Aplica as alterações gravadas por qualquer processo (aplicação, importação em lote)
+        desde a última consulta. Se o registro não cobre todo o intervalo, descarta o cache.
+        """
+        log = self.repository.portfolio_changes()
+        version = log.get("version", 0)
+        changes = log.get("changes") or []
+        with self._mutex:
+            if version == self._version:
+                return
+            if self._version is None or version < self._version or (changes and changes[0][0] > self._version + 1):
+                if self._version is not None:
+                    logger.info(f"Registro de alterações da carteira sem a versão {self._version}; recarregando as carteiras")
+                self._generation += 1
+                self._rows.clear()
+                self._summaries.clear()
+                self._stale.clear()
+                self._stale_users.clear()
+                self._owners.clear()
+            else:
+                for change_version, kind, record_id in changes:
+                    if change_version <= self._version:
+                        continue
+                    if kind == "user":
+                        self._invalidate_user(record_id)
+                    else:
+                        self._invalidate_company(record_id)
+            self._version = version
+
+    def _merge(self, user_id, rows, company_ids, diagnostics):
+        """Incorpora a lista de empresas e os diagnósticos relidos às linhas do usuário."""
+        if company_ids is not None:
+            previous = rows or {}
+            rows = {company_id: previous.get(company_id) for company_id in company_ids}
+            for company_id in company_ids:
+                self._owners[company_id] = user_id
+            self._rows[user_id] = rows
+        for company_id, diagnostic in diagnostics.items():
+            if company_id in rows:
+                rows[company_id] = portfolio_row(diagnostic) if diagnostic else None
+        if diagnostics:
+            logger.info(f"Carteira do usuário {user_id}: {len(diagnostics)} diagnósticos relidos de {len(rows)} empresas")
+        return rows
@@ -0,0 +1,201 @@
+"""
+Entrada tipada do questionário para os cálculos financeiros.
+As respostas (strings do formulário, números de importações) são convertidas uma
+única vez em um registro compacto, com as séries de receitas e custos em arrays de
+floats e os erros de conversão coletados, e esse registro é usado por todos os
+métodos do diagnóstico e do valuation.
+
+As séries vêm dos campos anuais receita_ano1..5 / custos_ano1..5 ou, quando
+informadas, das séries receitas_periodos / custos_periodos, de qualquer tamanho e
+periodicidade (anual, semestral, trimestral ou mensal). Os cálculos usam sempre as
+séries anuais: períodos menores são somados por ano, e um último ano incompleto é
+anualizado proporcionalmente.
+"""
+
+import json
+import math
+from array import array
+
+# Anos das séries de receitas e custos do questionário
+SERIES_YEARS = 5
+REVENUE_KEYS = tuple(f"receita_ano{year}" for year in range(1, SERIES_YEARS + 1))
+COST_KEYS = tuple(f"custos_ano{year}" for year in range(1, SERIES_YEARS + 1))
+
+# Séries de tamanho livre e sua periodicidade
+REVENUE_SERIES_KEY = "receitas_periodos"
+COST_SERIES_KEY = "custos_periodos"
+PERIODICITY_KEY = "periodicidade"
+
+# Períodos por ano de cada periodicidade
+PERIODS_PER_YEAR = {"anual": 1, "semestral": 2, "trimestral": 4, "mensal": 12}
+
+# Nome de um período conforme a quantidade de períodos por ano
+PERIOD_LABELS = {1: "Ano", 2: "Semestre", 4: "Trimestre", 12: "Mês"}
+
+# Tamanho máximo de uma série (ex.: 20 anos de dados mensais)
+MAX_SERIES_PERIODS = 240
+
+
+def parse_series(value):
+    """
+    Converte uma série informada como lista de números ou texto com os valores
+    separados por ponto e vírgula (ou uma lista JSON).
+
+    Raises:
+        ValueError: Se algum valor não for numérico ou a série for longa demais
+    """
+    if isinstance(value, str):
+        text = value.strip()
+        if text.startswith("["):
+            value = json.loads(text)
+        else:
+            value = [item for item in text.replace("\n", ";").split(";") if item.strip()]
+    if not isinstance(value, (list, tuple)):
+        raise ValueError("informe uma lista de valores")
+    if len(value) > MAX_SERIES_PERIODS:
+        raise ValueError(f"no máximo {MAX_SERIES_PERIODS} períodos")
+    try:
+        return array("d", [float(item) for item in value])
+    except (TypeError, ValueError):
+        raise ValueError("valores numéricos inválidos")
+
+
+def annualize(series, periods_per_year):
+    """Soma os períodos de cada ano; um último ano incompleto é anualizado proporcionalmente."""
+    if periods_per_year == 1:
+        return array("d", series)
+    years = array("d")
+    for start in range(0, len(series), periods_per_year):
+        block = series[start:start + periods_per_year]
+        years.append(sum(block) * periods_per_year / len(block))
+    return years
+
+
+class QuestionnaireInput:
+    """Respostas do questionário já convertidas para os tipos usados nos cálculos."""
+
+    __slots__ = (
+        "receitas", "custos", "anos", "receitas_periodos", "custos_periodos", "periods_per_year",
+        "num_funcionarios", "custos_fixos_pct", "tam_valor", "sam_valor", "som_valor",
+        "setor_atuacao", "modelo_negocios", "principais_produtos", "principais_riscos",
+        "errors"
+    )
+
+    @classmethod
+    def parse(cls, data):
+        """
+        Converte as respostas do questionário (ou retorna o próprio registro, se já convertido).
+        Valores vazios assumem o padrão; valores numéricos inválidos também, com o erro
+        registrado em errors.
+        """
+        if isinstance(data, cls):
+            return data
+        data = data or {}
+        get = data.get
+        record = cls()
+        record.errors = []
+        if not (get(REVENUE_SERIES_KEY) and record._parse_periods(get)):
+            record.receitas = record._series(get, REVENUE_KEYS)
+            record.custos = record._series(get, COST_KEYS)
+            record.anos = SERIES_YEARS
+            record.receitas_periodos = record.receitas
+            record.custos_periodos = record.custos
+            record.periods_per_year = 1
+        try:
+            record.num_funcionarios = float(get("num_funcionarios") or 0)
+            record.custos_fixos_pct = float(get("custos_fixos_pct") or 60)
+            record.tam_valor = float(get("tam_valor") or 0)
+            record.sam_valor = float(get("sam_valor") or 0)
+            record.som_valor = float(get("som_valor") or 0)
+        except (TypeError, ValueError):
+            record.num_funcionarios = record._number(get, "num_funcionarios")
+            record.custos_fixos_pct = record._number(get, "custos_fixos_pct", 60)
+            record.tam_valor = record._number(get, "tam_valor")
+            record.sam_valor = record._number(get, "sam_valor")
+            record.som_valor = record._number(get, "som_valor")
+        record.setor_atuacao = get("setor_atuacao", "")
+        record.modelo_negocios = get("modelo_negocios", "")
+        record.principais_produtos = get("principais_produtos", "")
+        record.principais_riscos = get("principais_riscos", "Concorrência")
+        return record
+
+    def _parse_periods(self, get):
+        """
+        Converte as séries por período e as anualiza. Retorna False (usando os campos
+        anuais) se alguma série for inválida.
+        """
+        periodicity = get(PERIODICITY_KEY) or "anual"
+        periods_per_year = PERIODS_PER_YEAR.get(periodicity)
+        if periods_per_year is None:
+            self.errors.append(f"{PERIODICITY_KEY}: periodicidade inválida ({periodicity!r})")
+            return False
+        try:
+            receitas = parse_series(get(REVENUE_SERIES_KEY))
+        except ValueError as e:
+            self.errors.append(f"{REVENUE_SERIES_KEY}: {e}")
+            return False
+        try:
+            custos = parse_series(get(COST_SERIES_KEY) or [])
+        except ValueError as e:
+            self.errors.append(f"{COST_SERIES_KEY}: {e}")
+            return False
+        if not receitas:
+            return False
+
+        # Custos não informados nos últimos períodos contam como zero
+        custos = custos[:len(receitas)]
+        custos.extend([0.0] * (len(receitas) - len(custos)))
+
+        self.receitas_periodos = receitas
+        self.custos_periodos = custos
+        self.periods_per_year = periods_per_year
+        self.receitas = annualize(receitas, periods_per_year)
+        self.custos = annualize(custos, periods_per_year)
+        self.anos = len(self.receitas)
+
+        # Anos além do horizonte valem zero, como os campos anuais não preenchidos
+        padding = [0.0] * (SERIES_YEARS - self.anos)
+        self.receitas.extend(padding)
+        self.custos.extend(padding)
+        return True
+
+    def _series(self, get, keys):
+        """Converte uma série anual; só refaz campo a campo se algum valor for inválido."""
+        try:
+            return array("d", [float(get(key) or 0) for key in keys])
+        except (TypeError, ValueError):
+            return array("d", [self._number(get, key) for key in keys])
+
+    def _number(self, get, key, default=0):
+        """Converte uma resposta numérica; vazio ou inválido resulta no padrão."""
+        value = get(key)
+        if not value:
+            return float(default)
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            self.errors.append(f"{key}: valor numérico inválido ({value!r})")
+            return float(default)
+
+    @property
+    def custos_variaveis_pct(self):
+        """Percentual de custos variáveis (complemento dos custos fixos)."""
+        return 100 - self.custos_fixos_pct
+
+    @property
+    def receita_final(self):
+        """Receita do último ano do horizonte."""
+        return self.receitas[self.anos - 1]
+
+    def cagr(self, receita_inicial):
+        """
+        CAGR (%) da receita entre o primeiro e o último ano do horizonte, a partir da
+        receita inicial informada (ajustada pelos documentos, quando houver).
+
+        Returns:
+            CAGR, ou None sem receitas positivas ou com horizonte de um ano
+        """
+        receita_final = self.receita_final
+        if self.anos > 1 and receita_inicial > 0 and receita_final > 0:
+            return (math.pow(receita_final / receita_inicial, 1 / (self.anos - 1)) - 1) * 100
+        return None
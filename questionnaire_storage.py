@@ -3,6 +3,8 @@ Armazenamento e template do questionário financeiro.
 Versão simplificada para MVP sem banco de dados.
 """
 
+from questionnaire_input import parse_series
+
 class QuestionnaireTemplate:
     """Classe para gerenciar o template do questionário financeiro."""
     
@@ -96,6 +98,38 @@ class QuestionnaireTemplate:
                         }
                     ]
                 },
+                {
+                    "title": "Séries Históricas e Projeções",
+                    "description": "Opcional: informe receitas e custos por período, em qualquer quantidade de períodos. Quando preenchidas, as séries substituem os valores anuais acima.",
+                    "questions": [
+                        {
+                            "id": "periodicidade",
+                            "type": "select",
+                            "label": "Periodicidade das séries",
+                            "options": [
+                                {"value": "anual", "label": "Anual"},
+                                {"value": "semestral", "label": "Semestral"},
+                                {"value": "trimestral", "label": "Trimestral"},
+                                {"value": "mensal", "label": "Mensal"}
+                            ],
+                            "required": False
+                        },
+                        {
+                            "id": "receitas_periodos",
+                            "type": "series",
+                            "label": "Receitas por período, do mais antigo ao mais recente (R$, separadas por ponto e vírgula)",
+                            "placeholder": "Ex: 80000; 85000; 91000",
+                            "required": False
+                        },
+                        {
+                            "id": "custos_periodos",
+                            "type": "series",
+                            "label": "Custos por período, do mais antigo ao mais recente (R$, separados por ponto e vírgula)",
+                            "placeholder": "Ex: 60000; 62000; 65000",
+                            "required": False
+                        }
+                    ]
+                },
                 {
                     "title": "Informações Operacionais",
                     "description": "Informe os dados operacionais da sua empresa.",
@@ -184,3 +218,53 @@ class QuestionnaireTemplate:
                 }
             ]
         }
+
+    @staticmethod
+    def validate_responses(responses, template=None):
+        """
+        Valida respostas contra o template.
+        
+        Args:
+            responses: Dicionário {id da pergunta: valor}
+            template: Template já carregado (evita reconstruí-lo em importações em lote)
+            
+        Returns:
+            Tupla (respostas normalizadas com todas as perguntas, lista de erros)
+        """
+        if template is None:
+            template = QuestionnaireTemplate.get_template()
+        
+        clean = {}
+        errors = []
+        for section in template["sections"]:
+            for question in section["questions"]:
+                question_id = question["id"]
+                value = responses.get(question_id)
+                if isinstance(value, str):
+                    value = value.strip()
+                if value is None or value == "":
+                    if question.get("required"):
+                        errors.append(f"{question_id}: resposta obrigatória")
+                    clean[question_id] = None
+                    continue
+                
+                if question["type"] == "number":
+                    try:
+                        float(value)
+                    except (TypeError, ValueError):
+                        errors.append(f"{question_id}: valor numérico inválido ({value!r})")
+                elif question["type"] == "select":
+                    options = [option["value"] for option in question["options"]]
+                    if value not in options:
+                        errors.append(f"{question_id}: opção inválida ({value!r})")
+                elif question["type"] == "series":
+                    try:
+                        parse_series(value)
+                    except ValueError as e:
+                        errors.append(f"{question_id}: {e}")
+                    if isinstance(value, (list, tuple)):
+                        value = "; ".join(str(item) for item in value)
+                # Mantém strings, como o formulário web grava as respostas
+                clean[question_id] = value if isinstance(value, str) else str(value)
+        
+        return clean, errors
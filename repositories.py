@@ -0,0 +1,353 @@
+"""
+Repositórios de dados da aplicação.
+Define uma interface única para empresas, documentos, questionários, diagnósticos
+e valuations, com implementações em arquivos JSON, SQLite e memória.
+"""
+
+import os
+import copy
+import logging
+import threading
+
+from storage import JsonStore, ReadCache, latest_record, DEFAULT_COMPACT_THRESHOLD, DEFAULT_CACHE_BYTES
+from sqlite_storage import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+STORAGE_BACKENDS = ("json", "sqlite", "memory")
+
+# Registro compartilhado das alterações nas carteiras (empresas cadastradas e diagnósticos
+# gravados), consultado pelo resumo da carteira de cada processo. É uma coleção: cada
+# gravação acrescenta um registro ao journal, sem reescrever o arquivo
+PORTFOLIO_CHANGES_FILENAME = "portfolio_changes.json"
+
+# Alterações mantidas no registro após o corte, feito por cada processo a cada
+# PORTFOLIO_CHANGES_KEPT registros acrescentados; um processo mais atrasado recarrega
+# todas as carteiras
+PORTFOLIO_CHANGES_KEPT = 256
+
+
+class MemoryStore:
+    """Armazena dados em memória com a mesma interface do JsonStore (testes e benchmarks)."""
+
+    def __init__(self):
+        self._data = {}
+        self._mutex = threading.RLock()
+
+    def load(self, filename):
+        """Carrega uma coleção ou documento."""
+        with self._mutex:
+            return self._data.get(filename)
+
+    def save(self, data, filename):
+        """Substitui uma coleção ou documento."""
+        with self._mutex:
+            self._data[filename] = data
+        return filename
+
+    def append(self, record, filename):
+        """Acrescenta um registro a uma coleção."""
+        with self._mutex:
+            self._data.setdefault(filename, []).append(record)
+        return filename
+
+    def append_many(self, batches):
+        """Acrescenta lotes de registros, um dict {arquivo: [registros]}."""
+        with self._mutex:
+            for filename, records in batches.items():
+                self._data.setdefault(filename, []).extend(records)
+
+    def update(self, filename, func):
+        """Lê, transforma e grava de forma atômica."""
+        with self._mutex:
+            data = func(copy.deepcopy(self._data.get(filename)))
+            self._data[filename] = data
+            return data
+
+    def find(self, filename, record_id):
+        """Busca um registro de uma coleção pelo id."""
+        return next((r for r in self.load(filename) or [] if r.get("id") == record_id), None)
+
+    def latest(self, filename, key="created_at"):
+        """Retorna o registro mais recente de uma coleção."""
+        return latest_record(self.load(filename), key)
+
+    def iter_names(self, prefix):
+        """Percorre os nomes dos arquivos que começam com prefix."""
+        with self._mutex:
+            return iter(sorted(name for name in self._data if name.startswith(prefix)))
+
+    def iter_prefix(self, prefix):
+        """Percorre os arquivos cujo nome começa com prefix, retornando (nome, conteúdo)."""
+        for name in self.iter_names(prefix):
+            data = self.load(name)
+            if data is not None:
+                yield name, data
+
+
+class Repository:
+    """Interface de acesso aos dados da aplicação sobre um store de arquivos nomeados."""
+
+    def __init__(self, store):
+        self.store = store
+        self._portfolio_appends = 0
+
+    # Empresas
+    def list_companies(self, user_id):
+        """Lista as empresas de um usuário."""
+        return self.store.load(f"companies_{user_id}.json") or []
+
+    def add_companies(self, companies):
+        """Cadastra um lote de empresas."""
+        batches = _group_by(companies, "companies_{}.json", "user_id")
+        self.store.append_many(batches)
+        self._record_portfolio_changes("user", [records[0]["user_id"] for records in batches.values()])
+        return companies
+
+    def get_company(self, user_id, company_id):
+        """Busca uma empresa do usuário pelo id."""
+        return self.store.find(f"companies_{user_id}.json", company_id)
+
+    def add_company(self, company):
+        """Cadastra uma empresa (o registro deve conter user_id)."""
+        self.store.append(company, f"companies_{company['user_id']}.json")
+        self._record_portfolio_changes("user", [company["user_id"]])
+        return company
+
+    # Documentos
+    def list_documents(self, company_id):
+        """Lista os documentos de uma empresa."""
+        return self.store.load(f"documents_{company_id}.json") or []
+
+    def add_document(self, document):
+        """Registra um documento (o registro deve conter company_id)."""
+        self.store.append(document, f"documents_{document['company_id']}.json")
+        return document
+
+    def add_documents(self, documents):
+        """Registra um lote de documentos."""
+        self.store.append_many(_group_by(documents, "documents_{}.json", "company_id"))
+        return documents
+
+    # Questionários
+    def list_questionnaires(self, company_id):
+        """Lista as revisões do questionário de uma empresa."""
+        return self.store.load(f"questionnaires_{company_id}.json") or []
+
+    def latest_questionnaire(self, company_id):
+        """Retorna a revisão mais recente do questionário de uma empresa."""
+        head = self.store.load(f"questionnaire_latest_{company_id}.json")
+        if head is not None:
+            return head
+
+        # Empresas anteriores ao ponteiro: busca no histórico e grava o ponteiro
+        latest = self.store.latest(f"questionnaires_{company_id}.json")
+        if latest is not None:
+            self._advance_latest_questionnaire(latest)
+        return latest
+
+    def iter_latest_questionnaires(self):
+        """
+        Percorre em streaming a revisão mais recente do questionário de cada empresa,
+        retornando (id da empresa, questionário). Usa os ponteiros questionnaire_latest_*;
+        empresas anteriores ao ponteiro são encontradas pelo histórico questionnaires_*
+        e ganham o ponteiro nessa passagem.
+        """
+        prefix = "questionnaire_latest_"
+        seen = set()
+        for filename, questionnaire in self.store.iter_prefix(prefix):
+            company_id = filename[len(prefix):-len(".json")]
+            seen.add(company_id)
+            yield company_id, questionnaire
+
+        prefix = "questionnaires_"
+        backfilled = 0
+        for filename in self.store.iter_names(prefix):
+            company_id = filename[len(prefix):-len(".json")]
+            if company_id in seen:
+                continue
+            questionnaire = self.latest_questionnaire(company_id)
+            if questionnaire is not None:
+                backfilled += 1
+                yield company_id, questionnaire
+        if backfilled:
+            logger.info(f"{backfilled} empresas sem ponteiro do questionário mais recente; ponteiros gravados")
+
+    def add_questionnaire(self, questionnaire):
+        """Registra uma revisão do questionário (o registro deve conter company_id)."""
+        self.store.append(questionnaire, f"questionnaires_{questionnaire['company_id']}.json")
+        self._advance_latest_questionnaire(questionnaire)
+        return questionnaire
+
+    def add_questionnaires(self, questionnaires):
+        """Registra um lote de revisões do questionário, atualizando o ponteiro uma vez por empresa."""
+        batches = _group_by(questionnaires, "questionnaires_{}.json", "company_id")
+        self.store.append_many(batches)
+        for records in batches.values():
+            self._advance_latest_questionnaire(latest_record(records))
+        return questionnaires
+
+    def _advance_latest_questionnaire(self, questionnaire):
+        """Atualiza o ponteiro da revisão mais recente, sem retroceder para revisões antigas."""
+        def advance(head):
+            if head is None or (questionnaire.get("created_at") or "") >= (head.get("created_at") or ""):
+                return questionnaire
+            return head
+
+        self.store.update(f"questionnaire_latest_{questionnaire['company_id']}.json", advance)
+
+    # Diagnósticos
+    def get_diagnostic(self, company_id):
+        """Carrega o diagnóstico armazenado de uma empresa."""
+        return self.store.load(f"diagnostic_{company_id}.json")
+
+    def save_diagnostic(self, company_id, diagnostic):
+        """Armazena o diagnóstico de uma empresa."""
+        self.store.save(diagnostic, f"diagnostic_{company_id}.json")
+        self._record_portfolio_changes("company", [company_id])
+        return diagnostic
+
+    def replace_diagnostic(self, company_id, diagnostic, on_replace=None):
+        """
+        Armazena o diagnóstico de uma empresa chamando on_replace(anterior, novo) sob o lock
+        do arquivo: gravações concorrentes da mesma empresa recebem, cada uma, o diagnóstico
+        que de fato substituem.
+        """
+        def replace(previous):
+            if on_replace is not None:
+                on_replace(previous, diagnostic)
+            return diagnostic
+
+        self.store.update(f"diagnostic_{company_id}.json", replace)
+        self._record_portfolio_changes("company", [company_id])
+        return diagnostic
+
+    def iter_diagnostics(self):
+        """Percorre em streaming os diagnósticos armazenados, retornando (id da empresa, diagnóstico)."""
+        for filename, diagnostic in self.store.iter_prefix("diagnostic_"):
+            yield filename[len("diagnostic_"):-len(".json")], diagnostic
+
+    # Alterações das carteiras
+    def portfolio_changes(self):
+        """
+        Retorna o registro de alterações das carteiras: {"version": n, "changes": [[versão, tipo, id], ...]},
+        com tipo "user" (empresas do usuário) ou "company" (diagnóstico da empresa).
+        """
+        offset, records = _split_changes(self.store.load(PORTFOLIO_CHANGES_FILENAME))
+        changes = [[offset + i + 1, record["kind"], record["id"]] for i, record in enumerate(records)]
+        return {"version": offset + len(records), "changes": changes}
+
+    def trim_portfolio_changes(self):
+        """Descarta as alterações mais antigas, mantendo as PORTFOLIO_CHANGES_KEPT mais recentes."""
+        def trim(log):
+            offset, records = _split_changes(log)
+            dropped = max(0, len(records) - PORTFOLIO_CHANGES_KEPT)
+            return [{"offset": offset + dropped}] + records[dropped:]
+
+        self.store.update(PORTFOLIO_CHANGES_FILENAME, trim)
+
+    def _record_portfolio_changes(self, kind, ids):
+        """Registra as alterações depois da gravação dos dados, acrescentando-as ao journal."""
+        self.store.append_many({PORTFOLIO_CHANGES_FILENAME: [{"kind": kind, "id": record_id} for record_id in ids]})
+        self._portfolio_appends += len(ids)
+        if self._portfolio_appends >= PORTFOLIO_CHANGES_KEPT:
+            self._portfolio_appends = 0
+            self.trim_portfolio_changes()
+
+    # Benchmarks entre empresas
+    def get_benchmarks(self, filename):
+        """Carrega um arquivo de benchmarks (estatísticas agregadas de todas as empresas)."""
+        return self.store.load(filename)
+
+    def update_benchmarks(self, filename, func):
+        """Atualiza um arquivo de benchmarks de forma atômica entre workers."""
+        return self.store.update(filename, func)
+
+    def save_benchmarks(self, filename, data):
+        """Substitui um arquivo de benchmarks."""
+        self.store.save(data, filename)
+        return data
+
+    # Valuations
+    def get_valuation(self, company_id):
+        """Carrega o valuation armazenado de uma empresa."""
+        return self.store.load(f"valuation_{company_id}.json")
+
+    def save_valuation(self, company_id, valuation):
+        """Armazena o valuation de uma empresa."""
+        self.store.save(valuation, f"valuation_{company_id}.json")
+        return valuation
+
+
+class JsonRepository(Repository):
+    """Repositório em arquivos JSON com journal, locks e cache de leitura."""
+
+    def __init__(self, data_folder, fsync=False, compact_threshold=None, cache_bytes=0, layout="sharded", codec="json"):
+        kwargs = {"fsync": fsync, "layout": layout, "codec": codec}
+        if compact_threshold is not None:
+            kwargs["compact_threshold"] = compact_threshold
+        if cache_bytes > 0:
+            kwargs["cache"] = ReadCache(cache_bytes)
+        super().__init__(JsonStore(data_folder, **kwargs))
+
+
+class SQLiteRepository(Repository):
+    """Repositório em SQLite embarcado com consultas indexadas."""
+
+    def __init__(self, db_path, fsync=False):
+        super().__init__(SQLiteStore(db_path, fsync=fsync))
+
+
+class MemoryRepository(Repository):
+    """Repositório em memória, sem persistência."""
+
+    def __init__(self):
+        super().__init__(MemoryStore())
+
+
+def _group_by(records, filename_pattern, owner_field):
+    """Agrupa registros pelo arquivo da coleção, preservando a ordem."""
+    batches = {}
+    for record in records:
+        batches.setdefault(filename_pattern.format(record[owner_field]), []).append(record)
+    return batches
+
+
+def _split_changes(log):
+    """Separa o registro de alterações em (versão anterior ao primeiro registro, registros)."""
+    log = log or []
+    if log and "offset" in log[0]:
+        return log[0]["offset"], log[1:]
+    return 0, log
+
+
+def storage_config_from_env(data_folder, environ=os.environ):
+    """Lê a configuração de armazenamento das variáveis de ambiente."""
+    return {
+        "STORAGE_BACKEND": environ.get("STORAGE_BACKEND", "json"),
+        "SQLITE_PATH": environ.get("SQLITE_PATH", os.path.join(data_folder, "storage.sqlite3")),
+        "STORAGE_FSYNC": environ.get("STORAGE_FSYNC", "0") == "1",
+        "STORAGE_COMPACT_THRESHOLD": int(environ.get("STORAGE_COMPACT_THRESHOLD", DEFAULT_COMPACT_THRESHOLD)),
+        "STORAGE_CACHE_BYTES": int(environ.get("STORAGE_CACHE_BYTES", DEFAULT_CACHE_BYTES)),  # 0 desativa o cache
+        "STORAGE_LAYOUT": environ.get("STORAGE_LAYOUT", "sharded"),  # "flat" mantém todos os arquivos na raiz
+        "STORAGE_CODEC": environ.get("STORAGE_CODEC", "json")  # "json" compacto, "orjson" ou "msgpack"
+    }
+
+
+def create_repository(config, data_folder):
+    """Cria o repositório configurado em STORAGE_BACKEND."""
+    backend = config.get("STORAGE_BACKEND", "json")
+    if backend == "sqlite":
+        return SQLiteRepository(config["SQLITE_PATH"], fsync=config.get("STORAGE_FSYNC", False))
+    if backend == "memory":
+        return MemoryRepository()
+    if backend != "json":
+        raise ValueError(f"Backend de armazenamento desconhecido: {backend} (opções: {', '.join(STORAGE_BACKENDS)})")
+    return JsonRepository(
+        data_folder,
+        fsync=config.get("STORAGE_FSYNC", False),
+        compact_threshold=config.get("STORAGE_COMPACT_THRESHOLD"),
+        cache_bytes=config.get("STORAGE_CACHE_BYTES", 0),
+        layout=config.get("STORAGE_LAYOUT", "sharded"),
+        codec=config.get("STORAGE_CODEC", "json")
+    )
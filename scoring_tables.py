@@ -0,0 +1,194 @@
+"""
+Tabelas de faixas de pontuação dos indicadores do diagnóstico.
+As faixas ficam em um arquivo JSON (scoring_thresholds.json, ou o arquivo indicado
+em SCORING_THRESHOLDS_PATH) e são compiladas uma única vez em limites ordenados:
+o cálculo escalar usa bisect e o cálculo em lote usa numpy.searchsorted, com as
+mesmas regras. Cada setor pode substituir tabelas inteiras.
+A versão das tabelas é um hash do conteúdo das faixas: qualquer ajuste no arquivo
+muda a versão e invalida os diagnósticos armazenados e memoizados.
+"""
+
+import os
+import json
+import math
+import bisect
+import hashlib
+import logging
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scoring_thresholds.json")
+
+# Chave da faixa -> (maior é melhor, comparação estrita)
+BAND_KEYS = {
+    "min": (True, False),
+    "above": (True, True),
+    "max": (False, False),
+    "below": (False, True)
+}
+
+
+class ThresholdTable:
+    """Cascata de faixas compilada em limites inclusivos ordenados (busca O(log k))."""
+
+    __slots__ = ("name", "thresholds", "higher_is_better", "_edges", "_scores", "_otherwise", "_clamp", "_edges_array", "_scores_array")
+
+    def __init__(self, name, spec):
+        self.name = name
+        bands = spec.get("bands") or []
+        if not bands:
+            raise ValueError(f"Tabela {name}: informe ao menos uma faixa")
+
+        kinds = [self._band_kind(name, band) for band in bands]
+        directions = {BAND_KEYS[kind][0] for kind in kinds}
+        if len(directions) != 1:
+            raise ValueError(f"Tabela {name}: não misture faixas min/above com max/below")
+        self.higher_is_better = directions.pop()
+
+        # Faixas estritas viram limites inclusivos no float adjacente (x > t <=> x >= nextafter(t, inf))
+        self.thresholds = []
+        edges = []
+        for kind, band in zip(kinds, bands):
+            threshold = float(band[kind])
+            self.thresholds.append(threshold)
+            if BAND_KEYS[kind][1]:
+                threshold = math.nextafter(threshold, math.inf if self.higher_is_better else -math.inf)
+            edges.append(threshold)
+
+        # A cascata é avaliada em ordem: os limites precisam ser estritamente monotônicos
+        ordered = edges if not self.higher_is_better else edges[::-1]
+        if any(a >= b for a, b in zip(ordered, ordered[1:])):
+            raise ValueError(f"Tabela {name}: as faixas devem seguir do melhor para o pior score, com limites distintos")
+
+        scores = [band["score"] for band in bands]
+        if self.higher_is_better:
+            edges, scores = edges[::-1], scores[::-1]
+        self._edges = edges
+        self._scores = scores
+
+        otherwise = spec.get("otherwise", 0)
+        if isinstance(otherwise, dict):
+            self._clamp = tuple(otherwise["clamp"])
+            self._otherwise = None
+        else:
+            self._clamp = None
+            self._otherwise = otherwise
+
+        self._edges_array = np.array(edges, dtype=float) if np is not None else None
+        self._scores_array = np.array(scores, dtype=float) if np is not None else None
+
+    @staticmethod
+    def _band_kind(name, band):
+        kinds = [key for key in BAND_KEYS if key in band]
+        if len(kinds) != 1 or "score" not in band:
+            raise ValueError(f"Tabela {name}: cada faixa precisa de score e de um entre {', '.join(BAND_KEYS)}")
+        return kinds[0]
+
+    def score(self, value):
+        """Retorna o score de um valor."""
+        if self.higher_is_better:
+            # Maior limite <= valor
+            i = bisect.bisect_right(self._edges, value)
+            if i > 0:
+                return self._scores[i - 1]
+        else:
+            # Menor limite >= valor
+            i = bisect.bisect_left(self._edges, value)
+            if i < len(self._edges):
+                return self._scores[i]
+        if self._clamp is not None:
+            return max(self._clamp[0], min(self._clamp[1], value))
+        return self._otherwise
+
+    def score_array(self, values):
+        """Retorna os scores de um array de valores (NaN resulta em um score qualquer; mascare-o)."""
+        values = np.asarray(values, dtype=float)
+        if self._clamp is not None:
+            fallback = np.maximum(self._clamp[0], np.minimum(self._clamp[1], values))
+        else:
+            fallback = np.full(values.shape, self._otherwise, dtype=float)
+        if self.higher_is_better:
+            i = np.searchsorted(self._edges_array, values, side="right")
+            return np.where(i > 0, self._scores_array[np.maximum(i - 1, 0)], fallback)
+        i = np.searchsorted(self._edges_array, values, side="left")
+        return np.where(i < len(self._edges), self._scores_array[np.minimum(i, len(self._edges) - 1)], fallback)
+
+
+def tables_version(spec):
+    """Hash do conteúdo das faixas (a descrição do arquivo não altera a versão)."""
+    canonical = json.dumps(
+        {"default": spec["default"], "sectors": spec.get("sectors") or {}},
+        sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+class ScoringTables:
+    """Tabelas compiladas de todos os indicadores, com substituições por setor."""
+
+    def __init__(self, spec):
+        self.version = tables_version(spec)
+        self.default = {name: ThresholdTable(name, table) for name, table in spec["default"].items()}
+        self.sectors = {}
+        for sector, tables in (spec.get("sectors") or {}).items():
+            unknown = set(tables) - set(self.default)
+            if unknown:
+                raise ValueError(f"Setor {sector}: tabelas desconhecidas {', '.join(sorted(unknown))}")
+            self.sectors[sector] = {name: ThresholdTable(f"{sector}/{name}", table) for name, table in tables.items()}
+
+    def table(self, name, sector=None):
+        """Retorna a tabela de um indicador, considerando a substituição do setor."""
+        override = self.sectors.get(sector)
+        if override and name in override:
+            return override[name]
+        return self.default[name]
+
+    def score(self, name, value, sector=None):
+        """Pontua um valor na tabela do indicador."""
+        return self.table(name, sector).score(value)
+
+    def score_array(self, name, values, sectors=None):
+        """Pontua um array de valores; sectors é um array com o setor de cada valor."""
+        result = self.default[name].score_array(values)
+        if sectors is None:
+            return result
+        for sector, tables in self.sectors.items():
+            if name in tables:
+                mask = sectors == sector
+                if mask.any():
+                    result[mask] = tables[name].score_array(np.asarray(values)[mask])
+        return result
+
+    def thresholds(self, name):
+        """Todos os limites de um indicador, em todos os setores."""
+        limits = set(self.default[name].thresholds)
+        for tables in self.sectors.values():
+            if name in tables:
+                limits.update(tables[name].thresholds)
+        return sorted(limits)
+
+
+def load_scoring_tables(path=None):
+    """Carrega e compila as tabelas de um arquivo JSON."""
+    path = path or DEFAULT_THRESHOLDS_PATH
+    with open(path, encoding="utf-8") as f:
+        spec = json.load(f)
+    tables = ScoringTables(spec)
+    logger.info(f"Tabelas de pontuação {tables.version} carregadas de {path} ({len(tables.sectors)} setores com ajustes)")
+    return tables
+
+
+_default_tables = None
+
+
+def default_scoring_tables():
+    """Tabelas do arquivo padrão (ou de SCORING_THRESHOLDS_PATH), compiladas na primeira chamada."""
+    global _default_tables
+    if _default_tables is None:
+        _default_tables = load_scoring_tables(os.environ.get("SCORING_THRESHOLDS_PATH"))
+    return _default_tables
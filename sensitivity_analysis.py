@@ -0,0 +1,182 @@
+"""
+Análise de sensibilidade (what-if) do diagnóstico financeiro.
+A partir do questionário e dos documentos de uma empresa, calcula o diagnóstico para
+todos os pontos de uma grade de variações (crescimento da receita, custos, quadro de
+funcionários e participação dos custos fixos) em um único cálculo em lote
+(diagnostic_batch), retornando as superfícies de scores usadas pelos controles de
+simulação da página de diagnóstico.
+
+Cada ponto da grade tem o mesmo resultado de FinancialDiagnostic.generate_diagnostic
+com o questionário alterado por perturbed_input.
+"""
+
+import copy
+import math
+import logging
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from diagnostic_batch import diagnostic_columns, generate_diagnostic_batch, DOCUMENT_COLUMNS, INDICATORS
+from questionnaire_input import QuestionnaireInput
+
+logger = logging.getLogger(__name__)
+
+# Variações aceitas, na ordem dos eixos da grade:
+#   crescimento_receita: pontos percentuais somados ao crescimento anual da receita
+#   custos: variação percentual dos custos de todos os anos
+#   num_funcionarios: variação percentual do quadro de funcionários
+#   custos_fixos_pct: pontos percentuais somados à participação dos custos fixos
+PERTURBATIONS = ("crescimento_receita", "custos", "num_funcionarios", "custos_fixos_pct")
+
+# Grade usada quando a requisição não informa os eixos
+DEFAULT_GRID = {
+    "crescimento_receita": list(range(-20, 21, 5)),
+    "custos": list(range(-30, 31, 5)),
+    "num_funcionarios": list(range(-50, 51, 10)),
+    "custos_fixos_pct": [0]
+}
+
+# Limite de pontos da grade por requisição
+MAX_GRID_POINTS = 50000
+
+
+def perturbed_input(data, crescimento_receita=0, custos=0, num_funcionarios=0, custos_fixos_pct=0):
+    """
+    Aplica as variações ao questionário (definição escalar de um ponto da grade).
+
+    Returns:
+        Novo QuestionnaireInput; o original não é alterado
+    """
+    record = copy.copy(QuestionnaireInput.parse(data))
+    growth = 1 + crescimento_receita / 100
+    record.receitas = array("d", [value * math.pow(growth, year) for year, value in enumerate(record.receitas)])
+    cost_factor = 1 + custos / 100
+    record.custos = array("d", [value * cost_factor for value in record.custos])
+    record.num_funcionarios = record.num_funcionarios * (1 + num_funcionarios / 100)
+    record.custos_fixos_pct = min(100.0, max(0.0, record.custos_fixos_pct + custos_fixos_pct))
+    return record
+
+
+def perturbation_grid(grid=None):
+    """
+    Valida os eixos da grade; eixos omitidos valem [0] (sem variação).
+
+    Raises:
+        ValueError: Para grade que não é um dicionário, eixos desconhecidos, valores não
+            numéricos ou grade grande demais
+
+    Returns:
+        Dicionário {variação: lista de valores} na ordem de PERTURBATIONS
+    """
+    grid = DEFAULT_GRID if grid is None else grid
+    if not isinstance(grid, dict):
+        raise ValueError("Grade de variações: informe um objeto {variação: lista de valores}")
+    unknown = set(grid) - set(PERTURBATIONS)
+    if unknown:
+        raise ValueError(f"Variações desconhecidas: {', '.join(sorted(unknown))} (opções: {', '.join(PERTURBATIONS)})")
+
+    axes = {}
+    points = 1
+    for name in PERTURBATIONS:
+        values = grid.get(name, [0])
+        if not isinstance(values, (list, tuple)) or not values:
+            raise ValueError(f"{name}: informe uma lista de valores")
+        try:
+            values = [float(value) for value in values]
+        except (TypeError, ValueError):
+            raise ValueError(f"{name}: valores numéricos inválidos")
+        if not all(math.isfinite(value) for value in values):
+            raise ValueError(f"{name}: valores numéricos inválidos")
+        if name != "custos_fixos_pct" and min(values) <= -100:
+            raise ValueError(f"{name}: variações devem ser maiores que -100%")
+        axes[name] = values
+        points *= len(values)
+    if points > MAX_GRID_POINTS:
+        raise ValueError(f"A grade tem {points} pontos; o limite é {MAX_GRID_POINTS}")
+    return axes
+
+
+def _nested(values, shape):
+    """Array -> listas aninhadas no formato da grade, com NaN como None."""
+    values = np.asarray(values).reshape(shape)
+    if values.dtype.kind == "f":
+        values = np.where(np.isnan(values), None, values.astype(object))
+    return values.tolist()
+
+
+def sensitivity_surface(documents_data, questionnaire_data, grid=None, scoring_tables=None):
+    """
+    Calcula o diagnóstico em todos os pontos da grade de variações.
+
+    Args:
+        documents_data: Documentos da empresa
+        questionnaire_data: Respostas do questionário (ou QuestionnaireInput)
+        grid: {variação: lista de valores} (padrão: DEFAULT_GRID)
+        scoring_tables: Tabelas de pontuação (padrão: as mesmas do cálculo escalar)
+
+    Returns:
+        Dicionário com "eixos", "forma" (tamanho de cada eixo), "base" (diagnóstico sem
+        variações) e as superfícies "overall_score", "health_status" e "scores" (uma por
+        indicador), em listas aninhadas na ordem dos eixos
+    """
+    if np is None:
+        raise RuntimeError("A análise de sensibilidade requer o pacote numpy (pip install numpy)")
+    axes = perturbation_grid(grid)
+    shape = tuple(len(values) for values in axes.values())
+    data = QuestionnaireInput.parse(questionnaire_data)
+
+    # Os ajustes dos documentos dependem dos custos do ano 1: as colunas são montadas uma
+    # vez por variação de custos (mais a base) e as demais variações são aplicadas em lote
+    cost_values = axes["custos"] + [0.0]
+    columns = diagnostic_columns([(documents_data, perturbed_input(data, custos=value)) for value in cost_values])
+    width = columns["receitas"].shape[1]
+
+    # Índice de cada ponto em cada eixo; a última linha é a base (sem variações)
+    index = np.indices(shape).reshape(len(shape), -1)
+    growth_index, cost_index, staff_index, fixed_index = (np.append(i, -1) for i in index)
+    growth_values = np.array(axes["crescimento_receita"] + [0.0])
+    staff_values = np.array(axes["num_funcionarios"] + [0.0])
+    fixed_values = np.array(axes["custos_fixos_pct"] + [0.0])
+    # Fator de cada ano por variação de crescimento, com math.pow como em perturbed_input
+    growth_factors = np.array([
+        [math.pow(1 + value / 100, year) for year in range(width)] for value in growth_values
+    ])
+
+    batch = {
+        "receitas": columns["receitas"][cost_index] * growth_factors[growth_index],
+        "custos": columns["custos"][cost_index],
+        "anos": columns["anos"][cost_index],
+        "num_funcionarios": columns["num_funcionarios"][cost_index] * (1 + staff_values[staff_index] / 100),
+        "custos_fixos_pct": np.clip(columns["custos_fixos_pct"][cost_index] + fixed_values[fixed_index], 0, 100),
+        "has_document_data": columns["has_document_data"][cost_index],
+        "setor_atuacao": columns["setor_atuacao"][cost_index]
+    }
+    for name in DOCUMENT_COLUMNS:
+        batch[name] = columns[name][cost_index]
+
+    result = generate_diagnostic_batch(batch, scoring_tables)
+    logger.info(f"Análise de sensibilidade com {index.shape[1]} pontos")
+
+    def surface(values):
+        return _nested(values[:-1], shape)
+
+    def base(values):
+        value = values[-1].item()
+        return None if isinstance(value, float) and math.isnan(value) else value
+
+    return {
+        "eixos": axes,
+        "forma": list(shape),
+        "base": {
+            "overall_score": base(result["overall_score"]),
+            "health_status": base(result["health_status"]),
+            "scores": {name: base(result["scores"][name]) for name in INDICATORS}
+        },
+        "overall_score": surface(result["overall_score"]),
+        "health_status": surface(result["health_status"]),
+        "scores": {name: surface(result["scores"][name]) for name in INDICATORS}
+    }
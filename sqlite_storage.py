@@ -0,0 +1,238 @@
+"""
+Armazenamento em SQLite embarcado para a versão MVP.
+Implementa as mesmas operações do JsonStore (load/save/append/update) sobre os
+mesmos nomes de arquivo, mas com tabelas indexadas por usuário, empresa e data,
+modo WAL e uma conexão por thread.
+"""
+
+import os
+import re
+import json
+import sqlite3
+import logging
+import threading
+
+from storage import latest_record
+
+logger = logging.getLogger(__name__)
+
+# Coleções armazenadas em tabelas próprias: prefixo do arquivo -> (coluna do dono, campo de data)
+COLLECTIONS = {
+    "companies": ("user_id", "created_at"),
+    "documents": ("company_id", "upload_date"),
+    "questionnaires": ("company_id", "created_at")
+}
+
+COLLECTION_FILENAME = re.compile(r"^(companies|documents|questionnaires)_(.+)\.json$")
+
+BUSY_TIMEOUT_MS = 10000
+
+
+class SQLiteStore:
+    """Armazena coleções e documentos JSON em um banco SQLite com índices."""
+
+    def __init__(self, db_path, fsync=False):
+        self.db_path = db_path
+        self.fsync = fsync
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._create_schema()
+
+    def load(self, filename):
+        """Carrega uma coleção (lista em ordem de inserção) ou um documento JSON."""
+        return self._load(self._connection(), filename)
+
+    def save(self, data, filename):
+        """Substitui o conteúdo de uma coleção ou documento."""
+        with self._transaction() as conn:
+            self._save(conn, data, filename)
+        return filename
+
+    def append(self, record, filename):
+        """Acrescenta um registro a uma coleção (ou a um documento JSON com uma lista)."""
+        self.append_many({filename: [record]})
+        return filename
+
+    def append_many(self, batches):
+        """Acrescenta lotes de registros, um dict {arquivo: [registros]}, em uma única transação."""
+        with self._transaction() as conn:
+            for filename, records in batches.items():
+                table, owner = self._parse(filename)
+                if table is None:
+                    # Listas guardadas como documento (ex.: registro de alterações)
+                    data = self._load(conn, filename) or []
+                    if not isinstance(data, list):
+                        raise ValueError(f"{filename} não é uma coleção")
+                    self._save(conn, data + list(records), filename)
+                else:
+                    self._insert(conn, table, owner, records)
+
+    def update(self, filename, func):
+        """Lê, transforma e grava dentro de uma única transação."""
+        with self._transaction() as conn:
+            data = func(self._load(conn, filename))
+            self._save(conn, data, filename)
+        return data
+
+    def iter_names(self, prefix):
+        """Percorre os nomes das coleções e documentos JSON que começam com prefix."""
+        conn = self._connection()
+        names = [name for (name,) in conn.execute(
+            "SELECT name FROM blobs WHERE substr(name, 1, ?) = ?", (len(prefix), prefix)
+        )]
+        for table, (owner_column, _) in COLLECTIONS.items():
+            # Só as coleções cujos nomes podem começar com prefix
+            if not f"{table}_".startswith(prefix[:len(table) + 1]):
+                continue
+            for (owner,) in conn.execute(f"SELECT DISTINCT {owner_column} FROM {table}"):
+                name = f"{table}_{owner}.json"
+                if name.startswith(prefix):
+                    names.append(name)
+        return iter(sorted(names))
+
+    def iter_prefix(self, prefix):
+        """
+        Percorre em streaming os documentos JSON (não as coleções) cujo nome começa
+        com prefix, retornando tuplas (nome do arquivo, conteúdo).
+        """
+        cursor = self._connection().execute(
+            "SELECT name, data FROM blobs WHERE substr(name, 1, ?) = ? ORDER BY name",
+            (len(prefix), prefix)
+        )
+        for name, data in cursor:
+            yield name, json.loads(data)
+
+    def find(self, filename, record_id):
+        """Busca um registro de uma coleção pelo id (seek no índice)."""
+        table, owner = self._parse(filename)
+        if table is None:
+            return None
+        owner_column = COLLECTIONS[table][0]
+        row = self._connection().execute(
+            f"SELECT data FROM {table} WHERE {owner_column} = ? AND id = ? LIMIT 1",
+            (owner, record_id)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def latest(self, filename, key="created_at"):
+        """Retorna o registro mais recente de uma coleção (seek no índice de data)."""
+        table, owner = self._parse(filename)
+        if table is None:
+            return None
+        owner_column, date_field = COLLECTIONS[table]
+        if key != date_field:
+            return latest_record(self.load(filename), key)
+        row = self._connection().execute(
+            f"SELECT data FROM {table} WHERE {owner_column} = ? ORDER BY created_at DESC, seq DESC LIMIT 1",
+            (owner,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def close(self):
+        """Fecha a conexão da thread atual."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _create_schema(self):
+        """Cria tabelas e índices, se ainda não existirem."""
+        conn = self._connection()
+        with conn:
+            for table, (owner_column, _) in COLLECTIONS.items():
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} ("
+                    "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                    "id TEXT, "
+                    f"{owner_column} TEXT NOT NULL, "
+                    "created_at TEXT, "
+                    "data TEXT NOT NULL)"
+                )
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{owner_column}_created_at ON {table} ({owner_column}, created_at)")
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{owner_column}_id ON {table} ({owner_column}, id)")
+            conn.execute("CREATE TABLE IF NOT EXISTS blobs (name TEXT PRIMARY KEY, data TEXT NOT NULL)")
+
+    def _connection(self):
+        """Retorna a conexão da thread atual, abrindo uma nova após fork."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={'FULL' if self.fsync else 'NORMAL'}")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _transaction(self):
+        """Abre uma transação de escrita (BEGIN IMMEDIATE) na conexão da thread."""
+        return _Transaction(self._connection())
+
+    def _parse(self, filename):
+        """Traduz o nome do arquivo em (tabela, dono) ou (None, nome) para documentos."""
+        match = COLLECTION_FILENAME.match(filename)
+        if match:
+            return match.group(1), match.group(2)
+        return None, filename
+
+    def _load(self, conn, filename):
+        """Lê uma coleção ou documento usando a conexão informada."""
+        table, owner = self._parse(filename)
+        if table is None:
+            row = conn.execute("SELECT data FROM blobs WHERE name = ?", (owner,)).fetchone()
+            return json.loads(row[0]) if row else None
+        owner_column = COLLECTIONS[table][0]
+        rows = conn.execute(f"SELECT data FROM {table} WHERE {owner_column} = ? ORDER BY seq", (owner,)).fetchall()
+        return [json.loads(row[0]) for row in rows] if rows else None
+
+    def _save(self, conn, data, filename):
+        """Substitui uma coleção ou documento dentro da transação corrente."""
+        table, owner = self._parse(filename)
+        if table is None:
+            conn.execute(
+                "INSERT OR REPLACE INTO blobs (name, data) VALUES (?, ?)",
+                (owner, self._dumps(data))
+            )
+            return
+        owner_column = COLLECTIONS[table][0]
+        conn.execute(f"DELETE FROM {table} WHERE {owner_column} = ?", (owner,))
+        self._insert(conn, table, owner, data or [])
+
+    def _insert(self, conn, table, owner, records):
+        """Insere registros de uma coleção."""
+        owner_column, date_field = COLLECTIONS[table]
+        conn.executemany(
+            f"INSERT INTO {table} (id, {owner_column}, created_at, data) VALUES (?, ?, ?, ?)",
+            [(r.get("id"), owner, r.get(date_field), self._dumps(r)) for r in records]
+        )
+
+    def _dumps(self, data):
+        """Serializa dados em JSON compacto."""
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+class _Transaction:
+    """Gerenciador de contexto para BEGIN IMMEDIATE / COMMIT / ROLLBACK.
+
+    Dentro de uma transação já aberta na conexão (ex.: update chamado por outro update),
+    participa da transação externa, que faz o COMMIT ou o ROLLBACK.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.nested = False
+
+    def __enter__(self):
+        self.nested = self.conn.in_transaction
+        if not self.nested:
+            self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.nested:
+            return False
+        if exc_type is None:
+            self.conn.execute("COMMIT")
+        else:
+            self.conn.execute("ROLLBACK")
+        return False
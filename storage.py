@@ -0,0 +1,414 @@
+"""
+Armazenamento local em arquivos JSON para a versão MVP.
+Coleções (listas de registros) são mantidas como um snapshot JSON mais um
+journal append-only com um registro JSON por linha, compactado periodicamente.
+Cada arquivo é protegido por um lock consultivo (fcntl), mantido na subpasta
+.locks, e substituído de forma atômica, permitindo vários workers e threads sobre
+a mesma pasta de dados.
+Leituras repetidas são servidas por um cache LRU validado pelos metadados dos
+arquivos, que detecta gravações feitas por outros workers.
+No layout particionado, os arquivos de cada usuário ou empresa ficam em
+subpastas de dois níveis derivadas do hash do id (ex.: data/3f/a2/documents_<id>.json).
+Os snapshots são gravados com o codec configurado (ver storage_codecs).
+"""
+
+import os
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import storage_codecs
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock entre processos
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Sufixos dos arquivos auxiliares de cada coleção
+JOURNAL_SUFFIX = ".journal"
+COMPACTING_SUFFIX = ".compacting"
+LOCK_SUFFIX = ".lock"
+
+# Subpasta da pasta de dados com os arquivos de lock (um por coleção, no mesmo caminho relativo)
+LOCK_FOLDER = ".locks"
+
+# Layouts da pasta de dados: todos os arquivos na raiz ou particionados por hash do id
+STORAGE_LAYOUTS = ("flat", "sharded")
+
+# Prefixos dos arquivos particionados; o restante do nome é o id do usuário ou da empresa.
+# Arquivos com outros nomes permanecem na raiz da pasta de dados.
+SHARDED_PREFIXES = (
+    "questionnaire_latest_",
+    "questionnaires_",
+    "companies_",
+    "documents_",
+    "diagnostic_",
+    "valuation_"
+)
+
+# Tamanho do journal (bytes) a partir do qual a coleção é compactada
+DEFAULT_COMPACT_THRESHOLD = 256 * 1024
+
+# Orçamento padrão do cache de leitura (bytes em disco dos arquivos cacheados)
+DEFAULT_CACHE_BYTES = 32 * 1024 * 1024
+
+# Custo mínimo contabilizado por entrada do cache (arquivos vazios ou inexistentes)
+CACHE_ENTRY_OVERHEAD = 256
+
+
+def shard_key(filename):
+    """Retorna o id usado para particionar o arquivo, ou None se ele fica na raiz."""
+    if not filename.endswith(".json"):
+        return None
+    for prefix in SHARDED_PREFIXES:
+        if filename.startswith(prefix):
+            return filename[len(prefix):-len(".json")]
+    return None
+
+
+def sharded_path(data_folder, filename):
+    """Retorna o caminho do arquivo no layout particionado."""
+    key = shard_key(filename)
+    if key is None:
+        return os.path.join(data_folder, filename)
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return os.path.join(data_folder, digest[:2], digest[2:4], filename)
+
+
+def collection_exists(filepath):
+    """Indica se existe snapshot ou journal para o caminho informado."""
+    return any(os.path.exists(filepath + suffix) for suffix in ("", COMPACTING_SUFFIX, JOURNAL_SUFFIX))
+
+
+def latest_record(records, key="created_at"):
+    """Retorna o registro com o maior valor de key (o último inserido em caso de empate)."""
+    latest = None
+    for record in records or []:
+        if latest is None or (record.get(key) or "") >= (latest.get(key) or ""):
+            latest = record
+    return latest
+
+
+class ReadCache:
+    """Cache LRU de arquivos lidos, validado por (st_mtime_ns, st_size, st_ino).
+
+    O orçamento de memória é medido pelo tamanho em disco dos arquivos.
+    Os dados retornados são compartilhados entre requisições e não devem ser modificados.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._mutex = threading.Lock()
+
+    def get(self, key, signature):
+        """Retorna (True, valor) se a entrada existir com a mesma assinatura."""
+        with self._mutex:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, signature, value, cost):
+        """Armazena um valor, descartando as entradas menos usadas além do orçamento."""
+        cost = max(cost, CACHE_ENTRY_OVERHEAD)
+        if cost > self.max_bytes:
+            self.invalidate(key)
+            return
+        with self._mutex:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[2]
+            self._entries[key] = (signature, value, cost)
+            self.current_bytes += cost
+            while self.current_bytes > self.max_bytes:
+                _, (_, _, evicted_cost) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_cost
+
+    def invalidate(self, key):
+        """Remove uma entrada do cache."""
+        with self._mutex:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[2]
+
+    def clear(self):
+        """Esvazia o cache e zera os contadores."""
+        with self._mutex:
+            self._entries.clear()
+            self.current_bytes = 0
+            self.hits = self.misses = 0
+
+    def stats(self):
+        """Retorna os contadores do cache."""
+        with self._mutex:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes
+            }
+
+
+class JsonStore:
+    """Armazena dados em arquivos JSON com journal append-only para coleções."""
+
+    def __init__(self, data_folder, fsync=False, compact_threshold=DEFAULT_COMPACT_THRESHOLD, cache=None, layout="flat", codec="json"):
+        if layout not in STORAGE_LAYOUTS:
+            raise ValueError(f"Layout de armazenamento desconhecido: {layout}")
+        self.data_folder = data_folder
+        self.fsync = fsync
+        self.compact_threshold = compact_threshold
+        self.cache = cache
+        self.layout = layout
+        self.codec = storage_codecs.resolve_codec(codec)
+        os.makedirs(data_folder, exist_ok=True)
+
+    def path_for(self, filename):
+        """Retorna o caminho completo do arquivo de dados.
+
+        No layout particionado, arquivos ainda não migrados continuam sendo
+        lidos e gravados no caminho antigo, na raiz da pasta de dados.
+        """
+        flat_path = os.path.join(self.data_folder, filename)
+        if self.layout == "flat":
+            return flat_path
+        path = sharded_path(self.data_folder, filename)
+        if path != flat_path and not collection_exists(path) and collection_exists(flat_path):
+            return flat_path
+        return path
+
+    def load(self, filename):
+        """Carrega um arquivo, aplicando os registros pendentes do journal."""
+        filepath = self.path_for(filename)
+        if not collection_exists(filepath):
+            return None
+        with self._lock(filepath, exclusive=False):
+            if self.cache is None:
+                return self._load_unlocked(filepath)
+
+            # Sob o lock compartilhado nenhum writer altera os arquivos entre o stat e a leitura
+            signature = self._signature(filepath)
+            found, data = self.cache.get(filepath, signature)
+            if not found:
+                data = self._load_unlocked(filepath)
+                cost = sum(sig[1] for sig in signature if sig is not None)
+                self.cache.put(filepath, signature, data, cost)
+            return data
+
+    def save(self, data, filename):
+        """Grava o arquivo inteiro, substituindo snapshot e journal."""
+        filepath = self.path_for(filename)
+        with self._lock(filepath, exclusive=True):
+            self._write_snapshot(data, filepath)
+            self._remove(filepath + COMPACTING_SUFFIX)
+            self._remove(filepath + JOURNAL_SUFFIX)
+        return filepath
+
+    def append(self, record, filename):
+        """Acrescenta um registro à coleção sem reescrever o histórico."""
+        filepath = self.path_for(filename)
+        with self._lock(filepath, exclusive=True):
+            journal_size = self._append_unlocked(record, filepath)
+            if self.compact_threshold and journal_size >= self.compact_threshold:
+                self._compact_unlocked(filepath)
+        return filepath
+
+    def append_many(self, batches):
+        """Acrescenta lotes de registros, um dict {arquivo: [registros]}, com um lock por arquivo."""
+        for filename, records in batches.items():
+            filepath = self.path_for(filename)
+            with self._lock(filepath, exclusive=True):
+                journal_size = self._append_unlocked(records, filepath, many=True)
+                if self.compact_threshold and journal_size >= self.compact_threshold:
+                    self._compact_unlocked(filepath)
+
+    def update(self, filename, func):
+        """Lê, transforma e grava um arquivo como uma operação atômica entre workers."""
+        filepath = self.path_for(filename)
+        with self._lock(filepath, exclusive=True):
+            data = func(self._load_unlocked(filepath))
+            self._write_snapshot(data, filepath)
+            self._remove(filepath + COMPACTING_SUFFIX)
+            self._remove(filepath + JOURNAL_SUFFIX)
+        return data
+
+    def find(self, filename, record_id):
+        """Busca um registro de uma coleção pelo id."""
+        return next((r for r in self.load(filename) or [] if r.get("id") == record_id), None)
+
+    def latest(self, filename, key="created_at"):
+        """Retorna o registro mais recente de uma coleção."""
+        return latest_record(self.load(filename), key)
+
+    def iter_names(self, prefix):
+        """Percorre os nomes dos arquivos que começam com prefix, em qualquer layout, sem lê-los."""
+        seen = set()
+        for dirpath, dirnames, filenames in os.walk(self.data_folder):
+            dirnames[:] = sorted(name for name in dirnames if name != LOCK_FOLDER)
+            for name in sorted(filenames):
+                # Snapshots e journals de coleções ainda sem snapshot
+                if name.endswith(JOURNAL_SUFFIX):
+                    name = name[:-len(JOURNAL_SUFFIX)]
+                if not name.startswith(prefix) or not name.endswith(".json") or name in seen:
+                    continue
+                seen.add(name)
+                yield name
+
+    def iter_prefix(self, prefix):
+        """
+        Percorre em streaming os arquivos cujo nome começa com prefix, em qualquer
+        layout, retornando tuplas (nome do arquivo, conteúdo).
+        """
+        for name in self.iter_names(prefix):
+            data = self.load(name)
+            if data is not None:
+                yield name, data
+
+    def compact(self, filename):
+        """Incorpora o journal ao snapshot da coleção."""
+        return self.rewrite_path(self.path_for(filename))
+
+    def rewrite_path(self, filepath):
+        """Regrava um snapshot (e seu journal) com o codec atual, a partir do caminho completo."""
+        with self._lock(filepath, exclusive=True):
+            self._compact_unlocked(filepath)
+        return filepath
+
+    @contextmanager
+    def _lock(self, filepath, exclusive):
+        """Mantém um lock consultivo sobre o arquivo durante o bloco."""
+        if exclusive:
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        lock_path = os.path.join(self.data_folder, LOCK_FOLDER, os.path.relpath(filepath, self.data_folder) + LOCK_SUFFIX)
+        os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+        with open(lock_path, "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _signature(self, filepath):
+        """Identifica a versão atual do snapshot e dos journals da coleção."""
+        signature = []
+        for path in (filepath, filepath + COMPACTING_SUFFIX, filepath + JOURNAL_SUFFIX):
+            try:
+                st = os.stat(path)
+                signature.append((st.st_mtime_ns, st.st_size, st.st_ino))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _load_unlocked(self, filepath):
+        """Lê snapshot e journal; o chamador deve manter o lock."""
+        data = self._read_snapshot(filepath)
+
+        # Registros de uma compactação interrompida ainda não incorporados ao snapshot
+        pending = self._read_journal(filepath + COMPACTING_SUFFIX)
+        if pending:
+            known_ids = {r.get("id") for r in data or [] if isinstance(r, dict)}
+            pending = [r for r in pending if r.get("id") is None or r.get("id") not in known_ids]
+
+        pending.extend(self._read_journal(filepath + JOURNAL_SUFFIX))
+        if pending:
+            if data is None:
+                data = []
+            data.extend(pending)
+        return data
+
+    def _append_unlocked(self, record, filepath, many=False):
+        """Grava um registro (ou uma lista, se many) no journal e retorna o tamanho resultante."""
+        if many:
+            line = b"".join(storage_codecs.dumps_line(r) for r in record)
+        else:
+            line = storage_codecs.dumps_line(record)
+        with open(filepath + JOURNAL_SUFFIX, "a+b") as f:
+            # Isola uma linha incompleta deixada por uma falha anterior
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    line = b"\n" + line
+            f.write(line)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+            return f.tell()
+
+    def _compact_unlocked(self, filepath):
+        """Incorpora o journal ao snapshot; o chamador deve manter o lock."""
+        journal_path = filepath + JOURNAL_SUFFIX
+        compacting_path = filepath + COMPACTING_SUFFIX
+
+        # O journal é renomeado antes da incorporação: se o processo falhar no meio,
+        # a próxima leitura ainda encontra os registros em COMPACTING_SUFFIX
+        if os.path.exists(journal_path) and not os.path.exists(compacting_path):
+            os.replace(journal_path, compacting_path)
+
+        data = self._load_unlocked(filepath)
+        if data is None:
+            return
+
+        # Sempre regrava: também converte snapshots de outro codec para o atual
+        self._write_snapshot(data, filepath)
+        self._remove(compacting_path)
+        logger.info(f"Coleção {os.path.basename(filepath)} compactada com {len(data)} registros")
+
+    def _read_snapshot(self, filepath):
+        """Lê o snapshot, se existir, identificando o codec pelo cabeçalho."""
+        if not os.path.exists(filepath):
+            return None
+        with open(filepath, "rb") as f:
+            return storage_codecs.decode(f.read())
+
+    def _write_snapshot(self, data, filepath):
+        """Grava o snapshot em um arquivo temporário e o renomeia sobre o original."""
+        raw = storage_codecs.encode(data, self.codec)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(filepath), prefix=".tmp-", suffix=".json")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(raw)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, filepath)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+
+    def _read_journal(self, journal_path):
+        """Lê os registros de um journal, ignorando uma última linha incompleta."""
+        records = []
+        if not os.path.exists(journal_path):
+            return records
+        with open(journal_path, "rb") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    records.append(storage_codecs.loads_json(line))
+                except ValueError:
+                    logger.warning(f"Linha inválida ignorada no journal {journal_path}")
+        return records
+
+    def _remove(self, path):
+        """Remove um arquivo auxiliar, se existir."""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,82 @@
+"""
+Codecs de serialização dos snapshots do armazenamento JSON.
+O padrão é JSON compacto. orjson e msgpack são usados quando instalados; sem eles,
+o codec cai para a biblioteca padrão. Arquivos em formatos que não são JSON começam
+com um cabeçalho que identifica o codec, então a leitura não depende da configuração.
+"""
+
+import json
+import logging
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+# Cabeçalho de arquivos que não são JSON ("#" nunca inicia um documento JSON válido)
+HEADER_PREFIX = b"#codec="
+
+STORAGE_CODECS = ("json", "orjson", "msgpack")
+
+
+def available_codecs():
+    """Retorna os codecs utilizáveis no ambiente atual."""
+    codecs = ["json"]
+    if orjson is not None:
+        codecs.append("orjson")
+    if msgpack is not None:
+        codecs.append("msgpack")
+    return codecs
+
+
+def resolve_codec(name):
+    """Valida o codec configurado, caindo para JSON se a dependência não estiver instalada."""
+    if name not in STORAGE_CODECS:
+        raise ValueError(f"Codec de armazenamento desconhecido: {name} (opções: {', '.join(STORAGE_CODECS)})")
+    if name not in available_codecs():
+        logger.warning(f"Codec {name} indisponível (pacote não instalado); usando json")
+        return "json"
+    return name
+
+
+def encode(data, codec="json"):
+    """Serializa dados no codec informado."""
+    if codec == "msgpack":
+        return HEADER_PREFIX + b"msgpack\n" + msgpack.packb(data, use_bin_type=True)
+    if codec == "orjson":
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def decode(raw):
+    """Desserializa dados, identificando o codec pelo cabeçalho do arquivo."""
+    if raw.startswith(HEADER_PREFIX):
+        header, _, payload = raw.partition(b"\n")
+        codec = header[len(HEADER_PREFIX):].decode("ascii")
+        if codec != "msgpack":
+            raise ValueError(f"Codec desconhecido no cabeçalho: {codec}")
+        if msgpack is None:
+            raise RuntimeError("Arquivo gravado com msgpack, mas o pacote msgpack não está instalado")
+        return msgpack.unpackb(payload, raw=False)
+    return loads_json(raw)
+
+
+def dumps_line(record):
+    """Serializa um registro em uma linha JSON do journal."""
+    if orjson is not None:
+        return orjson.dumps(record) + b"\n"
+    return (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def loads_json(raw):
+    """Desserializa JSON com a implementação mais rápida disponível."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
@@ -0,0 +1,53 @@
+"""
+Testes da tabela de sensibilidade do DCF.
+"""
+
+import math
+
+import pytest
+
+from document_processor import ValuationCalculator
+from dcf_sensitivity import dcf_sensitivity_table, dcf_grid
+from questionnaire_input import QuestionnaireInput
+
+
+def _scalar_dcf(receitas, custos, taxa, crescimento):
+    """DCF de uma célula pelo mesmo laço de ValuationCalculator._calculate_dcf_valuation."""
+    fluxos = [r - c for r, c in zip(receitas, custos)]
+    valor_presente = sum(fluxo / math.pow(1 + taxa, i + 1) for i, fluxo in enumerate(fluxos))
+    valor_terminal = fluxos[-1] * (1 + crescimento) / (taxa - crescimento)
+    return valor_presente + valor_terminal / math.pow(1 + taxa, len(fluxos))
+
+
+def test_grid_matches_scalar_dcf():
+    """Cada célula é o DCF escalar da taxa e do crescimento; a célula base é o DCF do valuation."""
+    responses = {"receitas_periodos": "100;120;150;170;200;260;300", "custos_periodos": "90;100;110;120;150;170;190",
+                 "periodicidade": "trimestral", "setor_atuacao": "Saúde"}
+    data = QuestionnaireInput.parse(responses)
+    table = dcf_sensitivity_table(responses)
+    receitas, custos = data.receitas[:data.anos], data.custos[:data.anos]
+    for i, taxa in enumerate(table["taxas_desconto"]):
+        for j, crescimento in enumerate(table["crescimentos"]):
+            assert table["valores"][i][j] == pytest.approx(_scalar_dcf(receitas, custos, taxa, crescimento), rel=1e-12)
+
+    base_row = table["taxas_desconto"].index(table["base"]["taxa_desconto"])
+    base_column = table["crescimentos"].index(table["base"]["crescimento"])
+    expected = ValuationCalculator()._calculate_dcf_valuation(receitas, custos, "Saúde")
+    assert table["valores"][base_row][base_column] == pytest.approx(expected, rel=1e-12)
+
+
+def test_growth_not_below_rate_is_empty():
+    values = dcf_grid([100, 200], [50, 80], [0.05, 0.10], [0.03, 0.05, 0.12])
+    assert math.isnan(values[0][1]) and math.isnan(values[0][2]) and math.isnan(values[1][2])
+    assert not math.isnan(values[1][1])
+    table = dcf_sensitivity_table({"receita_ano1": "1000", "receita_ano5": "2000"}, [0.05], [0.03, 0.05])
+    assert table["valores"][0][1] is None and table["formatado"][0][1] is None
+
+
+def test_invalid_grid():
+    with pytest.raises(ValueError):
+        dcf_sensitivity_table({"receita_ano5": "2000"}, ["dez"])
+    with pytest.raises(ValueError):
+        dcf_sensitivity_table({"receita_ano5": "2000"}, [0.1] * 200, [0.01] * 100)
+    with pytest.raises(ValueError):
+        dcf_sensitivity_table({"receita_ano1": "2000"})
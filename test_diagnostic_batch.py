@@ -0,0 +1,154 @@
+"""
+Testes do diagnóstico vetorizado: resultados idênticos ao cálculo escalar.
+"""
+
+import math
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from document_processor import FinancialDiagnostic
+from diagnostic_batch import diagnostic_columns, generate_diagnostic_batch, INDICATORS
+
+KPI_FIELDS = ("faturamento_anual", "margem_operacional", "crescimento_projetado", "estrutura_custos", "produtividade_media")
+
+
+def random_record(rng):
+    """Gera respostas e documentos aleatórios, com valores redondos para exercitar os limiares."""
+    def amount():
+        return rng.choice([0, rng.randrange(0, 5000000, 50000), round(rng.uniform(1, 5000000), 2)])
+
+    responses = {}
+    for year in range(1, 6):
+        responses[f"receita_ano{year}"] = str(amount()) if rng.random() > 0.1 else ""
+        responses[f"custos_ano{year}"] = str(amount()) if rng.random() > 0.1 else None
+    # Receitas que geram CAGR exato (16 -> 100%, 1.4641 -> 10%)
+    if rng.random() < 0.1 and float(responses["receita_ano1"] or 0) > 0:
+        responses["receita_ano5"] = str(float(responses["receita_ano1"]) * rng.choice([16, 1.4641, 2.0736, 1]))
+    responses["num_funcionarios"] = str(rng.choice([0, 1, 4, 10, rng.randrange(1, 500)]))
+    responses["custos_fixos_pct"] = rng.choice(["", "0", "45", "70.5"])
+
+    documents = []
+    if rng.random() < 0.5:
+        documents.append({"document_type": "dre", "extracted_data": {
+            "receita_liquida": amount(), "lucro_liquido": rng.randrange(-200000, 800000, 10000),
+            "custo_produtos": amount(), "lucro_bruto": amount()
+        }})
+    if rng.random() < 0.4:
+        documents.append({"document_type": "balanco_patrimonial", "extracted_data": {
+            "ativo_circulante": rng.randrange(0, 2000000, 100000), "passivo_circulante": rng.randrange(0, 1500000, 100000),
+            "estoques": rng.randrange(0, 500000, 50000), "passivo_total": rng.randrange(0, 3000000, 100000),
+            "ativo_total": rng.randrange(0, 3000000, 100000)
+        }})
+    if rng.random() < 0.3:
+        documents.append({"document_type": "relatorio_contas", "extracted_data": {
+            "prazo_medio_recebimento": rng.choice([15, 30, 45, 60, 90]), "prazo_medio_pagamento": rng.choice([0, 15, 30, 45])
+        }})
+    return documents, responses
+
+
+def plausible_record(rng):
+    """Gera respostas de cinco anos com receitas e custos plausíveis e, para parte das empresas, uma DRE."""
+    receita = rng.randrange(100000, 10000000, 1000)
+    responses = {
+        "num_funcionarios": str(rng.randrange(1, 200)),
+        "setor_atuacao": rng.choice(["Tecnologia", "Varejo", "Serviços"]),
+        "custos_fixos_pct": str(rng.randrange(30, 80))
+    }
+    for year in range(1, 6):
+        responses[f"receita_ano{year}"] = str(round(receita * (1 + rng.uniform(0, 0.4)) ** (year - 1)))
+        responses[f"custos_ano{year}"] = str(round(receita * rng.uniform(0.5, 1.1) * (1 + rng.uniform(0, 0.3)) ** (year - 1)))
+    documents = []
+    if rng.random() < 0.3:
+        documents.append({"document_type": "dre", "extracted_data": {
+            "receita_liquida": receita, "lucro_liquido": round(receita * rng.uniform(-0.1, 0.3))
+        }})
+    return documents, responses
+
+
+def assert_same(expected, actual):
+    if expected is None:
+        assert math.isnan(actual)
+    else:
+        assert actual == expected
+
+
+def test_batch_matches_scalar():
+    """Scores, pontuação geral, status e KPIs coincidem com generate_diagnostic."""
+    rng = random.Random(1234)
+    records = [random_record(rng) for _ in range(3000)]
+    engine = FinancialDiagnostic()
+    batch = generate_diagnostic_batch(diagnostic_columns(records))
+
+    for i, (documents, responses) in enumerate(records):
+        expected = engine.generate_diagnostic(documents, responses)
+        for indicator in INDICATORS:
+            assert_same(expected["indicators"][indicator]["score"], batch["scores"][indicator][i])
+        assert batch["overall_score"][i] == expected["overall_score"]
+        assert batch["health_status"][i] == expected["dashboard"]["health_status"]
+        assert batch["health_color"][i] == expected["dashboard"]["health_color"]
+        for field in KPI_FIELDS:
+            assert batch["kpis"][field][i] == expected["dashboard"]["kpis"][field], (i, field)
+
+
+def test_batch_matches_scalar_for_period_series():
+    """Séries de tamanho e periodicidade variados têm o mesmo resultado no lote e no escalar."""
+    rng = random.Random(17)
+    records = []
+    for _ in range(1000):
+        documents, responses = random_record(rng)
+        if rng.random() < 0.7:
+            periods = rng.choice([1, 2, 4, 12])
+            size = rng.randrange(1, 12 * periods + 1)
+            responses["periodicidade"] = {1: "anual", 2: "semestral", 4: "trimestral", 12: "mensal"}[periods]
+            responses["receitas_periodos"] = [rng.choice([0, rng.randrange(0, 500000, 5000)]) for _ in range(size)]
+            responses["custos_periodos"] = [rng.randrange(0, 400000, 5000) for _ in range(rng.randrange(0, size + 1))]
+        records.append((documents, responses))
+    engine = FinancialDiagnostic()
+    batch = generate_diagnostic_batch(diagnostic_columns(records))
+
+    for i, (documents, responses) in enumerate(records):
+        expected = engine.generate_diagnostic(documents, responses)
+        assert batch["overall_score"][i] == expected["overall_score"]
+        assert_same(expected["indicators"]["crescimento"]["score"], batch["scores"]["crescimento"][i])
+        assert batch["kpis"]["crescimento_projetado"][i] == expected["dashboard"]["kpis"]["crescimento_projetado"]
+
+
+def test_batch_accepts_raw_columns():
+    """Colunas montadas diretamente, sem colunas de documentos, usam apenas o questionário."""
+    batch = generate_diagnostic_batch({
+        "receitas": np.array([[1000000, 1200000, 1500000, 1800000, 2200000], [0, 0, 0, 0, 0]]),
+        "custos": np.array([[700000, 800000, 1000000, 1200000, 1400000], [0, 0, 0, 0, 0]]),
+        "num_funcionarios": np.array([10, 0])
+    })
+    expected = FinancialDiagnostic().generate_diagnostic([], {
+        "receita_ano1": 1000000, "receita_ano2": 1200000, "receita_ano3": 1500000, "receita_ano4": 1800000,
+        "receita_ano5": 2200000, "custos_ano1": 700000, "custos_ano2": 800000, "custos_ano3": 1000000,
+        "custos_ano4": 1200000, "custos_ano5": 1400000, "num_funcionarios": 10
+    })
+    assert batch["overall_score"][0] == expected["overall_score"]
+    assert batch["overall_score"][1] == 2.5
+    assert math.isnan(batch["scores"]["crescimento"][1])
+
+
+def test_bulk_columns_match_per_record_parsing():
+    """A conversão em bloco das respostas anuais gera as mesmas colunas do QuestionnaireInput."""
+    from diagnostic_batch import _plain_columns
+    from questionnaire_input import QuestionnaireInput
+
+    responses = [
+        {"receita_ano1": "1000", "custos_ano1": "", "num_funcionarios": "3", "setor_atuacao": "Varejo"},
+        {"receita_ano3": 2.5e6, "custos_fixos_pct": "", "setor_atuacao": None},
+        None
+    ]
+    bulk = _plain_columns(responses)
+    for i, data in enumerate(QuestionnaireInput.parse(r) for r in responses):
+        assert list(bulk["receitas"][i]) == list(data.receitas)
+        assert list(bulk["custos"][i]) == list(data.custos)
+        assert bulk["num_funcionarios"][i] == data.num_funcionarios
+        assert bulk["custos_fixos_pct"][i] == data.custos_fixos_pct
+        assert bulk["setor_atuacao"][i] == data.setor_atuacao
+    # Valores inválidos ficam para a conversão registro a registro, que registra os erros
+    assert _plain_columns([{"receita_ano1": "abc"}]) is None
@@ -5,7 +5,7 @@ Este script testa a integração entre dados de documentos e questionário sem d
 
 import json
 import logging
-from document_processor import DocumentProcessor, FinancialDiagnostic, ValuationCalculator
+from document_processor import DocumentProcessor, FinancialDiagnostic, ValuationCalculator, calculate_document_ratios
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -201,11 +201,31 @@ def test_document_processing():
     assert "ativo_total" in extracted_data, "Dados de ativo total não encontrados"
     assert "passivo_total" in extracted_data, "Dados de passivo total não encontrados"
     
+    # Verifica os índices calculados no processamento
+    assert result["financial_ratios"]["liquidez_corrente"] == 1.6, "Liquidez corrente não calculada no envio"
+    assert result["financial_ratios"]["endividamento_geral"] == 0.6, "Endividamento geral não calculado no envio"
+    
     logger.info(f"Dados extraídos: {extracted_data}")
     logger.info("Teste 4 concluído com sucesso!")
     
     return result
 
+def test_precomputed_document_ratios():
+    """Testa o uso dos índices gravados com o documento e o cálculo para documentos antigos."""
+    questionnaire_data = {"receita_ano1": "1000000", "custos_ano1": "800000", "num_funcionarios": "10"}
+    extracted = {"ativo_circulante": 800000, "passivo_circulante": 500000, "passivo_total": 900000, "ativo_total": 1500000}
+    legacy = {"document_type": "balanco_patrimonial", "extracted_data": extracted}
+    stored = dict(legacy, financial_ratios=calculate_document_ratios("balanco_patrimonial", extracted))
+    
+    diagnostic = FinancialDiagnostic()
+    assert diagnostic.generate_diagnostic([stored], questionnaire_data) == diagnostic.generate_diagnostic([legacy], questionnaire_data)
+    
+    # Os índices gravados são usados sem recalcular a partir dos dados extraídos
+    stored["financial_ratios"] = {"liquidez_corrente": 0.5}
+    result = diagnostic.generate_diagnostic([stored], questionnaire_data)
+    assert result["indicators"]["liquidez"]["indice_liquidez"] == 0.5
+    assert "endividamento_geral" not in result["integrated_data"]["financial_ratios"]
+
 def run_all_tests():
     """Executa todos os testes e compara os resultados."""
     logger.info("Iniciando testes do MVP sem banco de dados...")
@@ -0,0 +1,163 @@
+"""
+Testes do diagnóstico pré-calculado.
+"""
+
+import json
+import random
+
+from document_processor import FinancialDiagnostic
+from diagnostic_service import DiagnosticService, INPUTS_VERSION_KEY, GOAL_KEY
+from goal_seek import goal_seek
+from repositories import MemoryRepository
+from scoring_tables import default_scoring_tables, load_scoring_tables, ScoringTables, DEFAULT_THRESHOLDS_PATH
+from test_diagnostic_batch import random_record
+
+TABLES = default_scoring_tables().version
+
+RESPONSES = {"receita_ano1": "1000000", "custos_ano1": "700000", "num_funcionarios": "10", "setor_atuacao": "Tecnologia"}
+
+
+class CountingDiagnostic(FinancialDiagnostic):
+    """Conta quantas vezes o diagnóstico é gerado."""
+
+    def __init__(self):
+        self.calls = 0
+        self.updates = 0
+
+    def generate_diagnostic(self, documents_data, questionnaire_data):
+        self.calls += 1
+        return super().generate_diagnostic(documents_data, questionnaire_data)
+
+    def update_diagnostic(self, diagnostic, documents_data, questionnaire_data, new_count):
+        self.calls += 1
+        self.updates += 1
+        return super().update_diagnostic(diagnostic, documents_data, questionnaire_data, new_count)
+
+
+def _service():
+    repository = MemoryRepository()
+    return repository, DiagnosticService(repository, CountingDiagnostic())
+
+
+def test_get_reads_precomputed_diagnostic():
+    """Após o pré-cálculo, a leitura não recalcula."""
+    repository, service = _service()
+    assert service.refresh("c1") is None
+    assert service.get("c1") is None
+
+    repository.add_questionnaire({"id": "q1", "company_id": "c1", "responses": RESPONSES, "created_at": "2025-01-01T00:00:00"})
+    precomputed = service.refresh("c1")
+    assert precomputed[INPUTS_VERSION_KEY] == f"q1:0::{TABLES}"
+
+    assert service.get("c1") == precomputed
+    assert service.get("c1") == precomputed
+    assert service.financial_diagnostic.calls == 1
+
+    # A meta de pontuação é armazenada com o diagnóstico; um diagnóstico antigo, sem ela, é recalculado
+    assert precomputed[GOAL_KEY] == goal_seek([], RESPONSES)
+    repository.save_diagnostic("c1", {k: v for k, v in precomputed.items() if k != GOAL_KEY})
+    assert service.get("c1") == precomputed
+    assert service.financial_diagnostic.calls == 2
+
+
+def test_get_recomputes_when_inputs_change():
+    """Um documento ou questionário gravado sem pré-cálculo torna o diagnóstico desatualizado."""
+    repository, service = _service()
+    repository.add_questionnaire({"id": "q1", "company_id": "c1", "responses": RESPONSES, "created_at": "2025-01-01T00:00:00"})
+    assert service.get("c1")[INPUTS_VERSION_KEY] == f"q1:0::{TABLES}"
+
+    repository.add_document({"id": "d1", "company_id": "c1", "document_type": "dre", "extracted_data": {}, "upload_date": "2025-01-02T00:00:00"})
+    assert service.get("c1")[INPUTS_VERSION_KEY] == f"q1:1:d1:{TABLES}"
+
+    repository.add_questionnaire({"id": "q2", "company_id": "c1", "responses": dict(RESPONSES, receita_ano1="2000000"), "created_at": "2025-01-03T00:00:00"})
+    assert service.get("c1")[INPUTS_VERSION_KEY] == f"q2:1:d1:{TABLES}"
+    assert service.get("c1")[INPUTS_VERSION_KEY] == f"q2:1:d1:{TABLES}"
+    assert service.financial_diagnostic.calls == 3
+
+
+def test_refresh_failure_does_not_raise():
+    """Uma falha no pré-cálculo é registrada e a leitura seguinte recalcula."""
+    class FailingDiagnostic(CountingDiagnostic):
+        def generate_diagnostic(self, documents_data, questionnaire_data):
+            raise RuntimeError("falha simulada")
+
+    repository = MemoryRepository()
+    service = DiagnosticService(repository, FailingDiagnostic())
+    repository.add_questionnaire({"id": "q1", "company_id": "c1", "responses": RESPONSES, "created_at": "2025-01-01T00:00:00"})
+    assert service.refresh("c1") is None
+    assert repository.get_diagnostic("c1") is None
+
+    service.financial_diagnostic = CountingDiagnostic()
+    assert service.get("c1")[INPUTS_VERSION_KEY] == f"q1:0::{TABLES}"
+
+
+def test_document_upload_updates_incrementally():
+    """Documentos acrescentados atualizam o diagnóstico armazenado sem gerá-lo do zero."""
+    repository, service = _service()
+    repository.add_questionnaire({"id": "q1", "company_id": "c1", "responses": RESPONSES, "created_at": "2025-01-01T00:00:00"})
+    service.refresh("c1")
+
+    repository.add_document({"id": "d1", "company_id": "c1", "document_type": "dre", "upload_date": "2025-01-02T00:00:00",
+                             "extracted_data": {"receita_liquida": 1500000, "lucro_liquido": 150000}})
+    repository.add_document({"id": "d2", "company_id": "c1", "document_type": "balanco_patrimonial", "upload_date": "2025-01-03T00:00:00",
+                             "extracted_data": {"ativo_circulante": 400000, "passivo_circulante": 500000}})
+    updated = service.refresh("c1")
+    assert updated[INPUTS_VERSION_KEY] == f"q1:2:d2:{TABLES}"
+    assert service.financial_diagnostic.updates == 1
+    assert updated["indicators"]["liquidez"]["fonte"] == "balanço patrimonial"
+
+    expected = FinancialDiagnostic().generate_diagnostic(repository.list_documents("c1"), RESPONSES)
+    assert {k: v for k, v in updated.items() if k not in (INPUTS_VERSION_KEY, GOAL_KEY)} == expected
+    assert updated[GOAL_KEY] == goal_seek(repository.list_documents("c1"), RESPONSES)
+
+    # Um novo questionário invalida o diagnóstico incremental
+    repository.add_questionnaire({"id": "q2", "company_id": "c1", "responses": RESPONSES, "created_at": "2025-01-04T00:00:00"})
+    service.refresh("c1")
+    assert service.financial_diagnostic.updates == 1
+
+
+def test_incremental_update_matches_full_diagnostic():
+    """Atualizar com documentos novos produz o mesmo diagnóstico que gerá-lo com todos os documentos."""
+    rng = random.Random(15)
+    engine = FinancialDiagnostic()
+    for _ in range(300):
+        documents, responses = random_record(rng)
+        documents += random_record(rng)[0]
+        if rng.random() < 0.3:
+            documents.append({"document_type": rng.choice(["fluxo_caixa", "contrato"]), "extracted_data": rng.choice([{}, {"caixa_operacional": 1000}])})
+        rng.shuffle(documents)
+        split = rng.randrange(0, len(documents) + 1)
+        if split == len(documents):
+            continue
+
+        # O diagnóstico armazenado passa pela serialização do armazenamento
+        stored = json.loads(json.dumps(engine.generate_diagnostic(documents[:split], responses)))
+        updated = engine.update_diagnostic(stored, documents, responses, len(documents) - split)
+        assert json.dumps(updated, sort_keys=True) == json.dumps(engine.generate_diagnostic(documents, responses), sort_keys=True)
+
+
+def test_threshold_change_recomputes_stored_and_memoized(tmp_path):
+    """Ajustar uma faixa de pontuação muda a versão e o diagnóstico é recalculado."""
+    from memoization import Memoizer, MemoizedFinancialDiagnostic
+
+    with open(DEFAULT_THRESHOLDS_PATH, encoding="utf-8") as f:
+        spec = json.load(f)
+    repository = MemoryRepository()
+    engine = CountingDiagnostic()
+    engine.scoring_tables = ScoringTables(spec)
+    memoizer = Memoizer(folder=str(tmp_path))
+    service = DiagnosticService(repository, MemoizedFinancialDiagnostic(engine, memoizer))
+    repository.add_questionnaire({"id": "q1", "company_id": "c1", "responses": RESPONSES, "created_at": "2025-01-01T00:00:00"})
+    before = service.get("c1")
+    assert service.get("c1") == before and engine.calls == 1
+
+    spec["default"]["margem"]["bands"][0]["min"] = 25.5
+    engine.scoring_tables = ScoringTables(spec)
+    assert engine.scoring_tables.version != TABLES
+    after = service.get("c1")
+    assert engine.calls == 2 and memoizer.stats()["computed"] == 2
+    assert after[INPUTS_VERSION_KEY] == f"q1:0::{engine.scoring_tables.version}"
+
+    # A versão depende só das faixas
+    assert ScoringTables(dict(spec, description="outra")).version == engine.scoring_tables.version
+    assert load_scoring_tables().version == TABLES
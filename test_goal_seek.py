@@ -0,0 +1,106 @@
+"""
+Testes da meta de pontuação (valores mínimos de cada alavanca).
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from diagnostic_batch import diagnostic_columns, generate_diagnostic_batch
+from document_processor import FinancialDiagnostic
+from goal_seek import goal_seek, LEVER_SPECS, MARGIN_RANGE, _Company
+from test_diagnostic_batch import plausible_record
+
+DENSE_RANGES = {
+    "margem": MARGIN_RANGE,
+    "receita": (1, 2e7),
+    "liquidez": (0, 5)
+}
+
+
+def _dense_minimum(columns, lever, target):
+    """Menor valor com pontuação >= target em uma varredura densa da alavanca."""
+    company = _Company(columns)
+    values = np.linspace(*DENSE_RANGES[lever], 20001)
+    block = {name: np.repeat(array, len(values), axis=0) for name, array in columns.items()}
+    block.update(LEVER_SPECS[lever][1](company, values))
+    passing = np.flatnonzero(generate_diagnostic_batch(block)["overall_score"] >= target)
+    return (values[passing[0]] if len(passing) else None), values[1] - values[0]
+
+
+def _clamp_record():
+    documents = [{"document_type": "balanco_patrimonial", "extracted_data": {
+        "ativo_circulante": 800000, "passivo_circulante": 400000, "passivo_total": 300000, "ativo_total": 1000000
+    }}]
+    responses = {"num_funcionarios": "4"}
+    for year in range(1, 6):
+        receita = 2000000 * 1.3 ** (year - 1)
+        responses[f"receita_ano{year}"] = str(receita)
+        responses[f"custos_ano{year}"] = str(receita * 0.99)
+    return documents, responses
+
+
+def _score_with_margin(documents, responses, margin):
+    changed = dict(responses)
+    for year in range(1, 6):
+        changed[f"custos_ano{year}"] = float(responses[f"receita_ano{year}"]) * (1 - margin / 100)
+    return FinancialDiagnostic().generate_diagnostic(documents, changed)["overall_score"]
+
+
+def test_breakpoints_match_dense_scan():
+    """O mínimo pelos pontos de mudança coincide com uma varredura densa de cada alavanca."""
+    rng = random.Random(11)
+    records = [plausible_record(rng) for _ in range(25)]
+    records.append(([{"document_type": "dre", "extracted_data": {"receita_liquida": 900000, "custo_produtos": 650000}}],
+                    {"receita_ano1": "1000000", "custos_ano1": "800000", "receita_ano5": "1900000", "num_funcionarios": "4"}))
+    records.append(([], {"receita_ano1": "500000", "custos_ano1": "450000", "num_funcionarios": "3"}))
+    # Margem abaixo de 5%: score contínuo (clamp) no segmento entre 0 e 5
+    records.append(_clamp_record())
+    for documents, responses in records:
+        result = goal_seek(documents, responses)
+        columns = diagnostic_columns([(documents, responses)])
+        for lever in DENSE_RANGES:
+            dense, step = _dense_minimum(columns, lever, result["meta"])
+            minimo = result["alavancas"][lever]["minimo"]
+            if dense is None or dense > DENSE_RANGES[lever][1] - step:
+                continue
+            assert minimo is not None, (lever, responses)
+            assert minimo <= dense + 1e-9 and dense - minimo <= step * 1.0001, (lever, minimo, dense)
+
+
+def test_margin_minimum_reaches_target_in_scalar_diagnostic():
+    """A margem mínima aplicada ao questionário leva o diagnóstico escalar à meta."""
+    responses = {"num_funcionarios": "5", "setor_atuacao": "Varejo"}
+    for year, receita in enumerate([1000000, 1250000, 1500000, 1800000, 2100000], start=1):
+        responses[f"receita_ano{year}"] = str(receita)
+        responses[f"custos_ano{year}"] = str(receita * 0.95)
+    engine = FinancialDiagnostic()
+    assert engine.generate_diagnostic([], responses)["overall_score"] < 7
+
+    answer = goal_seek([], responses)["alavancas"]["margem"]
+    assert answer["minimo"] is not None and answer["pontuacao"] >= 7
+
+    def score(margin):
+        changed = dict(responses)
+        for year in range(1, 6):
+            changed[f"custos_ano{year}"] = float(responses[f"receita_ano{year}"]) * (1 - margin / 100)
+        return engine.generate_diagnostic([], changed)["overall_score"]
+
+    margin = answer["minimo"] if answer["inclusivo"] else answer["minimo"] + 1e-6
+    assert score(margin) >= 7
+    assert score(answer["minimo"] - 0.5) < 7
+
+
+def test_continuous_segment_is_bisected():
+    """Com a margem na faixa contínua (clamp), o mínimo fica dentro do segmento, não no limite de 5%."""
+    documents, responses = _clamp_record()
+    answer = goal_seek(documents, responses)["alavancas"]["margem"]
+    assert answer["inclusivo"] and 2.5 < answer["minimo"] < 2.7
+    assert _score_with_margin(documents, responses, answer["minimo"]) >= 7
+    assert _score_with_margin(documents, responses, 2.5) < 7
+
+
+def test_unknown_lever():
+    with pytest.raises(ValueError):
+        goal_seek([], {"receita_ano1": "1000"}, levers=("preco",))
@@ -0,0 +1,71 @@
+"""
+Testes da importação em lote.
+"""
+
+import json
+
+from import_data import import_file
+from questionnaire_storage import QuestionnaireTemplate
+from repositories import MemoryRepository
+
+VALID_RESPONSES = {
+    "receita_ano1": "1000000",
+    "custos_ano1": "700000",
+    "num_funcionarios": "10",
+    "setor_atuacao": "Tecnologia",
+    "modelo_negocios": "Assinatura",
+    "principais_produtos": "Software"
+}
+
+
+def test_validate_responses():
+    """Obrigatórios, números e opções são validados; perguntas ausentes viram None."""
+    clean, errors = QuestionnaireTemplate.validate_responses(dict(VALID_RESPONSES, receita_ano2=1200000))
+    assert errors == []
+    assert clean["receita_ano2"] == "1200000"
+    assert clean["tam_valor"] is None
+
+    _, errors = QuestionnaireTemplate.validate_responses(
+        dict(VALID_RESPONSES, receita_ano1="", custos_ano1="abc", setor_atuacao="Mineração")
+    )
+    assert [e.split(":")[0] for e in errors] == ["receita_ano1", "custos_ano1", "setor_atuacao"]
+
+    clean, errors = QuestionnaireTemplate.validate_responses(
+        dict(VALID_RESPONSES, periodicidade="mensal", receitas_periodos=[100, 200.5], custos_periodos="10; x")
+    )
+    assert clean["receitas_periodos"] == "100; 200.5"
+    assert errors == ["custos_periodos: valores numéricos inválidos"]
+
+
+def test_import_companies_csv(tmp_path):
+    """Empresas de um CSV são gravadas em lotes para o usuário informado."""
+    path = tmp_path / "empresas.csv"
+    path.write_text("id,name,cnpj\nc1,Alfa,1\nc2,,2\nc3,Gama,3\n", encoding="utf-8")
+    repository = MemoryRepository()
+
+    batches = []
+    stats = import_file(repository, "companies", str(path), batch_size=1, user_id="u1", progress=batches.append)
+
+    assert (stats["read"], stats["imported"], stats["rejected"]) == (3, 2, 1)
+    assert stats["errors"] == [(3, "name: campo obrigatório")]
+    assert batches == [1, 2]
+    assert [c["id"] for c in repository.list_companies("u1")] == ["c1", "c3"]
+
+
+def test_import_questionnaires_jsonl(tmp_path):
+    """Revisões históricas de um JSONL mantêm as datas e atualizam a mais recente."""
+    rows = [
+        {"id": "q1", "company_id": "c1", "created_at": "2024-01-01T00:00:00", "responses": VALID_RESPONSES},
+        {"id": "q2", "company_id": "c1", "created_at": "2024-06-01T00:00:00", "responses": dict(VALID_RESPONSES, receita_ano1="2000000")},
+        {"id": "q3", "company_id": "c1", "responses": dict(VALID_RESPONSES, num_funcionarios="dez")}
+    ]
+    path = tmp_path / "historico.jsonl"
+    path.write_text("\n".join(json.dumps(r) for r in rows) + "\n{quebrado\n", encoding="utf-8")
+    repository = MemoryRepository()
+
+    stats = import_file(repository, "questionnaires", str(path))
+
+    assert (stats["imported"], stats["rejected"]) == (2, 2)
+    assert [line for line, _ in stats["errors"]] == [3, 4]
+    assert repository.latest_questionnaire("c1")["id"] == "q2"
+    assert repository.latest_questionnaire("c1")["responses"]["receita_ano1"] == "2000000"
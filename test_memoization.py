@@ -0,0 +1,123 @@
+"""
+Testes da memoização dos cálculos por conteúdo.
+"""
+
+from document_processor import FinancialDiagnostic, ValuationCalculator
+from memoization import Memoizer, MemoizedFinancialDiagnostic, MemoizedValuationCalculator, content_key
+
+RESPONSES = {
+    "receita_ano1": "1000000", "receita_ano5": "2200000",
+    "custos_ano1": "700000", "custos_ano5": "1400000",
+    "num_funcionarios": "10", "setor_atuacao": "Tecnologia", "modelo_negocios": "Assinatura"
+}
+DOCUMENTS = [{"id": "d1", "document_type": "dre", "extracted_data": {"receita_liquida": 900000, "lucro_liquido": 90000}}]
+
+
+class CountingDiagnostic(FinancialDiagnostic):
+    """Conta quantas vezes o diagnóstico é gerado."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_diagnostic(self, documents_data, questionnaire_data):
+        self.calls += 1
+        return super().generate_diagnostic(documents_data, questionnaire_data)
+
+
+def test_content_key_is_canonical():
+    """A chave independe da ordem das chaves e muda com o conteúdo."""
+    assert content_key("d", {"a": 1, "b": 2}) == content_key("d", {"b": 2, "a": 1})
+    assert content_key("d", {"a": 1}) != content_key("d", {"a": 2})
+    assert content_key("d", {"a": 1}) != content_key("v", {"a": 1})
+
+
+def test_identical_inputs_are_computed_once():
+    """Entradas idênticas reaproveitam o resultado; cada chamada recebe uma cópia."""
+    engine = CountingDiagnostic()
+    diagnostic = MemoizedFinancialDiagnostic(engine, Memoizer())
+
+    first = diagnostic.generate_diagnostic(DOCUMENTS, RESPONSES)
+    first["inputs_version"] = "q1:1:d1"
+    # Metadados do documento (id, datas) não fazem parte da chave
+    second = diagnostic.generate_diagnostic([dict(DOCUMENTS[0], id="d2")], dict(RESPONSES))
+
+    assert engine.calls == 1
+    assert "inputs_version" not in second
+    assert second == FinancialDiagnostic().generate_diagnostic(DOCUMENTS, RESPONSES)
+
+    diagnostic.generate_diagnostic([], RESPONSES)
+    assert engine.calls == 2
+
+
+def test_stored_document_ratios_are_part_of_the_key():
+    """Documentos com os mesmos dados extraídos e índices gravados diferentes não compartilham o resultado."""
+    engine = CountingDiagnostic()
+    diagnostic = MemoizedFinancialDiagnostic(engine, Memoizer())
+    balance = {"document_type": "balanco_patrimonial", "extracted_data": {"ativo_circulante": 800000, "passivo_circulante": 500000}}
+
+    first = diagnostic.generate_diagnostic([dict(balance, financial_ratios={"liquidez_corrente": 1.6})], RESPONSES)
+    second = diagnostic.generate_diagnostic([dict(balance, financial_ratios={"liquidez_corrente": 0.5})], RESPONSES)
+    assert engine.calls == 2
+    assert first["indicators"]["liquidez"]["indice_liquidez"] == 1.6
+    assert second["indicators"]["liquidez"]["indice_liquidez"] == 0.5
+
+
+def test_results_are_shared_through_disk(tmp_path):
+    """Outro processo (outro Memoizer) reaproveita os resultados persistidos."""
+    engine = CountingDiagnostic()
+    MemoizedFinancialDiagnostic(engine, Memoizer(folder=str(tmp_path))).generate_diagnostic(DOCUMENTS, RESPONSES)
+
+    other = Memoizer(max_bytes=0, folder=str(tmp_path))
+    result = MemoizedFinancialDiagnostic(engine, other).generate_diagnostic(DOCUMENTS, RESPONSES)
+    assert engine.calls == 1
+    assert other.stats()["disk_hits"] == 1
+    assert result["overall_score"] == FinancialDiagnostic().generate_diagnostic(DOCUMENTS, RESPONSES)["overall_score"]
+
+
+def test_valuation_ignores_stored_metadata():
+    """O valuation é reaproveitado entre diagnósticos iguais de empresas diferentes."""
+    memoizer = Memoizer()
+    calculator = MemoizedValuationCalculator(ValuationCalculator(), memoizer)
+    diagnostic = FinancialDiagnostic().generate_diagnostic(DOCUMENTS, RESPONSES)
+
+    first = calculator.calculate_valuation(dict(diagnostic, inputs_version="q1:1:d1"), RESPONSES)
+    second = calculator.calculate_valuation(dict(diagnostic, inputs_version="q9:1:d9"), RESPONSES)
+    assert first == second == ValuationCalculator().calculate_valuation(diagnostic, RESPONSES)
+    assert memoizer.stats()["computed"] == 1
+
+
+def test_valuation_key_follows_tables_version(tmp_path):
+    """Uma nova versão das tabelas de valuation invalida os valuations memoizados."""
+    from valuation_tables import load_valuation_tables
+
+    memoizer = Memoizer()
+    tables = load_valuation_tables()
+    engine = ValuationCalculator(tables)
+    calculator = MemoizedValuationCalculator(engine, memoizer)
+    first = calculator.calculate_valuation({}, RESPONSES)
+    assert calculator.calculate_valuation({}, RESPONSES) == first
+    assert memoizer.stats()["computed"] == 1
+
+    tables.version = "teste"
+    changed = calculator.calculate_valuation({}, RESPONSES)
+    assert memoizer.stats()["computed"] == 2
+    assert changed["tables_version"] == "teste" and first["tables_version"] != "teste"
+
+
+def test_monte_carlo_is_memoized_by_tables_version():
+    """A distribuição por Monte Carlo é calculada uma vez por respostas e versão das tabelas."""
+    from valuation_tables import load_valuation_tables
+    from valuation_monte_carlo import monte_carlo_valuation
+
+    memoizer = Memoizer()
+    tables = load_valuation_tables()
+    calculator = MemoizedValuationCalculator(ValuationCalculator(tables), memoizer)
+    first = calculator.monte_carlo_valuation(RESPONSES)
+    assert first == monte_carlo_valuation(RESPONSES, calculator=ValuationCalculator(tables))
+    assert calculator.monte_carlo_valuation(RESPONSES) == first
+    assert memoizer.stats()["computed"] == 1
+
+    tables.version = "teste"
+    calculator.monte_carlo_valuation(RESPONSES)
+    assert memoizer.stats()["computed"] == 2
+
@@ -0,0 +1,77 @@
+"""
+Testes do benchmark setorial.
+"""
+
+from diagnostic_service import DiagnosticService
+from document_processor import FinancialDiagnostic
+from peer_benchmarks import PeerBenchmarks, BENCHMARKS_FILENAME, SCORE_BINS, percentile_rank
+from repositories import MemoryRepository
+
+
+def _responses(receita_ano1, setor="Varejo"):
+    return {"receita_ano1": str(receita_ano1), "custos_ano1": "700000", "num_funcionarios": "10", "setor_atuacao": setor}
+
+
+def test_percentile_rank():
+    """Empates contam pela metade; histograma vazio não tem percentil."""
+    counts = [0] * SCORE_BINS
+    counts[50] = 2
+    counts[70] = 2
+    assert percentile_rank(counts, 5.0) == 25.0
+    assert percentile_rank(counts, 6.0) == 50.0
+    assert percentile_rank(counts, 7.0) == 75.0
+    assert percentile_rank([0] * SCORE_BINS, 5.0) is None
+
+
+def test_benchmarks_follow_stored_diagnostics():
+    """Os histogramas acompanham os diagnósticos armazenados e a reconstrução chega ao mesmo estado."""
+    repository = MemoryRepository()
+    benchmarks = PeerBenchmarks(repository, min_peers=3)
+    service = DiagnosticService(repository, FinancialDiagnostic(), benchmarks)
+
+    revenues = [800000, 1000000, 1500000, 3000000, 9000000]
+    for i, receita in enumerate(revenues):
+        repository.add_questionnaire({"id": f"q{i}", "company_id": f"c{i}", "responses": _responses(receita), "created_at": "2025-01-01T00:00:00"})
+        service.refresh(f"c{i}")
+    repository.add_questionnaire({"id": "q9", "company_id": "c9", "responses": _responses(1000000, "Saúde"), "created_at": "2025-01-01T00:00:00"})
+    service.refresh("c9")
+
+    peers = benchmarks.percentiles(repository.get_diagnostic("c4"))
+    assert peers["setor"] == "Varejo"
+    assert peers["empresas"] == 5
+    # Scores de rentabilidade 4, 6, 8, 9 e 9: três abaixo e um empate
+    assert peers["percentis"]["rentabilidade"] == 80.0
+    assert benchmarks.percentiles(repository.get_diagnostic("c9")) is None
+
+    # Um novo diagnóstico da empresa substitui sua contribuição anterior
+    repository.add_questionnaire({"id": "q10", "company_id": "c0", "responses": _responses(9000000), "created_at": "2025-02-01T00:00:00"})
+    service.refresh("c0")
+    peers = benchmarks.percentiles(repository.get_diagnostic("c4"))
+    assert peers["empresas"] == 5
+    assert peers["percentis"]["rentabilidade"] == 70.0
+
+    incremental = repository.get_benchmarks(BENCHMARKS_FILENAME)
+    assert benchmarks.rebuild() == 6
+    assert repository.get_benchmarks(BENCHMARKS_FILENAME) == incremental
+
+
+def test_concurrent_refreshes_count_once():
+    """Duas atualizações que leram o mesmo diagnóstico anterior não contam a empresa duas vezes."""
+    repository = MemoryRepository()
+    benchmarks = PeerBenchmarks(repository, min_peers=1)
+    service = DiagnosticService(repository, FinancialDiagnostic(), benchmarks)
+    for i, receita in enumerate([800000, 3000000]):
+        repository.add_questionnaire({"id": f"q{i}", "company_id": f"c{i}", "responses": _responses(receita), "created_at": "2025-01-01T00:00:00"})
+        service.refresh(f"c{i}")
+    previous = repository.get_diagnostic("c0")
+
+    # As duas atualizações leram o mesmo diagnóstico anterior antes de gravar
+    for revision, receita in enumerate([1500000, 9000000]):
+        questionnaire = {"id": f"q0-{revision}", "company_id": "c0", "responses": _responses(receita), "created_at": f"2025-02-0{revision + 1}T00:00:00"}
+        repository.add_questionnaire(questionnaire)
+        service._compute("c0", questionnaire, [], previous)
+
+    assert benchmarks.percentiles(repository.get_diagnostic("c0"))["empresas"] == 2
+    incremental = repository.get_benchmarks(BENCHMARKS_FILENAME)
+    benchmarks.rebuild()
+    assert repository.get_benchmarks(BENCHMARKS_FILENAME) == incremental
@@ -0,0 +1,116 @@
+"""
+Testes do resumo da carteira de empresas.
+"""
+
+import pytest
+
+from diagnostic_service import DiagnosticService
+from document_processor import FinancialDiagnostic
+from portfolio_analytics import PortfolioAnalytics, portfolio_row, summarize
+from repositories import MemoryRepository, JsonRepository, SQLiteRepository, PORTFOLIO_CHANGES_KEPT
+
+
+def _responses(receita_ano1, custos_ano1="700000", setor="Varejo"):
+    return {"receita_ano1": str(receita_ano1), "custos_ano1": custos_ano1, "num_funcionarios": "10", "setor_atuacao": setor}
+
+
+def _add_company(repository, service, company_id, responses, user_id="u1"):
+    repository.add_company({"id": company_id, "user_id": user_id, "name": company_id})
+    repository.add_questionnaire({"id": f"q-{company_id}", "company_id": company_id, "responses": responses, "created_at": "2025-01-01T00:00:00"})
+    service.refresh(company_id)
+
+
+def test_summarize_single_pass():
+    """Histograma, status, medianas e faturamento por setor."""
+    rows = [
+        (8.2, "Saudável", 20.0, 1000.0, "Varejo"),
+        (5.0, "Estável", 10.0, 3000.0, "Varejo"),
+        (10.0, "Saudável", None, 500.0, "Saúde"),
+        (2.4, "Atenção", -5.0, 200.0, "Varejo")
+    ]
+    summary = summarize(rows, companies=5)
+    assert summary["empresas"] == 5
+    assert summary["com_diagnostico"] == 4
+    assert summary["pontuacao_geral"]["media"] == 6.4
+    assert [b["empresas"] for b in summary["pontuacao_geral"]["histograma"]] == [0, 0, 1, 0, 0, 1, 0, 0, 1, 1]
+    assert summary["status_saude"] == {"Saudável": 2, "Estável": 1, "Atenção": 1}
+    assert summary["margem_operacional_mediana"] == 10.0
+    assert summary["setores"]["Varejo"] == {"empresas": 3, "faturamento_total": 4200.0, "margem_operacional_mediana": 10.0}
+    assert summary["setores"]["Saúde"]["margem_operacional_mediana"] is None
+    assert list(summary["setores"]) == ["Varejo", "Saúde"]
+
+
+def test_portfolio_follows_writes():
+    """O resumo fica em cache e reflete empresas e diagnósticos novos após as gravações."""
+    repository = MemoryRepository()
+    analytics = PortfolioAnalytics(repository)
+    service = DiagnosticService(repository, FinancialDiagnostic(), portfolio_analytics=analytics)
+
+    _add_company(repository, service, "c1", _responses(1000000))
+    _add_company(repository, service, "c2", _responses(2000000, setor="Saúde"))
+    _add_company(repository, service, "x1", _responses(5000000), user_id="u2")
+
+    summary = analytics.summary("u1")
+    assert summary["empresas"] == 2
+    assert summary["setores"]["Varejo"]["faturamento_total"] == 1000000
+    assert analytics.summary("u1") is summary
+
+    # Empresa nova, ainda sem diagnóstico
+    repository.add_company({"id": "c3", "user_id": "u1", "name": "c3"})
+    analytics.invalidate_user("u1")
+    summary = analytics.summary("u1")
+    assert summary["empresas"] == 3
+    assert summary["com_diagnostico"] == 2
+
+    # Questionário novo: só o diagnóstico da empresa é relido
+    repository.add_questionnaire({"id": "q-c1b", "company_id": "c1", "responses": _responses(3000000), "created_at": "2025-02-01T00:00:00"})
+    service.refresh("c1")
+    summary = analytics.summary("u1")
+    assert summary["setores"]["Varejo"]["faturamento_total"] == 3000000
+
+    # O resultado incremental é igual ao de uma carteira carregada do zero
+    assert PortfolioAnalytics(repository).summary("u1") == summary
+    rows = [portfolio_row(repository.get_diagnostic(company_id)) for company_id in ("c1", "c2")]
+    assert summarize(rows, companies=3) == summary
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_portfolio_sees_writes_from_other_processes(tmp_path, backend):
+    """Gravações de outro processo (ex.: import_data.py) chegam pelo registro de alterações."""
+    def open_repository():
+        if backend == "sqlite":
+            return SQLiteRepository(str(tmp_path / "db.sqlite3"))
+        return JsonRepository(str(tmp_path))
+
+    writer = open_repository()
+    service = DiagnosticService(writer, FinancialDiagnostic())
+    _add_company(writer, service, "c1", _responses(1000000))
+
+    analytics = PortfolioAnalytics(open_repository())
+    summary = analytics.summary("u1")
+    assert summary["empresas"] == 1
+    assert analytics.summary("u1") is summary
+
+    # Empresas em lote e diagnóstico recalculado, sem chamar os métodos de invalidação
+    writer.add_companies([{"id": "c2", "user_id": "u1", "name": "c2"}, {"id": "x1", "user_id": "u2", "name": "x1"}])
+    writer.add_questionnaire({"id": "q-c1b", "company_id": "c1", "responses": _responses(3000000), "created_at": "2025-02-01T00:00:00"})
+    service.refresh("c1")
+    summary = analytics.summary("u1")
+    assert summary["empresas"] == 2
+    assert summary["setores"]["Varejo"]["faturamento_total"] == 3000000
+    assert analytics.summary("u1") is summary
+
+
+def test_portfolio_reloads_when_changes_were_trimmed():
+    """Com alterações além das mantidas no registro, as carteiras são recarregadas."""
+    repository = MemoryRepository()
+    service = DiagnosticService(repository, FinancialDiagnostic())
+    _add_company(repository, service, "c1", _responses(1000000))
+    analytics = PortfolioAnalytics(repository)
+    assert analytics.summary("u1")["empresas"] == 1
+
+    repository.add_companies([{"id": f"n{i}", "user_id": "u1", "name": "n"} for i in range(3)])
+    for i in range(2 * PORTFOLIO_CHANGES_KEPT):
+        repository.save_diagnostic(f"outra{i}", {})
+    assert repository.portfolio_changes()["changes"][0][0] > 3
+    assert analytics.summary("u1")["empresas"] == 4
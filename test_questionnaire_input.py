@@ -0,0 +1,84 @@
+"""
+Testes da entrada tipada do questionário.
+"""
+
+from document_processor import FinancialDiagnostic, ValuationCalculator
+from questionnaire_input import QuestionnaireInput
+
+
+def test_parse_converts_once_with_defaults():
+    """Strings viram floats, vazios assumem os padrões e o registro é reaproveitado."""
+    data = QuestionnaireInput.parse({
+        "receita_ano1": "1000000", "receita_ano2": 1200000, "custos_ano1": "",
+        "num_funcionarios": "10", "setor_atuacao": "Varejo"
+    })
+    assert list(data.receitas) == [1000000.0, 1200000.0, 0.0, 0.0, 0.0]
+    assert list(data.custos) == [0.0] * 5
+    assert data.num_funcionarios == 10.0
+    assert data.custos_fixos_pct == 60.0
+    assert data.custos_variaveis_pct == 40.0
+    assert data.setor_atuacao == "Varejo"
+    assert data.principais_riscos == "Concorrência"
+    assert data.errors == []
+    assert QuestionnaireInput.parse(data) is data
+
+
+def test_invalid_numbers_are_collected():
+    """Valores inválidos assumem o padrão e são reportados no diagnóstico; o valuation recusa."""
+    responses = {"receita_ano1": "1.000,00", "receita_ano5": "2000000", "custos_ano1": "500000", "num_funcionarios": "dez"}
+    data = QuestionnaireInput.parse(responses)
+    assert data.receitas[0] == 0.0
+    assert data.num_funcionarios == 0.0
+    assert len(data.errors) == 2
+    assert data.errors[0].startswith("receita_ano1")
+
+    diagnostic = FinancialDiagnostic().generate_diagnostic([], responses)
+    assert diagnostic["input_errors"] == data.errors
+
+    valuation = ValuationCalculator().calculate_valuation(diagnostic, responses)
+    assert valuation["status"] == "Erro no cálculo"
+
+
+def test_monthly_series_are_annualized():
+    """Séries mensais são somadas por ano; o último ano incompleto é anualizado."""
+    responses = {
+        "periodicidade": "mensal",
+        "receitas_periodos": "; ".join(["100"] * 24 + ["150"] * 6),
+        "custos_periodos": [80] * 12,
+        "receita_ano1": "999"
+    }
+    data = QuestionnaireInput.parse(responses)
+    assert data.anos == 3
+    assert list(data.receitas) == [1200.0, 1200.0, 1800.0, 0.0, 0.0]
+    assert list(data.custos) == [960.0, 0.0, 0.0, 0.0, 0.0]
+    assert data.receita_final == 1800.0
+    assert data.cagr(1200.0) == (1.5 ** 0.5 - 1) * 100
+    assert data.errors == []
+
+    # Série inválida: erro registrado e uso dos campos anuais
+    data = QuestionnaireInput.parse(dict(responses, receitas_periodos="100; abc"))
+    assert data.receitas[0] == 999.0
+    assert data.errors == ["receitas_periodos: valores numéricos inválidos"]
+
+
+def test_long_series_in_engine():
+    """Horizontes longos chegam ao CAGR, ao DCF e aos gráficos, reduzidos para exibição."""
+    ten_years = {
+        "receitas_periodos": [1000000 * 1.1 ** year for year in range(10)],
+        "custos_periodos": [800000] * 10,
+        "num_funcionarios": "10", "setor_atuacao": "Varejo"
+    }
+    diagnostic = FinancialDiagnostic().generate_diagnostic([], ten_years)
+    assert diagnostic["indicators"]["crescimento"]["cagr"] == 10.0
+    assert diagnostic["dashboard"]["chart_data"]["anos"][-1] == "Ano 10"
+    valuation = ValuationCalculator().calculate_valuation(diagnostic, ten_years)
+    assert "Horizonte de projeção de 10 anos" in valuation["assumptions"]
+
+    monthly = {"periodicidade": "mensal", "receitas_periodos": [100000 + 1000 * month for month in range(120)], "custos_periodos": [70000] * 120}
+    chart = FinancialDiagnostic().generate_diagnostic([], monthly)["dashboard"]["chart_data"]
+    assert chart["anos"] == [f"Semestre {i}" for i in range(1, 21)]
+    assert sum(chart["receitas"]) == sum(monthly["receitas_periodos"])
+
+    quarterly = dict(monthly, receitas_periodos=monthly["receitas_periodos"][:36], custos_periodos=[70000] * 36)
+    chart = FinancialDiagnostic().generate_diagnostic([], quarterly)["dashboard"]["chart_data"]
+    assert len(chart["anos"]) == 12 and chart["anos"][0] == "Trimestre 1"
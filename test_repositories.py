@@ -0,0 +1,112 @@
+"""
+Testes da interface de repositórios sobre os backends JSON, SQLite e memória.
+"""
+
+import pytest
+
+from repositories import JsonRepository, SQLiteRepository, MemoryRepository, create_repository
+
+
+@pytest.fixture(params=["json", "sqlite", "memory"])
+def repository(request, tmp_path):
+    if request.param == "json":
+        return JsonRepository(str(tmp_path), cache_bytes=1024 * 1024)
+    if request.param == "sqlite":
+        return SQLiteRepository(str(tmp_path / "storage.sqlite3"))
+    return MemoryRepository()
+
+
+def test_companies(repository):
+    """Empresas são listadas por usuário e encontradas pelo id."""
+    repository.add_company({"id": "c1", "user_id": "u1", "name": "Alfa", "created_at": "2025-01-01T00:00:00"})
+    repository.add_company({"id": "c2", "user_id": "u1", "name": "Beta", "created_at": "2025-01-02T00:00:00"})
+    repository.add_company({"id": "c3", "user_id": "u2", "name": "Gama", "created_at": "2025-01-03T00:00:00"})
+
+    assert [c["id"] for c in repository.list_companies("u1")] == ["c1", "c2"]
+    assert repository.get_company("u1", "c2")["name"] == "Beta"
+    assert repository.get_company("u1", "c3") is None
+    assert repository.list_companies("u3") == []
+
+
+def test_documents_and_questionnaires(repository):
+    """Documentos e revisões do questionário ficam associados à empresa."""
+    repository.add_document({"id": "d1", "company_id": "c1", "document_type": "dre", "upload_date": "2025-01-01T00:00:00"})
+    repository.add_questionnaire({"id": "q1", "company_id": "c1", "responses": {"receita_ano1": "100"}, "created_at": "2025-01-01T00:00:00"})
+    repository.add_questionnaire({"id": "q2", "company_id": "c1", "responses": {"receita_ano1": "200"}, "created_at": "2025-02-01T00:00:00"})
+
+    assert [d["id"] for d in repository.list_documents("c1")] == ["d1"]
+    assert [q["id"] for q in repository.list_questionnaires("c1")] == ["q1", "q2"]
+    assert repository.latest_questionnaire("c1")["responses"] == {"receita_ano1": "200"}
+    assert repository.latest_questionnaire("c2") is None
+
+
+def test_diagnostics_and_valuations(repository):
+    """Diagnóstico e valuation são substituídos a cada gravação."""
+    assert repository.get_diagnostic("c1") is None
+    repository.save_diagnostic("c1", {"overall_score": 5.0})
+    repository.save_diagnostic("c1", {"overall_score": 6.5})
+    repository.save_valuation("c1", {"valuation": "R$ 1.00 milhões"})
+
+    assert repository.get_diagnostic("c1") == {"overall_score": 6.5}
+    assert repository.get_valuation("c1") == {"valuation": "R$ 1.00 milhões"}
+
+
+def test_iter_diagnostics(repository):
+    """Os diagnósticos armazenados são percorridos uma vez cada, sem valuations nem benchmarks."""
+    for company_id in ("c1", "c2", "c3"):
+        repository.save_diagnostic(company_id, {"overall_score": 5.0})
+    repository.save_diagnostic("c2", {"overall_score": 7.0})
+    repository.save_valuation("c1", {"valuation": "R$ 1.00 milhões"})
+    repository.save_benchmarks("peer_benchmarks.json", {"sectors": {}})
+
+    assert sorted(repository.iter_diagnostics()) == [
+        ("c1", {"overall_score": 5.0}), ("c2", {"overall_score": 7.0}), ("c3", {"overall_score": 5.0})
+    ]
+
+
+def test_create_repository_rejects_unknown_backend(tmp_path):
+    """Um backend desconhecido é rejeitado na inicialização."""
+    with pytest.raises(ValueError):
+        create_repository({"STORAGE_BACKEND": "postgres"}, str(tmp_path))
+
+
+def test_latest_questionnaire_pointer(repository):
+    """O ponteiro da revisão mais recente evita ler o histórico e não retrocede."""
+    repository.add_questionnaire({"id": "q2", "company_id": "c1", "created_at": "2025-02-01T00:00:00"})
+    repository.add_questionnaire({"id": "q1", "company_id": "c1", "created_at": "2025-01-01T00:00:00"})
+    assert repository.latest_questionnaire("c1")["id"] == "q2"
+
+    # O histórico não é consultado quando o ponteiro existe
+    repository.store.save([], "questionnaires_c1.json")
+    assert repository.latest_questionnaire("c1")["id"] == "q2"
+
+
+def test_latest_questionnaire_backfills_legacy_data(repository):
+    """Empresas sem ponteiro usam o histórico e passam a ter o ponteiro gravado."""
+    repository.store.append({"id": "q1", "company_id": "c1", "created_at": "2025-01-01T00:00:00"}, "questionnaires_c1.json")
+    repository.store.append({"id": "q2", "company_id": "c1", "created_at": "2025-03-01T00:00:00"}, "questionnaires_c1.json")
+
+    assert repository.latest_questionnaire("c1")["id"] == "q2"
+    assert repository.store.load("questionnaire_latest_c1.json")["id"] == "q2"
+
+
+def test_bulk_writes(repository):
+    """Lotes são gravados na coleção de cada dono e avançam o ponteiro uma vez por empresa."""
+    repository.add_companies([
+        {"id": "c1", "user_id": "u1", "created_at": "2025-01-01T00:00:00"},
+        {"id": "c2", "user_id": "u2", "created_at": "2025-01-01T00:00:00"},
+        {"id": "c3", "user_id": "u1", "created_at": "2025-01-01T00:00:00"}
+    ])
+    repository.add_questionnaires([
+        {"id": "q1", "company_id": "c1", "created_at": "2025-01-01T00:00:00"},
+        {"id": "q2", "company_id": "c1", "created_at": "2025-03-01T00:00:00"},
+        {"id": "q3", "company_id": "c1", "created_at": "2025-02-01T00:00:00"},
+        {"id": "q4", "company_id": "c2", "created_at": "2025-01-01T00:00:00"}
+    ])
+    repository.add_documents([{"id": "d1", "company_id": "c1", "upload_date": "2025-01-01T00:00:00"}])
+
+    assert [c["id"] for c in repository.list_companies("u1")] == ["c1", "c3"]
+    assert [q["id"] for q in repository.list_questionnaires("c1")] == ["q1", "q2", "q3"]
+    assert repository.latest_questionnaire("c1")["id"] == "q2"
+    assert repository.latest_questionnaire("c2")["id"] == "q4"
+    assert [d["id"] for d in repository.list_documents("c1")] == ["d1"]
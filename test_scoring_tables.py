@@ -0,0 +1,73 @@
+"""
+Testes das tabelas de faixas de pontuação.
+"""
+
+import json
+import math
+import random
+
+import pytest
+
+from document_processor import FinancialDiagnostic
+from scoring_tables import ScoringTables, ThresholdTable, DEFAULT_THRESHOLDS_PATH, load_scoring_tables
+
+
+def test_inclusive_and_strict_bands():
+    """min/max são inclusivos e above/below estritos."""
+    tables = load_scoring_tables()
+    assert tables.score("crescimento", 0.0) == 0
+    assert tables.score("crescimento", 1e-12) == 1
+    assert tables.score("crescimento", 5) == 2
+    assert tables.score("crescimento", 4.999) == 1
+    assert tables.score("endividamento", 0.3) == 10
+    assert tables.score("endividamento", 0.30001) == 9
+    assert tables.score("endividamento", 5) == 1
+    assert tables.score("margem", 30) == 10
+    assert tables.score("margem", 2.5) == 2.5
+    assert tables.score("margem", -3) == 0
+
+    below = ThresholdTable("t", {"bands": [{"below": 0, "score": 10}, {"max": 10, "score": 5}], "otherwise": 1})
+    assert [below.score(v) for v in (-1, 0, 10, 11)] == [10, 5, 5, 1]
+
+
+def test_array_lookup_matches_scalar():
+    """searchsorted e bisect produzem os mesmos scores, inclusive nos limites."""
+    np = pytest.importorskip("numpy")
+    tables = load_scoring_tables()
+    rng = random.Random(7)
+    for name, table in tables.default.items():
+        values = table.thresholds + [math.nextafter(t, math.inf) for t in table.thresholds] + \
+            [math.nextafter(t, -math.inf) for t in table.thresholds] + [rng.uniform(-50, 600000) for _ in range(500)]
+        assert list(table.score_array(np.array(values))) == [table.score(v) for v in values], name
+
+
+def test_sector_overrides_apply_to_scalar_and_batch():
+    """Um setor pode substituir uma tabela; os cálculos escalar e em lote usam a mesma regra."""
+    np = pytest.importorskip("numpy")
+    from diagnostic_batch import diagnostic_columns, generate_diagnostic_batch
+
+    with open(DEFAULT_THRESHOLDS_PATH, encoding="utf-8") as f:
+        spec = json.load(f)
+    spec["sectors"] = {"SaaS": {"liquidez": {"bands": [{"min": 3.0, "score": 10}, {"min": 1.0, "score": 5}], "otherwise": 0}}}
+    tables = ScoringTables(spec)
+
+    responses = {"receita_ano1": "2000000", "custos_ano1": "1000000", "num_funcionarios": "10"}
+    records = [([], dict(responses, setor_atuacao="SaaS")), ([], dict(responses, setor_atuacao="Varejo"))]
+    engine = FinancialDiagnostic(tables)
+    batch = generate_diagnostic_batch(diagnostic_columns(records), tables)
+
+    expected = [engine.generate_diagnostic(documents, data)["indicators"]["liquidez"]["score"] for documents, data in records]
+    assert expected == [5, 10]
+    assert list(batch["scores"]["liquidez"]) == expected
+
+
+def test_invalid_tables_are_rejected():
+    """Faixas fora de ordem, repetidas ou com direções misturadas são rejeitadas."""
+    with pytest.raises(ValueError):
+        ThresholdTable("t", {"bands": [{"min": 5, "score": 1}, {"min": 10, "score": 2}]})
+    with pytest.raises(ValueError):
+        ThresholdTable("t", {"bands": [{"min": 5, "score": 1}, {"max": 1, "score": 2}]})
+    with pytest.raises(ValueError):
+        ThresholdTable("t", {"bands": [{"min": 5}]})
+    with pytest.raises(ValueError):
+        ScoringTables({"default": {}, "sectors": {"SaaS": {"inexistente": {"bands": [{"min": 1, "score": 1}]}}}})
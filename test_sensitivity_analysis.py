@@ -0,0 +1,61 @@
+"""
+Testes da análise de sensibilidade do diagnóstico.
+"""
+
+import random
+import itertools
+
+import pytest
+
+from document_processor import FinancialDiagnostic
+from diagnostic_batch import INDICATORS
+from sensitivity_analysis import sensitivity_surface, perturbed_input, perturbation_grid, PERTURBATIONS
+from test_diagnostic_batch import plausible_record
+
+
+def test_grid_matches_scalar_diagnostic():
+    """Cada ponto da grade tem os scores do diagnóstico escalar do questionário alterado."""
+    rng = random.Random(7)
+    engine = FinancialDiagnostic()
+    grid = {
+        "crescimento_receita": [-15, 0, 12.5],
+        "custos": [-30, -10, 0, 25],
+        "num_funcionarios": [-50, 0, 40],
+        "custos_fixos_pct": [-10, 50]
+    }
+    records = [plausible_record(rng) for _ in range(20)]
+    # Uma DRE com custos exercita os ajustes dependentes dos custos do ano 1
+    records.append(([{"document_type": "dre", "extracted_data": {"receita_liquida": 900000, "custo_produtos": 650000}}],
+                    {"receita_ano1": "1000000", "custos_ano1": "800000", "receita_ano5": "1900000", "num_funcionarios": "12"}))
+    for documents, responses in records:
+        surface = sensitivity_surface(documents, responses, grid)
+        assert surface["forma"] == [3, 4, 3, 2]
+        base = engine.generate_diagnostic(documents, responses)
+        assert surface["base"]["overall_score"] == base["overall_score"]
+        for point in itertools.product(*(enumerate(values) for values in grid.values())):
+            index = [i for i, _ in point]
+            variations = dict(zip(PERTURBATIONS, (value for _, value in point)))
+            expected = engine.generate_diagnostic(documents, perturbed_input(responses, **variations))
+            cell = lambda surface_values: surface_values[index[0]][index[1]][index[2]][index[3]]
+            assert cell(surface["overall_score"]) == expected["overall_score"], variations
+            assert cell(surface["health_status"]) == expected["dashboard"]["health_status"]
+            for name in INDICATORS:
+                assert cell(surface["scores"][name]) == expected["indicators"][name]["score"], (name, variations)
+
+
+def test_grid_validation():
+    """Eixos omitidos não variam; eixos desconhecidos e grades grandes demais são rejeitados."""
+    axes = perturbation_grid({"custos": [-10, 10]})
+    assert axes["custos"] == [-10.0, 10.0]
+    assert axes["crescimento_receita"] == [0.0]
+    with pytest.raises(ValueError):
+        perturbation_grid({"preco": [1]})
+    with pytest.raises(ValueError):
+        perturbation_grid({"custos": ["muito"]})
+    with pytest.raises(ValueError):
+        perturbation_grid({"num_funcionarios": [-100]})
+    with pytest.raises(ValueError):
+        perturbation_grid({name: list(range(20)) for name in PERTURBATIONS})
+    for grid in ([1, 2], ["custos"], "custos"):
+        with pytest.raises(ValueError):
+            perturbation_grid(grid)
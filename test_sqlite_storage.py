@@ -0,0 +1,107 @@
+"""
+Testes para o armazenamento em SQLite embarcado.
+"""
+
+import multiprocessing
+import threading
+
+from sqlite_storage import SQLiteStore
+from storage import JsonStore
+
+
+def _make_store(tmp_path):
+    return SQLiteStore(str(tmp_path / "storage.sqlite3"))
+
+
+def test_collections_round_trip(tmp_path):
+    """Coleções e documentos mantêm o comportamento de load/save/append do JsonStore."""
+    store = _make_store(tmp_path)
+    assert store.load("companies_u1.json") is None
+
+    store.append({"id": "a", "user_id": "u1", "created_at": "2025-01-01T00:00:00"}, "companies_u1.json")
+    store.append({"id": "b", "user_id": "u1", "created_at": "2025-01-02T00:00:00"}, "companies_u1.json")
+    store.append({"id": "c", "user_id": "u2", "created_at": "2025-01-03T00:00:00"}, "companies_u2.json")
+    assert [c["id"] for c in store.load("companies_u1.json")] == ["a", "b"]
+
+    store.save([{"id": "z"}], "companies_u1.json")
+    assert store.load("companies_u1.json") == [{"id": "z"}]
+    assert [c["id"] for c in store.load("companies_u2.json")] == ["c"]
+
+    store.save({"overall_score": 7.5}, "diagnostic_c1.json")
+    assert store.load("diagnostic_c1.json") == {"overall_score": 7.5}
+
+
+def test_find_and_latest_match_json_store(tmp_path):
+    """find e latest retornam os mesmos registros nos dois backends."""
+    records = [
+        {"id": "q1", "created_at": "2025-01-01T00:00:00"},
+        {"id": "q2", "created_at": "2025-03-01T00:00:00"},
+        {"id": "q3", "created_at": "2025-02-01T00:00:00"}
+    ]
+    sqlite_store = _make_store(tmp_path)
+    json_store = JsonStore(str(tmp_path / "json"))
+    for store in (sqlite_store, json_store):
+        for record in records:
+            store.append(record, "questionnaires_c1.json")
+
+        assert store.find("questionnaires_c1.json", "q3")["id"] == "q3"
+        assert store.find("questionnaires_c1.json", "missing") is None
+        assert store.latest("questionnaires_c1.json")["id"] == "q2"
+        assert store.latest("questionnaires_c2.json") is None
+
+
+def test_lookups_use_indexes(tmp_path):
+    """Busca por id e pelo registro mais recente são seeks em índice."""
+    store = _make_store(tmp_path)
+    conn = store._connection()
+    plans = [
+        conn.execute("EXPLAIN QUERY PLAN SELECT data FROM companies WHERE user_id = ? AND id = ? LIMIT 1", ("u", "x")).fetchall(),
+        conn.execute("EXPLAIN QUERY PLAN SELECT data FROM questionnaires WHERE company_id = ? ORDER BY created_at DESC, seq DESC LIMIT 1", ("c",)).fetchall()
+    ]
+    for plan in plans:
+        detail = " ".join(row[-1] for row in plan)
+        assert "USING INDEX" in detail or "USING COVERING INDEX" in detail
+        assert "TEMP B-TREE" not in detail
+
+
+def test_update_is_atomic_across_threads(tmp_path):
+    """update executa leitura e gravação em uma única transação."""
+    store = _make_store(tmp_path)
+    store.save({"count": 0}, "counter.json")
+
+    def increment(data):
+        data["count"] += 1
+        return data
+
+    def run():
+        for _ in range(25):
+            store.update("counter.json", increment)
+
+    pool = [threading.Thread(target=run) for _ in range(4)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+    assert store.load("counter.json") == {"count": 100}
+
+
+def _append_worker(db_path, worker_id, records):
+    store = SQLiteStore(db_path)
+    for i in range(records):
+        store.append({"id": f"{worker_id}-{i}", "created_at": f"{i:06d}"}, "documents_c1.json")
+
+
+def test_concurrent_processes_lose_nothing(tmp_path):
+    """Vários processos gravando no mesmo banco não perdem registros."""
+    db_path = str(tmp_path / "storage.sqlite3")
+    SQLiteStore(db_path)
+    ctx = multiprocessing.get_context("fork")
+    processes = [ctx.Process(target=_append_worker, args=(db_path, w, 100)) for w in range(4)]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+        assert p.exitcode == 0
+
+    assert len(SQLiteStore(db_path).load("documents_c1.json")) == 400
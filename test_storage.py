@@ -0,0 +1,295 @@
+"""
+Testes para o armazenamento em arquivos JSON com journal append-only.
+"""
+
+import json
+import multiprocessing
+import os
+import sys
+import threading
+
+import pytest
+
+import storage_codecs
+from convert_storage_codec import convert, main as convert_main
+from migrate_data_layout import migrate
+from storage import JsonStore, ReadCache, JOURNAL_SUFFIX, COMPACTING_SUFFIX, sharded_path
+
+
+def test_append_does_not_rewrite_snapshot(tmp_path):
+    """Acrescentar registros grava apenas no journal até a compactação."""
+    store = JsonStore(str(tmp_path), compact_threshold=0)
+    store.save([{"id": "1"}], "questionnaires_c1.json")
+    snapshot_mtime = os.stat(store.path_for("questionnaires_c1.json")).st_mtime_ns
+
+    store.append({"id": "2"}, "questionnaires_c1.json")
+    store.append({"id": "3"}, "questionnaires_c1.json")
+
+    assert os.stat(store.path_for("questionnaires_c1.json")).st_mtime_ns == snapshot_mtime
+    assert [r["id"] for r in store.load("questionnaires_c1.json")] == ["1", "2", "3"]
+
+
+def test_load_legacy_file_without_journal(tmp_path):
+    """Arquivos gravados pela versão anterior continuam legíveis."""
+    with open(tmp_path / "companies_u1.json", "w", encoding="utf-8") as f:
+        json.dump([{"id": "a", "name": "Empresa"}], f, ensure_ascii=False, indent=2)
+
+    store = JsonStore(str(tmp_path))
+    assert store.load("companies_u1.json") == [{"id": "a", "name": "Empresa"}]
+    assert store.load("companies_u2.json") is None
+
+
+def test_compaction_merges_journal(tmp_path):
+    """A compactação incorpora o journal ao snapshot e o remove."""
+    store = JsonStore(str(tmp_path), compact_threshold=200)
+    for i in range(20):
+        store.append({"id": str(i), "payload": "x" * 20}, "documents_c1.json")
+
+    assert [r["id"] for r in store.load("documents_c1.json")] == [str(i) for i in range(20)]
+    with open(store.path_for("documents_c1.json"), encoding="utf-8") as f:
+        assert len(json.load(f)) >= 5
+
+
+def test_save_replaces_journal(tmp_path):
+    """Gravar o arquivo inteiro descarta registros pendentes do journal."""
+    store = JsonStore(str(tmp_path), compact_threshold=0)
+    store.append({"id": "1"}, "companies_u1.json")
+    store.save([{"id": "2"}], "companies_u1.json")
+
+    assert store.load("companies_u1.json") == [{"id": "2"}]
+    assert not os.path.exists(store.path_for("companies_u1.json") + JOURNAL_SUFFIX)
+
+
+def test_interrupted_compaction_does_not_duplicate(tmp_path):
+    """Registros de uma compactação interrompida não são duplicados na leitura."""
+    store = JsonStore(str(tmp_path), compact_threshold=0)
+    store.save([{"id": "1"}, {"id": "2"}], "questionnaires_c1.json")
+    with open(store.path_for("questionnaires_c1.json") + COMPACTING_SUFFIX, "w", encoding="utf-8") as f:
+        f.write('{"id": "2"}\n{"id": "3"}\n')
+
+    assert [r["id"] for r in store.load("questionnaires_c1.json")] == ["1", "2", "3"]
+
+
+def test_truncated_journal_line_is_ignored(tmp_path):
+    """Uma última linha incompleta (falha durante a escrita) é ignorada."""
+    store = JsonStore(str(tmp_path), compact_threshold=0)
+    store.append({"id": "1"}, "documents_c1.json")
+    with open(store.path_for("documents_c1.json") + JOURNAL_SUFFIX, "a", encoding="utf-8") as f:
+        f.write('{"id": "2", "doc')
+
+    assert store.load("documents_c1.json") == [{"id": "1"}]
+    store.append({"id": "3"}, "documents_c1.json")
+    assert store.load("documents_c1.json") == [{"id": "1"}, {"id": "3"}]
+
+
+def _append_worker(data_folder, worker_id, threads, records_per_thread):
+    """Acrescenta registros a partir de várias threads de um mesmo processo."""
+    store = JsonStore(data_folder, compact_threshold=2048)
+
+    def run(thread_id):
+        for i in range(records_per_thread):
+            store.append({"id": f"{worker_id}-{thread_id}-{i}"}, "questionnaires_c1.json")
+            if i % 10 == 0:
+                store.load("questionnaires_c1.json")
+
+    pool = [threading.Thread(target=run, args=(t,)) for t in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+
+def test_concurrent_appends_lose_nothing(tmp_path):
+    """Vários processos e threads acrescentando à mesma coleção não perdem registros."""
+    workers, threads, records_per_thread = 4, 4, 50
+    ctx = multiprocessing.get_context("fork")
+    processes = [
+        ctx.Process(target=_append_worker, args=(str(tmp_path), w, threads, records_per_thread))
+        for w in range(workers)
+    ]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+        assert p.exitcode == 0
+
+    ids = [r["id"] for r in JsonStore(str(tmp_path)).load("questionnaires_c1.json")]
+    assert len(ids) == workers * threads * records_per_thread
+    assert len(set(ids)) == len(ids)
+
+
+def test_concurrent_updates_are_serialized(tmp_path):
+    """Leituras-modificações-gravações concorrentes via update não se sobrepõem."""
+    store = JsonStore(str(tmp_path))
+    store.save({"count": 0}, "counter.json")
+
+    def increment(data):
+        data["count"] += 1
+        return data
+
+    def run():
+        for _ in range(50):
+            store.update("counter.json", increment)
+
+    pool = [threading.Thread(target=run) for _ in range(8)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+    assert store.load("counter.json") == {"count": 400}
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".tmp-")]
+
+
+def test_read_cache_hits_until_file_changes(tmp_path):
+    """O cache evita releituras e detecta gravações de outros workers."""
+    cache = ReadCache()
+    store = JsonStore(str(tmp_path), compact_threshold=0, cache=cache)
+    other_worker = JsonStore(str(tmp_path), compact_threshold=0)
+    store.save([{"id": "1"}], "companies_u1.json")
+
+    assert store.load("companies_u1.json") == [{"id": "1"}]
+    assert store.load("companies_u1.json") == [{"id": "1"}]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+    other_worker.append({"id": "2"}, "companies_u1.json")
+    assert [r["id"] for r in store.load("companies_u1.json")] == ["1", "2"]
+
+    other_worker.save([{"id": "3"}], "companies_u1.json")
+    assert store.load("companies_u1.json") == [{"id": "3"}]
+    assert cache.stats()["misses"] == 3
+
+
+def test_read_cache_respects_memory_budget(tmp_path):
+    """Entradas menos usadas são descartadas quando o orçamento é excedido."""
+    cache = ReadCache(max_bytes=4096)
+    store = JsonStore(str(tmp_path), cache=cache)
+    for i in range(10):
+        store.save([{"id": str(i), "payload": "x" * 1000}], f"documents_c{i}.json")
+        store.load(f"documents_c{i}.json")
+
+    stats = cache.stats()
+    assert stats["bytes"] <= 4096
+    assert stats["entries"] < 10
+
+    store.load("documents_c9.json")
+    assert cache.stats()["hits"] == 1
+
+
+def test_sharded_layout_groups_files_by_id(tmp_path):
+    """No layout particionado, os arquivos de uma empresa ficam na mesma subpasta."""
+    store = JsonStore(str(tmp_path), layout="sharded")
+    store.append({"id": "d1"}, "documents_c1.json")
+    store.save({"overall_score": 5}, "diagnostic_c1.json")
+    store.save({"version": 1}, "global_index.json")
+
+    shard_dir = os.path.dirname(sharded_path(str(tmp_path), "documents_c1.json"))
+    assert os.path.relpath(shard_dir, tmp_path).count(os.sep) == 1
+    assert os.path.exists(os.path.join(shard_dir, "documents_c1.json" + JOURNAL_SUFFIX))
+    assert os.path.exists(os.path.join(shard_dir, "diagnostic_c1.json"))
+    assert os.path.exists(tmp_path / "global_index.json")
+    assert store.load("documents_c1.json") == [{"id": "d1"}]
+
+
+def test_sharded_layout_reads_legacy_flat_files(tmp_path):
+    """Arquivos ainda não migrados continuam acessíveis no layout particionado."""
+    flat = JsonStore(str(tmp_path), layout="flat")
+    flat.save([{"id": "q1"}], "questionnaires_c1.json")
+
+    sharded = JsonStore(str(tmp_path), layout="sharded")
+    sharded.append({"id": "q2"}, "questionnaires_c1.json")
+    assert [r["id"] for r in sharded.load("questionnaires_c1.json")] == ["q1", "q2"]
+    assert sharded.path_for("questionnaires_c1.json") == flat.path_for("questionnaires_c1.json")
+
+
+def test_migration_moves_files_into_shards(tmp_path):
+    """A migração move snapshot e journal e preserva o conteúdo das coleções."""
+    flat = JsonStore(str(tmp_path), layout="flat", compact_threshold=0)
+    for company in range(20):
+        flat.save([{"id": f"q{company}-0"}], f"questionnaires_c{company}.json")
+        flat.append({"id": f"q{company}-1"}, f"questionnaires_c{company}.json")
+    flat.save({"users": {}}, "example_data.json")
+
+    moved, skipped = migrate(str(tmp_path))
+    assert moved >= 40 and skipped == 0
+    assert sorted(name for name in os.listdir(tmp_path) if os.path.isfile(tmp_path / name)) == ["example_data.json"]
+
+    sharded = JsonStore(str(tmp_path), layout="sharded")
+    for company in range(20):
+        assert [r["id"] for r in sharded.load(f"questionnaires_c{company}.json")] == [f"q{company}-0", f"q{company}-1"]
+
+
+def test_snapshots_are_compact_json_by_default(tmp_path):
+    """Snapshots são gravados em JSON compacto, legível por qualquer leitor JSON."""
+    store = JsonStore(str(tmp_path))
+    store.save([{"id": "1", "name": "Empresa São Paulo"}], "companies_u1.json")
+
+    with open(store.path_for("companies_u1.json"), encoding="utf-8") as f:
+        raw = f.read()
+    assert raw == '[{"id":"1","name":"Empresa São Paulo"}]'
+
+
+def test_unavailable_codec_falls_back_to_json(tmp_path, monkeypatch):
+    """Sem o pacote do codec configurado, o armazenamento usa JSON."""
+    monkeypatch.setattr(storage_codecs, "msgpack", None)
+    assert JsonStore(str(tmp_path), codec="msgpack").codec == "json"
+    with pytest.raises(ValueError):
+        JsonStore(str(tmp_path), codec="pickle")
+
+
+def test_msgpack_files_are_detected_by_header(tmp_path):
+    """Arquivos msgpack são lidos por qualquer store, independentemente do codec configurado."""
+    pytest.importorskip("msgpack")
+    JsonStore(str(tmp_path), codec="msgpack").save({"overall_score": 7.5}, "diagnostic_c1.json")
+
+    with open(tmp_path / "diagnostic_c1.json", "rb") as f:
+        assert f.read().startswith(storage_codecs.HEADER_PREFIX)
+    assert JsonStore(str(tmp_path)).load("diagnostic_c1.json") == {"overall_score": 7.5}
+
+
+def test_convert_rewrites_snapshots_and_folds_journals(tmp_path):
+    """O conversor regrava snapshots no codec escolhido e não toca em outros arquivos."""
+    with open(tmp_path / "companies_u1.json", "w", encoding="utf-8") as f:
+        json.dump([{"id": "a"}], f, indent=2)
+    store = JsonStore(str(tmp_path), layout="sharded", compact_threshold=0)
+    store.append({"id": "q1"}, "questionnaires_c1.json")
+    with open(tmp_path / "notes.json", "w", encoding="utf-8") as f:
+        f.write("não é JSON")
+
+    converted, skipped = convert(str(tmp_path), "json")
+    assert (converted, skipped) == (2, 0)
+    with open(tmp_path / "notes.json", encoding="utf-8") as f:
+        assert f.read() == "não é JSON"
+
+    with open(tmp_path / "companies_u1.json", encoding="utf-8") as f:
+        assert f.read() == '[{"id":"a"}]'
+    assert not os.path.exists(store.path_for("questionnaires_c1.json") + JOURNAL_SUFFIX)
+    assert store.load("questionnaires_c1.json") == [{"id": "q1"}]
+
+
+def test_locks_live_in_lock_folder(tmp_path):
+    """Os locks ficam na subpasta .locks; a migração remove os locks antigos ao lado das coleções."""
+    store = JsonStore(str(tmp_path), layout="flat")
+    store.save([{"id": "q1"}], "questionnaires_c1.json")
+    store.append({"id": "q2"}, "questionnaires_c1.json")
+    assert not any(name.endswith(".lock") for name in os.listdir(tmp_path))
+    assert [name for name, _ in store.iter_prefix("questionnaires_")] == ["questionnaires_c1.json"]
+
+    (tmp_path / "questionnaires_c1.json.lock").write_text("")
+    migrate(str(tmp_path))
+    assert [name for name in os.listdir(tmp_path) if os.path.isfile(tmp_path / name)] == []
+    sharded = JsonStore(str(tmp_path), layout="sharded")
+    assert [r["id"] for r in sharded.load("questionnaires_c1.json")] == ["q1", "q2"]
+
+
+def test_convert_without_codec_package(tmp_path, monkeypatch, capsys):
+    """Sem o pacote do codec o conversor termina com mensagem e código de erro."""
+    store = JsonStore(str(tmp_path), codec="msgpack")
+    store.save({"overall_score": 7.5}, "diagnostic_c1.json")
+    monkeypatch.setattr(storage_codecs, "msgpack", None)
+
+    for codec in ("msgpack", "json"):
+        monkeypatch.setattr(sys, "argv", ["convert_storage_codec.py", "--codec", codec, "--data-folder", str(tmp_path)])
+        assert convert_main() == 1
+        assert "msgpack" in capsys.readouterr().err
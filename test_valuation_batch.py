@@ -0,0 +1,118 @@
+"""
+Testes do valuation em lote.
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from document_processor import ValuationCalculator
+from questionnaire_input import QuestionnaireInput
+from repositories import MemoryRepository, JsonRepository, SQLiteRepository
+from valuation_batch import valuation_columns, calculate_valuation_batch, value_records, value_portfolio
+from test_diagnostic_batch import plausible_record
+
+
+def _records(count, seed=5):
+    rng = random.Random(seed)
+    records = []
+    for i in range(count):
+        _, responses = plausible_record(rng)
+        responses["modelo_negocios"] = rng.choice(["SaaS", "Marketplace", "Varejo físico", ""])
+        records.append((f"c{i}", responses))
+    # Horizontes diferentes de 5 anos, sem receita, e com valor inválido
+    records.append(("mensal", {"receitas_periodos": [100000.0] * 30, "custos_periodos": [70000.0] * 30, "periodicidade": "mensal", "setor_atuacao": "Saúde"}))
+    records.append(("longo", {"receitas_periodos": "1000000; 1200000; 1500000; 1700000; 2000000; 2300000; 2600000", "custos_periodos": "800000; 900000"}))
+    records.append(("vazio", {"receita_ano1": "1000000"}))
+    records.append(("invalido", {"receita_ano1": "abc", "receita_ano5": "1000"}))
+    return records
+
+
+def test_batch_matches_scalar():
+    """Os valores do lote coincidem com ValuationCalculator.calculate_valuation."""
+    calculator = ValuationCalculator()
+    records = _records(200)
+    for (company_id, responses), (batch_id, result, values) in zip(records, value_records(records, calculator)):
+        assert batch_id == company_id
+        expected = calculator.calculate_valuation({}, responses)
+        assert result["status"] == expected["status"]
+        if values is None:
+            assert result == expected
+            continue
+        data = QuestionnaireInput.parse(responses)
+        multiplos = calculator._calculate_revenue_multiple_valuation(data.receita_final, data.setor_atuacao, data.modelo_negocios)
+        dcf = calculator._calculate_dcf_valuation(data.receitas[:data.anos], data.custos[:data.anos], data.setor_atuacao)
+        assert values["multiplos"] == pytest.approx(multiplos, rel=1e-12)
+        assert values["dcf"] == pytest.approx(dcf, rel=1e-12)
+        assert values["valuation"] == pytest.approx((multiplos + dcf) / 2, rel=1e-12)
+        assert result == expected
+
+
+def test_columnar_input():
+    """Colunas montadas diretamente, sem passar pelo questionário."""
+    columns = {
+        "receitas": np.array([[1000.0, 1200.0, 0.0], [500.0, 0.0, 0.0], [0.0, 0.0, 0.0]]),
+        "custos": np.array([[600.0, 700.0, 0.0], [400.0, 0.0, 0.0], [0.0, 0.0, 0.0]]),
+        "anos": np.array([2, 1, 3]),
+        "setor_atuacao": np.array(["Tecnologia", "Outro", ""], dtype=object),
+        "modelo_negocios": np.array(["SaaS", "", ""], dtype=object)
+    }
+    calculator = ValuationCalculator()
+    batch = calculate_valuation_batch(columns, calculator)
+    for i, (receitas, custos, setor, modelo) in enumerate([([1000.0, 1200.0], [600.0, 700.0], "Tecnologia", "SaaS"), ([500.0], [400.0], "Outro", "")]):
+        multiplos = calculator._calculate_revenue_multiple_valuation(receitas[-1], setor, modelo)
+        dcf = calculator._calculate_dcf_valuation(receitas, custos, setor)
+        assert batch["valuation"][i] == pytest.approx((multiplos + dcf) / 2, rel=1e-12)
+    assert np.isnan(batch["valuation"][2])
+    assert valuation_columns([{"receita_ano1": "1000"}])["anos"].tolist() == [5]
+
+
+def test_parallel_matches_serial():
+    """Com vários processos os resultados são os mesmos e na mesma ordem."""
+    records = _records(60, seed=9)
+    serial = list(value_portfolio(records, workers=1, chunk_size=7))
+    parallel = list(value_portfolio(iter(records), workers=2, chunk_size=7))
+    assert [row[0] for row in parallel] == [company_id for company_id, _ in records]
+    assert parallel == serial
+
+
+def test_iter_latest_questionnaires():
+    repository = MemoryRepository()
+    for company_id in ("a", "b"):
+        repository.add_company({"id": company_id, "user_id": "u1", "name": company_id})
+        for revision in range(2):
+            repository.add_questionnaire({"id": f"{company_id}{revision}", "company_id": company_id,
+                                          "responses": {"receita_ano1": str(1000 * (revision + 1))},
+                                          "created_at": f"2025-01-0{revision + 1}T00:00:00"})
+    latest = dict(repository.iter_latest_questionnaires())
+    assert sorted(latest) == ["a", "b"]
+    assert latest["a"]["responses"]["receita_ano1"] == "2000"
+
+
+@pytest.mark.parametrize("backend", ["memory", "json", "sqlite"])
+def test_iter_latest_questionnaires_without_pointer(tmp_path, backend):
+    """Empresas anteriores ao ponteiro são encontradas pelo histórico e ganham o ponteiro."""
+    repository = {
+        "memory": MemoryRepository,
+        "json": lambda: JsonRepository(str(tmp_path)),
+        "sqlite": lambda: SQLiteRepository(str(tmp_path / "db.sqlite3"))
+    }[backend]()
+    repository.add_questionnaire({"id": "a1", "company_id": "a", "responses": {"receita_ano1": "1"}, "created_at": "2025-01-01T00:00:00"})
+    # Histórico gravado antes do ponteiro existir
+    for revision in range(2):
+        repository.store.append({"id": f"b{revision}", "company_id": "b", "responses": {"receita_ano1": str(revision)},
+                                 "created_at": f"2025-01-0{revision + 1}T00:00:00"}, "questionnaires_b.json")
+    latest = dict(repository.iter_latest_questionnaires())
+    assert sorted(latest) == ["a", "b"]
+    assert latest["b"]["id"] == "b1"
+    assert repository.store.load("questionnaire_latest_b.json")["id"] == "b1"
+    assert sorted(dict(repository.iter_latest_questionnaires())) == ["a", "b"]
+
+
+def test_numbers_only():
+    records = _records(20)
+    full = value_records(records)
+    numbers = value_records(records, full_results=False)
+    assert [row[2] for row in numbers] == [row[2] for row in full]
+    assert [row[1]["status"] for row in numbers] == [row[1]["status"] for row in full]
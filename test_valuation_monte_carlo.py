@@ -0,0 +1,67 @@
+"""
+Testes do valuation por Monte Carlo.
+"""
+
+import pytest
+
+from document_processor import ValuationCalculator, PERPETUITY_GROWTH_RATE
+from dcf_sensitivity import dcf_grid
+from valuation_monte_carlo import monte_carlo_valuation, simulate_valuations, DEFAULT_UNCERTAINTY, MIN_DISCOUNT_RATE
+
+
+def _responses(setor="Tecnologia"):
+    responses = {"setor_atuacao": setor, "modelo_negocios": "Assinatura"}
+    for year, (receita, custos) in enumerate(zip([1000000, 1200000, 1500000, 1700000, 2000000],
+                                                 [800000, 900000, 1000000, 1100000, 1200000]), start=1):
+        responses[f"receita_ano{year}"] = str(receita)
+        responses[f"custos_ano{year}"] = str(custos)
+    return responses
+
+
+def test_zero_uncertainty_matches_deterministic_valuation():
+    """Sem incertezas, todos os sorteios valem o valuation determinístico."""
+    calculator = ValuationCalculator()
+    for setor in ("Tecnologia", "Varejo", "Outros"):
+        responses = _responses(setor)
+        data_receitas = [float(responses[f"receita_ano{y}"]) for y in range(1, 6)]
+        data_custos = [float(responses[f"custos_ano{y}"]) for y in range(1, 6)]
+        expected = (calculator._calculate_revenue_multiple_valuation(data_receitas[-1], setor, "Assinatura")
+                    + calculator._calculate_dcf_valuation(data_receitas, data_custos, setor)) / 2
+        valuations = simulate_valuations(responses, 100, uncertainty={name: 0 for name in DEFAULT_UNCERTAINTY})
+        assert valuations == pytest.approx([expected] * 100, rel=1e-12)
+
+
+def test_seeded_distribution_is_reproducible():
+    """A mesma semente reproduz a distribuição; os percentis são ordenados."""
+    first = monte_carlo_valuation(_responses(), draws=20000, seed=7)
+    assert monte_carlo_valuation(_responses(), draws=20000, seed=7) == first
+    assert monte_carlo_valuation(_responses(), draws=20000, seed=8)["media"] != first["media"]
+    percentiles = list(first["percentis"].values())
+    assert percentiles == sorted(percentiles)
+    assert sum(first["histograma"]["contagens"]) == 20000
+    assert len(first["histograma"]["limites"]) == len(first["histograma"]["contagens"]) + 1
+    # A mediana fica perto do valuation determinístico (choques com média 1)
+    deterministic = simulate_valuations(_responses(), 1, uncertainty={name: 0 for name in DEFAULT_UNCERTAINTY})[0]
+    assert abs(first["percentis"]["p50"] / deterministic - 1) < 0.15
+
+
+def test_requires_revenue():
+    with pytest.raises(ValueError):
+        monte_carlo_valuation({"receita_ano1": "1000"})
+    with pytest.raises(ValueError):
+        monte_carlo_valuation({"receita_ano5": "abc"})
+
+
+def test_discount_rate_floor():
+    """Com uma incerteza grande na taxa, nenhum sorteio desconta abaixo do piso."""
+    calculator = ValuationCalculator()
+    responses = _responses()
+    uncertainty = dict({name: 0 for name in DEFAULT_UNCERTAINTY}, taxa_desconto=1.0)
+    valuations = simulate_valuations(responses, 5000, uncertainty=uncertainty)
+    receitas = [float(responses[f"receita_ano{y}"]) for y in range(1, 6)]
+    custos = [float(responses[f"custos_ano{y}"]) for y in range(1, 6)]
+    multiplos = calculator._calculate_revenue_multiple_valuation(receitas[-1], "Tecnologia", "Assinatura")
+    # Fluxos positivos: o maior valuation é o do piso da taxa
+    ceiling = (multiplos + dcf_grid(receitas, custos, [MIN_DISCOUNT_RATE], [PERPETUITY_GROWTH_RATE])[0][0]) / 2
+    assert valuations.min() > 0
+    assert valuations.max() == pytest.approx(ceiling, rel=1e-12)
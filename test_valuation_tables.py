@@ -0,0 +1,81 @@
+"""
+Testes das tabelas de valuation.
+"""
+
+import json
+import os
+
+import pytest
+
+import valuation_tables
+from document_processor import ValuationCalculator
+from valuation_tables import ValuationTables, DEFAULT_VALUATION_TABLES_PATH, load_valuation_tables
+
+
+def _spec():
+    with open(DEFAULT_VALUATION_TABLES_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_lookups_and_defaults():
+    """Setores e modelos não listados usam Outros e Outro; as tabelas são imutáveis."""
+    tables = load_valuation_tables()
+    assert tables.revenue_multiple("SaaS", "Assinatura") == 6.0 * 1.5
+    assert tables.revenue_multiple("Desconhecido", "") == tables.multiplos_setor["Outros"] * tables.ajustes_modelo["Outro"]
+    assert tables.discount_rate("Varejo") == 0.12
+    assert tables.discount_rate(None) == tables.taxas_desconto["Outros"]
+    with pytest.raises(TypeError):
+        tables.taxas_desconto["Varejo"] = 0.5
+
+
+@pytest.mark.parametrize("change", [
+    lambda spec: spec.pop("version"),
+    lambda spec: spec["multiplos_setor"].pop("Outros"),
+    lambda spec: spec["ajustes_modelo"].update({"SaaS": "alto"}),
+    lambda spec: spec["taxas_desconto"].update({"Varejo": 0}),
+    lambda spec: spec["taxas_desconto"].update({"Varejo": 0.03}),
+    lambda spec: spec["taxas_desconto"].update({"Varejo": 0.02}),
+])
+def test_invalid_tables(change):
+    spec = _spec()
+    change(spec)
+    with pytest.raises(ValueError):
+        ValuationTables(spec)
+
+
+def test_version_follows_values():
+    """A versão muda com qualquer valor das tabelas, mas não com a descrição."""
+    spec = _spec()
+    version = ValuationTables(spec).version
+    assert version.startswith(f"{spec['version']}-")
+    spec["description"] = "outra descrição"
+    assert ValuationTables(spec).version == version
+    spec["multiplos_setor"]["Varejo"] = 1.1
+    assert ValuationTables(spec).version != version
+
+
+def test_reload_on_change(tmp_path, monkeypatch):
+    """O arquivo é relido quando muda; um arquivo inválido mantém a versão anterior."""
+    path = tmp_path / "valuation_tables.json"
+    spec = _spec()
+    path.write_text(json.dumps(spec), encoding="utf-8")
+    monkeypatch.setenv("VALUATION_TABLES_PATH", str(path))
+    monkeypatch.setattr(valuation_tables, "_default_file", None)
+    monkeypatch.setattr(valuation_tables, "RELOAD_CHECK_INTERVAL", 0)
+
+    calculator = ValuationCalculator()
+    responses = {"receita_ano1": "1000000", "custos_ano1": "600000", "receita_ano5": "1500000", "custos_ano5": "900000", "setor_atuacao": "Varejo"}
+    first = calculator.calculate_valuation({}, responses)
+    assert first["tables_version"] == ValuationTables(spec).version
+
+    spec["version"] = "2"
+    spec["taxas_desconto"]["Varejo"] = 0.2
+    path.write_text(json.dumps(spec), encoding="utf-8")
+    os.utime(path, ns=(1, 10 ** 18))
+    second = calculator.calculate_valuation({}, responses)
+    assert second["tables_version"].startswith("2-")
+    assert second["details"]["dcf"] != first["details"]["dcf"]
+
+    path.write_text("{", encoding="utf-8")
+    os.utime(path, ns=(1, 2 * 10 ** 18))
+    assert calculator.calculate_valuation({}, responses) == second
@@ -0,0 +1,273 @@
+"""
+Valuation vetorizado para carteiras inteiras.
+Calcula os valuations por múltiplos de receita e por DCF de milhares de empresas de
+uma vez a partir de entradas colunares (arrays NumPy), com os mesmos valores de
+ValuationCalculator.calculate_valuation (até o arredondamento de ponto flutuante).
+
+Colunas de entrada (n empresas):
+    receitas, custos: séries anuais (n, k) a partir do ano 1 (0 além do horizonte)
+    anos: (n,) horizonte de cada empresa em anos
+    setor_atuacao, modelo_negocios: (n,) textos, para os múltiplos e taxas de desconto
+    valid: (n,) bool, False para respostas com valores inválidos (opcional)
+
+O comando de linha percorre os questionários armazenados (revisão mais recente de
+cada empresa) em lotes, distribuídos entre processos:
+
+    python valuation_batch.py [--output valuations.csv] [--store] [--workers 4] [--data-folder data]
+"""
+
+import os
+import sys
+import csv
+import math
+import time
+import logging
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from document_processor import ValuationCalculator, PERPETUITY_GROWTH_RATE, VALUATION_STATUS
+from questionnaire_input import QuestionnaireInput, SERIES_YEARS
+from repositories import create_repository, storage_config_from_env
+
+logger = logging.getLogger(__name__)
+
+# Empresas por lote enviado a cada processo
+DEFAULT_CHUNK_SIZE = 1000
+
+CSV_FIELDS = ("company_id", "multiplos", "dcf", "valuation", "range_min", "range_max", "status")
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("O valuation em lote requer o pacote numpy (pip install numpy)")
+
+
+def valuation_columns(records):
+    """
+    Monta as colunas de entrada a partir de respostas do questionário.
+
+    Args:
+        records: Sequência de respostas (ou QuestionnaireInput)
+
+    Returns:
+        Dicionário de arrays NumPy aceito por calculate_valuation_batch
+    """
+    _require_numpy()
+    records = [QuestionnaireInput.parse(data) for data in records]
+    width = max([SERIES_YEARS] + [data.anos for data in records])
+
+    def matrix(name):
+        # Séries (array("d")) concatenadas em um único buffer; anos além do horizonte valem zero
+        buffer = b"".join(getattr(data, name)[:data.anos].tobytes() + bytes(8 * (width - data.anos)) for data in records)
+        return np.frombuffer(buffer, dtype=np.float64).reshape(-1, width).copy()
+
+    columns = {
+        "receitas": matrix("receitas"),
+        "custos": matrix("custos"),
+        "anos": np.array([data.anos for data in records], dtype=int),
+        "setor_atuacao": np.array([data.setor_atuacao or "" for data in records], dtype=object),
+        "modelo_negocios": np.array([data.modelo_negocios or "" for data in records], dtype=object),
+        "valid": np.array([not data.errors for data in records], dtype=bool)
+    }
+    return columns
+
+
+def calculate_valuation_batch(columns, calculator=None):
+    """
+    Calcula o valuation de várias empresas de forma vetorizada.
+
+    Args:
+        columns: Dicionário de arrays (ver a descrição do módulo ou valuation_columns)
+        calculator: ValuationCalculator com as tabelas de múltiplos e taxas de desconto
+
+    Returns:
+        Dicionário de arrays (n,) "multiplos", "dcf", "valuation", "range_min" e
+        "range_max" (NaN sem receita no último ano ou com respostas inválidas),
+        "taxa_desconto", "multiplo" e "tables_version" (versão das tabelas usadas)
+    """
+    _require_numpy()
+    calculator = calculator or ValuationCalculator()
+    tables = calculator.tables
+    receitas = np.asarray(columns["receitas"], dtype=float)
+    custos = np.asarray(columns["custos"], dtype=float)
+    n, width = receitas.shape
+    anos = np.asarray(columns.get("anos", np.full(n, width)), dtype=int)
+    valid = np.asarray(columns.get("valid", np.ones(n, dtype=bool)), dtype=bool)
+    setores = np.asarray(columns["setor_atuacao"], dtype=object)
+    modelos = np.asarray(columns["modelo_negocios"], dtype=object)
+
+    # Múltiplo e taxa de desconto: tabelas consultadas uma vez por setor/modelo distinto
+    setor_ids, setor_index = np.unique(setores.astype(str), return_inverse=True)
+    modelo_ids, modelo_index = np.unique(modelos.astype(str), return_inverse=True)
+    multiplos_tabela = np.array([[tables.revenue_multiple(setor, modelo) for modelo in modelo_ids] for setor in setor_ids], dtype=float)
+    multiplo = multiplos_tabela[setor_index, modelo_index]
+    taxa_desconto = np.array([tables.discount_rate(setor) for setor in setor_ids], dtype=float)[setor_index]
+
+    rows = np.arange(n)
+    last = np.maximum(anos, 1) - 1
+    receita_final = receitas[rows, last]
+    ok = valid & (anos > 0) & (receita_final > 0)
+
+    # DCF: fluxos do horizonte de cada empresa descontados por (1 + taxa)^-(t+1)
+    horizonte = np.arange(width) < anos[:, np.newaxis]
+    fluxos = np.where(horizonte, receitas - custos, 0.0)
+    desconto = np.power(1 + taxa_desconto[:, np.newaxis], -np.arange(1, width + 1))
+    valor_presente = np.einsum("ij,ij->i", fluxos, desconto)
+    crescimento = PERPETUITY_GROWTH_RATE
+    valor_terminal = fluxos[rows, last] * (1 + crescimento) / (taxa_desconto - crescimento)
+    dcf = valor_presente + valor_terminal * desconto[rows, last]
+
+    multiplos = receita_final * multiplo
+    valuation = (multiplos + dcf) / 2
+    nan = np.full(n, np.nan)
+    return {
+        "multiplos": np.where(ok, multiplos, nan),
+        "dcf": np.where(ok, dcf, nan),
+        "valuation": np.where(ok, valuation, nan),
+        "range_min": np.where(ok, valuation * 0.8, nan),
+        "range_max": np.where(ok, valuation * 1.2, nan),
+        "taxa_desconto": taxa_desconto,
+        "multiplo": multiplo,
+        "tables_version": tables.version
+    }
+
+
+def value_records(records, calculator=None, full_results=True):
+    """
+    Calcula o valuation de um lote de empresas (também usado por cada processo).
+
+    Args:
+        records: Lista de tuplas (id da empresa, respostas do questionário)
+        calculator: ValuationCalculator com as tabelas de múltiplos e taxas de desconto
+        full_results: Se False, o resultado de um valuation calculado traz apenas o
+            status (sem valores formatados nem premissas)
+
+    Returns:
+        Lista de tuplas (id da empresa, resultado no formato de calculate_valuation,
+        dicionário com os valores numéricos ou None)
+    """
+    # Fixa uma única versão das tabelas para todo o lote, mesmo se o arquivo mudar
+    calculator = ValuationCalculator((calculator or ValuationCalculator()).tables)
+    parsed = [QuestionnaireInput.parse(responses) for _, responses in records]
+    columns = valuation_columns(parsed)
+    batch = calculate_valuation_batch(columns, calculator)
+    names = ("multiplos", "dcf", "valuation", "range_min", "range_max")
+    rows = zip(*(batch[name].tolist() for name in names))
+
+    results = []
+    for (company_id, _), data, row in zip(records, parsed, rows):
+        if data.errors:
+            result = {
+                "status": "Erro no cálculo",
+                "message": f"Ocorreu um erro ao calcular o valuation: {'; '.join(data.errors)}"
+            }
+            values = None
+        elif math.isnan(row[2]):
+            result = {
+                "status": "Dados insuficientes",
+                "message": "É necessário fornecer projeções de receita para calcular o valuation."
+            }
+            values = None
+        else:
+            values = dict(zip(names, row))
+            if full_results:
+                result = calculator.valuation_result(data, values["multiplos"], values["dcf"])
+            else:
+                result = {"status": VALUATION_STATUS}
+        results.append((company_id, result, values))
+    return results
+
+
+def value_portfolio(records, workers=1, chunk_size=DEFAULT_CHUNK_SIZE, full_results=True):
+    """
+    Calcula o valuation de uma carteira em lotes, em paralelo com workers > 1.
+    Os lotes são lidos sob demanda (no máximo dois por processo em andamento) e os
+    resultados saem na ordem de entrada.
+
+    Args:
+        records: Iterável de tuplas (id da empresa, respostas do questionário)
+        workers: Processos (1 calcula no próprio processo)
+        chunk_size: Empresas por lote
+        full_results: Ver value_records
+
+    Yields:
+        Tuplas de value_records
+    """
+    def chunks():
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    if workers <= 1:
+        for chunk in chunks():
+            yield from value_records(chunk, full_results=full_results)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks():
+            pending.append(executor.submit(value_records, chunk, None, full_results))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Valuation em lote dos questionários armazenados")
+    parser.add_argument("--output", help="Arquivo CSV de saída (padrão: saída padrão)")
+    parser.add_argument("--store", action="store_true", help="Grava o valuation de cada empresa no repositório")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processos de cálculo")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Empresas por lote")
+    parser.add_argument("--data-folder", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    repository = create_repository(storage_config_from_env(args.data_folder), args.data_folder)
+    records = ((company_id, questionnaire.get("responses") or {}) for company_id, questionnaire in repository.iter_latest_questionnaires())
+
+    output = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    start = time.perf_counter()
+    count = 0
+    valued = 0
+    try:
+        writer = csv.writer(output)
+        writer.writerow(CSV_FIELDS)
+        for company_id, result, values in value_portfolio(records, args.workers, args.chunk_size, full_results=args.store):
+            values = values or {}
+            writer.writerow([
+                company_id,
+                values.get("multiplos", ""), values.get("dcf", ""), values.get("valuation", ""),
+                values.get("range_min", ""), values.get("range_max", ""), result["status"]
+            ])
+            if args.store:
+                repository.save_valuation(company_id, result)
+            count += 1
+            if values:
+                valued += 1
+            if count % 10000 == 0:
+                print(f"{count} empresas avaliadas...", file=sys.stderr, flush=True)
+    finally:
+        if args.output:
+            output.close()
+
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed > 0 else float("inf")
+    print(f"{count} empresas com questionário encontradas, {valued} avaliadas ({count - valued} com dados insuficientes) "
+          f"em {elapsed:.2f}s ({rate:,.0f} empresas/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
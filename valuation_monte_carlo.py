@@ -0,0 +1,158 @@
+"""
+Valuation por simulação de Monte Carlo.
+Em vez do intervalo fixo de ±20% em torno da média dos métodos, sorteia a taxa de
+desconto, o crescimento na perpetuidade, o múltiplo de receita do setor e trajetórias
+de receitas e custos (arrays NumPy com todos os sorteios) e calcula o DCF e os
+múltiplos de todos os sorteios de forma vetorizada, com o mesmo modelo de
+ValuationCalculator: o valuation de cada sorteio é a média dos dois métodos.
+
+O gerador é semeado (seed), então as mesmas entradas produzem a mesma distribuição.
+Com todas as incertezas zeradas, cada sorteio é igual ao valuation determinístico.
+A taxa de desconto sorteada tem um piso positivo (MIN_DISCOUNT_RATE), para que as
+caudas da distribuição não descontem com taxas nulas ou negativas.
+"""
+
+import logging
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from document_processor import ValuationCalculator, PERPETUITY_GROWTH_RATE, format_currency
+from questionnaire_input import QuestionnaireInput
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DRAWS = 100000
+DEFAULT_SEED = 20240601
+
+# Incertezas padrão:
+#   taxa_desconto: desvio padrão absoluto em torno da taxa do setor
+#   crescimento_perpetuidade: desvio padrão absoluto em torno de 3%
+#   multiplo: desvio padrão do logaritmo do múltiplo de receita
+#   receita: desvio padrão anual do logaritmo da receita (choques acumulados ano a ano)
+#   custos: desvio padrão do logaritmo da relação custos/receita de cada ano
+DEFAULT_UNCERTAINTY = {
+    "taxa_desconto": 0.02,
+    "crescimento_perpetuidade": 0.01,
+    "multiplo": 0.25,
+    "receita": 0.10,
+    "custos": 0.05
+}
+
+# Diferença mínima entre a taxa de desconto e o crescimento na perpetuidade
+MIN_RATE_SPREAD = 0.02
+
+# Piso da taxa de desconto sorteada (ou a taxa do setor, se for menor): com ele o
+# crescimento na perpetuidade médio (3%) ainda fica MIN_RATE_SPREAD abaixo da taxa
+MIN_DISCOUNT_RATE = PERPETUITY_GROWTH_RATE + 2 * MIN_RATE_SPREAD
+
+# Versão da simulação, parte da chave dos resultados memoizados (incrementar ao mudar o modelo)
+SIMULATION_VERSION = "2"
+
+PERCENTILES = (5, 10, 25, 50, 75, 90, 95)
+
+HISTOGRAM_BINS = 40
+
+
+def _lognormal_factor(rng, sigma, size):
+    """Fatores lognormais com média 1 (todos iguais a 1 quando sigma é zero)."""
+    if sigma == 0:
+        return np.ones(size)
+    factor = rng.standard_normal(size)
+    factor *= sigma
+    factor -= sigma * sigma / 2
+    return np.exp(factor, out=factor)
+
+
+def simulate_valuations(data, draws=DEFAULT_DRAWS, seed=DEFAULT_SEED, uncertainty=None, calculator=None):
+    """
+    Sorteia as premissas e calcula o valuation de cada sorteio.
+
+    Args:
+        data: Respostas do questionário (ou QuestionnaireInput)
+        draws: Quantidade de sorteios
+        seed: Semente do gerador (numpy.random.default_rng)
+        uncertainty: Incertezas que substituem as de DEFAULT_UNCERTAINTY
+        calculator: ValuationCalculator com as tabelas de múltiplos e taxas
+
+    Returns:
+        Array com o valuation de cada sorteio
+    """
+    if np is None:
+        raise RuntimeError("O valuation por Monte Carlo requer o pacote numpy (pip install numpy)")
+    data = QuestionnaireInput.parse(data)
+    calculator = calculator or ValuationCalculator()
+    sigma = dict(DEFAULT_UNCERTAINTY, **(uncertainty or {}))
+    rng = np.random.default_rng(seed)
+    tables = calculator.tables
+
+    receitas = np.asarray(data.receitas[:data.anos], dtype=float)
+    custos = np.asarray(data.custos[:data.anos], dtype=float)
+    years = len(receitas)
+
+    # Premissas de mercado
+    taxa_base = tables.discount_rate(data.setor_atuacao)
+    taxa_desconto = taxa_base + sigma["taxa_desconto"] * rng.standard_normal(draws)
+    np.maximum(taxa_desconto, min(MIN_DISCOUNT_RATE, taxa_base), out=taxa_desconto)
+    crescimento = PERPETUITY_GROWTH_RATE + sigma["crescimento_perpetuidade"] * rng.standard_normal(draws)
+    crescimento = np.minimum(crescimento, taxa_desconto - MIN_RATE_SPREAD)
+    multiplo = tables.revenue_multiple(data.setor_atuacao, data.modelo_negocios) * _lognormal_factor(rng, sigma["multiplo"], draws)
+
+    # Trajetórias: choques de receita acumulados e relação custos/receita sorteada por ano
+    # (operações in-place para não alocar cópias das matrizes sorteios x anos)
+    receitas_sim = rng.standard_normal((draws, years))
+    receitas_sim *= sigma["receita"]
+    receitas_sim -= sigma["receita"] ** 2 / 2
+    np.cumsum(receitas_sim, axis=1, out=receitas_sim)
+    np.exp(receitas_sim, out=receitas_sim)
+    receitas_sim *= receitas
+    cost_ratio = np.divide(custos, receitas, out=np.zeros(years), where=receitas > 0)
+    custos_sim = _lognormal_factor(rng, sigma["custos"], (draws, years))
+    custos_sim *= np.where(receitas > 0, receitas_sim * cost_ratio, custos)
+
+    # DCF de todos os sorteios: fatores de desconto 1 / (1 + taxa)^(t+1) como produto acumulado
+    fluxos = np.subtract(receitas_sim, custos_sim, out=custos_sim)
+    desconto = np.cumprod(np.broadcast_to((1 / (1 + taxa_desconto))[:, np.newaxis], (draws, years)), axis=1)
+    valor_presente = np.einsum("ij,ij->i", fluxos, desconto)
+    valor_terminal = fluxos[:, -1] * (1 + crescimento) / (taxa_desconto - crescimento)
+    dcf = valor_presente + valor_terminal * desconto[:, -1]
+
+    return (multiplo * receitas_sim[:, -1] + dcf) / 2
+
+
+def monte_carlo_valuation(questionnaire_data, draws=DEFAULT_DRAWS, seed=DEFAULT_SEED, uncertainty=None, calculator=None):
+    """
+    Distribuição do valuation por Monte Carlo.
+
+    Raises:
+        ValueError: Se as respostas forem inválidas ou não houver receita no último ano
+
+    Returns:
+        Dicionário com "sorteios", "semente", "media", "desvio_padrao", "percentis"
+        ({"p5": ..., "p95": ...}), "formatado" (percentis em reais) e "histograma"
+        ({"limites": [...], "contagens": [...]})
+    """
+    data = QuestionnaireInput.parse(questionnaire_data)
+    if data.errors:
+        raise ValueError("; ".join(data.errors))
+    if data.receita_final <= 0:
+        raise ValueError("É necessário fornecer projeções de receita para calcular o valuation.")
+    calculator = calculator or ValuationCalculator()
+
+    valuations = simulate_valuations(data, draws, seed, uncertainty, calculator)
+    percentiles = np.percentile(valuations, PERCENTILES)
+    counts, edges = np.histogram(valuations, bins=HISTOGRAM_BINS)
+    logger.info(f"Valuation por Monte Carlo com {draws} sorteios")
+
+    result = {
+        "sorteios": draws,
+        "semente": seed,
+        "media": float(valuations.mean()),
+        "desvio_padrao": float(valuations.std()),
+        "percentis": {f"p{p}": float(value) for p, value in zip(PERCENTILES, percentiles)},
+        "histograma": {"limites": edges.tolist(), "contagens": counts.tolist()}
+    }
+    result["formatado"] = {name: format_currency(value) for name, value in result["percentis"].items()}
+    return result
@@ -0,0 +1,138 @@
+"""
+Tabelas do valuation: múltiplos de receita por setor, ajustes por modelo de negócio e
+taxas de desconto por setor.
+As tabelas ficam em um arquivo JSON versionado (valuation_tables.json, ou o arquivo
+indicado em VALUATION_TABLES_PATH), carregado uma única vez em mapeamentos imutáveis.
+O arquivo é relido quando muda (data de modificação), sem reiniciar a aplicação; a
+versão das tabelas (a declarada no arquivo mais um hash dos valores) é gravada em cada
+valuation e faz parte da chave de memoização.
+"""
+
+import os
+import json
+import math
+import hashlib
+import time
+import logging
+import threading
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VALUATION_TABLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "valuation_tables.json")
+
+# Entradas usadas para setores e modelos de negócio não listados
+DEFAULT_SECTOR = "Outros"
+DEFAULT_MODEL = "Outro"
+
+# Intervalo mínimo (segundos) entre verificações da data de modificação do arquivo
+RELOAD_CHECK_INTERVAL = 1.0
+
+# Crescimento na perpetuidade do valor terminal do DCF; as taxas de desconto precisam
+# superá-lo (com taxa igual ou menor, o valor terminal divide por zero ou fica negativo)
+PERPETUITY_GROWTH_RATE = 0.03
+
+
+class ValuationTables:
+    """Tabelas imutáveis de uma versão do arquivo."""
+
+    __slots__ = ("version", "multiplos_setor", "ajustes_modelo", "taxas_desconto")
+
+    def __init__(self, spec):
+        version = spec.get("version")
+        if version is None or str(version) == "":
+            raise ValueError("Tabelas de valuation: informe version")
+        self.multiplos_setor = self._table(spec, "multiplos_setor", DEFAULT_SECTOR, lambda value: value > 0)
+        self.ajustes_modelo = self._table(spec, "ajustes_modelo", DEFAULT_MODEL, lambda value: value > 0)
+        self.taxas_desconto = self._table(spec, "taxas_desconto", DEFAULT_SECTOR, lambda value: PERPETUITY_GROWTH_RATE < value < 1)
+        self.version = f"{version}-{self._content_hash()}"
+
+    def _content_hash(self):
+        """Hash dos valores das tabelas: qualquer alteração muda a versão, mesmo sem incrementar version."""
+        canonical = json.dumps(
+            {name: dict(getattr(self, name)) for name in ("multiplos_setor", "ajustes_modelo", "taxas_desconto")},
+            sort_keys=True, ensure_ascii=False, separators=(",", ":")
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:12]
+
+    @staticmethod
+    def _table(spec, name, default_key, valid):
+        table = spec.get(name)
+        if not isinstance(table, dict) or default_key not in table:
+            raise ValueError(f"Tabela {name}: informe os valores por chave, incluindo {default_key}")
+        values = {}
+        for key, value in table.items():
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Tabela {name}: valor inválido para {key} ({value!r})")
+            if not math.isfinite(value) or not valid(value):
+                raise ValueError(f"Tabela {name}: valor fora da faixa para {key} ({value})")
+            values[key] = value
+        return MappingProxyType(values)
+
+    def revenue_multiple(self, setor, modelo_negocios):
+        """Múltiplo de receita do setor, ajustado pelo modelo de negócio."""
+        multiplo_base = self.multiplos_setor.get(setor, self.multiplos_setor[DEFAULT_SECTOR])
+        ajuste = self.ajustes_modelo.get(modelo_negocios, self.ajustes_modelo[DEFAULT_MODEL])
+        return multiplo_base * ajuste
+
+    def discount_rate(self, setor):
+        """Taxa de desconto do setor (ou a padrão)."""
+        return self.taxas_desconto.get(setor, self.taxas_desconto[DEFAULT_SECTOR])
+
+
+def load_valuation_tables(path=None):
+    """Carrega e valida as tabelas de um arquivo JSON."""
+    path = path or DEFAULT_VALUATION_TABLES_PATH
+    with open(path, encoding="utf-8") as f:
+        spec = json.load(f)
+    tables = ValuationTables(spec)
+    logger.info(f"Tabelas de valuation versão {tables.version} carregadas de {path}")
+    return tables
+
+
+class _TablesFile:
+    """Tabelas de um arquivo, relidas quando a data de modificação muda."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._tables = None
+        self._mtime = None
+        self._checked = 0.0
+
+    def get(self):
+        now = time.monotonic()
+        if self._tables is not None and now - self._checked < RELOAD_CHECK_INTERVAL:
+            return self._tables
+        with self._lock:
+            self._checked = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError as e:
+                if self._tables is None:
+                    raise
+                logger.error(f"Tabelas de valuation inacessíveis ({e}); mantendo a versão {self._tables.version}")
+                return self._tables
+            if mtime != self._mtime:
+                try:
+                    self._tables = load_valuation_tables(self.path)
+                except (OSError, ValueError) as e:
+                    # Um arquivo inválido não derruba o cálculo: mantém a versão anterior
+                    if self._tables is None:
+                        raise
+                    logger.error(f"Tabelas de valuation inválidas em {self.path} ({e}); mantendo a versão {self._tables.version}")
+                self._mtime = mtime
+            return self._tables
+
+
+_default_file = None
+
+
+def default_valuation_tables():
+    """Tabelas do arquivo padrão (ou de VALUATION_TABLES_PATH), relidas quando o arquivo muda."""
+    global _default_file
+    if _default_file is None:
+        _default_file = _TablesFile(os.environ.get("VALUATION_TABLES_PATH") or DEFAULT_VALUATION_TABLES_PATH)
+    return _default_file.get()